@@ -0,0 +1,170 @@
+"""
+Cold-start import benchmark: what each pipeline stage imports before it does any work.
+
+Each stage's import path (the same modules run.py resolves for it) runs in a fresh
+interpreter under `python -X importtime`, and interpreter startup (site etc.) is left out.
+The script reports the total import time and the heaviest top-level imports. It fails if a
+stage goes over its budget, or if it imports a module it must not need (e.g. Playwright or
+bs4 for `--stage persist`).
+
+Run via:
+  python backend/benchmarks/bench_importtime.py
+  python backend/benchmarks/bench_importtime.py --stages persist normalize --repeat 10
+  python backend/benchmarks/bench_importtime.py --budget persist=80 --output importtime.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+
+def _repo_root() -> Path:
+    # backend/benchmarks/bench_importtime.py -> backend/benchmarks -> backend -> repo root
+    return Path(__file__).resolve().parents[2]
+
+
+_LOAD_PLUGIN = (
+    "from agents.spec_pipeline.core.registry import load_plugin\n"
+    "plugin = load_plugin({brand!r}, {product_type!r})\n"
+)
+
+# Mirrors run.py: every stage loads the plugin, then imports what that stage calls.
+STAGE_IMPORTS: Dict[str, str] = {
+    "discovery": _LOAD_PLUGIN + "from agents.spec_pipeline.core.discovery import discover\n",
+    "extraction": _LOAD_PLUGIN,
+    "normalize": _LOAD_PLUGIN + "import psycopg2\n",
+    "persist": _LOAD_PLUGIN + "from agents.spec_pipeline.core.persistence import persist_normalized_json\n",
+}
+
+# Top-level packages a stage must not import at startup.
+FORBIDDEN: Dict[str, List[str]] = {
+    "discovery": ["psycopg2"],
+    "extraction": ["psycopg2"],
+    "normalize": ["playwright"],
+    "persist": ["playwright", "bs4", "requests"],
+}
+
+# Import-time budgets (ms, best of --repeat runs); override with --budget stage=ms.
+DEFAULT_BUDGET_MS: Dict[str, float] = {
+    "discovery": 120.0,
+    "extraction": 120.0,
+    "normalize": 160.0,
+    "persist": 160.0,
+}
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for each `import time:` line, with nesting kept in the name."""
+    rows: List[Tuple[str, int, int]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:       204 |      17171 |   psycopg2" (two extra spaces per nesting level)
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        try:
+            rows.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def _run_importtime(code: str, env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=str(_repo_root()),
+    )
+
+
+def _startup_modules(env: Dict[str, str]) -> Set[str]:
+    """Top-level imports of a bare interpreter (site, encodings, ...); they're not the stage's cost."""
+    rows = _parse_importtime(_run_importtime("pass", env).stderr)
+    return {name for name, _, _ in rows if not name.startswith(" ")}
+
+
+def _measure(stage: str, code: str, env: Dict[str, str], startup: Set[str]) -> Dict[str, Any]:
+    proc = _run_importtime(code, env)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["(no output)"]
+        raise RuntimeError(f"{stage}: import failed: {tail[0]}")
+
+    rows = _parse_importtime(proc.stderr)
+    # Top-level entries (no leading indent) don't overlap, so their cumulative times add up.
+    top_level = [(name, cum) for name, _, cum in rows if not name.startswith(" ") and name not in startup]
+    modules = {name.strip() for name, _, _ in rows}
+    return {
+        "total_ms": round(sum(cum for _, cum in top_level) / 1000, 2),
+        "modules": len(modules),
+        "top": [(name, round(cum / 1000, 2)) for name, cum in sorted(top_level, key=lambda r: -r[1])[:8]],
+        "loaded": modules,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--brand", default="canon")
+    parser.add_argument("--product-type", default="camera")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGE_IMPORTS), default=list(STAGE_IMPORTS))
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per stage (best run is reported).")
+    parser.add_argument("--budget", action="append", default=[], metavar="STAGE=MS", help="Override a stage budget.")
+    parser.add_argument("--output", default=None, help="Write results JSON here.")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGET_MS)
+    for spec in args.budget:
+        stage, _, ms = spec.partition("=")
+        if stage not in budgets or not ms:
+            parser.error(f"--budget expects STAGE=MS with STAGE in {sorted(budgets)}")
+        budgets[stage] = float(ms)
+
+    env = dict(os.environ)
+    backend_src = str(_repo_root() / "backend" / "src")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [backend_src, env.get("PYTHONPATH", "")] if p)
+
+    startup = _startup_modules(env)
+    results: Dict[str, Any] = {"python": sys.version.split()[0], "stages": {}}
+    failures: List[str] = []
+    for stage in args.stages:
+        code = STAGE_IMPORTS[stage].format(brand=args.brand, product_type=args.product_type)
+        try:
+            runs = [_measure(stage, code, env, startup) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            failures.append(str(e))
+            continue
+        best = min(runs, key=lambda r: r["total_ms"])
+        loaded = best.pop("loaded")
+        forbidden = sorted(m for m in FORBIDDEN.get(stage, []) if m in loaded)
+        best.update({"budget_ms": budgets[stage], "forbidden_imports": forbidden})
+        results["stages"][stage] = best
+
+        status = "ok"
+        if forbidden:
+            status = "FORBIDDEN"
+            failures.append(f"{stage}: imports {', '.join(forbidden)}")
+        if best["total_ms"] > budgets[stage]:
+            status = "OVER BUDGET"
+            failures.append(f"{stage}: {best['total_ms']}ms > budget {budgets[stage]}ms")
+        heaviest = ", ".join(f"{name}={ms}ms" for name, ms in best["top"][:4])
+        print(
+            f"{stage:11s} {best['total_ms']:8.1f}ms (budget {budgets[stage]:.0f}ms) "
+            f"modules={best['modules']:4d} {status:11s} heaviest: {heaviest}"
+        )
+
+    if args.output:
+        results["failures"] = failures
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+"""
+End-to-end benchmark: discovery + extraction + parsing against a recorded HTTP corpus.
+
+Traffic is recorded once into a replay directory (HAR files, see core/replay.py) and then
+replayed offline, so runs are reproducible and need no network access. Pacing delays are
+zeroed in replay mode, so the numbers measure the pipeline itself, not politeness sleeps.
+
+Run via:
+  # one-off, needs network: record a fixed corpus (first --max-products products)
+  python backend/benchmarks/bench_pipeline.py --record --max-products 10
+  # offline
+  python backend/benchmarks/bench_pipeline.py
+  python backend/benchmarks/bench_pipeline.py --stages parse --repeat 20 --output bench.json
+"""
+
+import argparse
+import dataclasses
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+def _repo_root() -> Path:
+    # backend/benchmarks/bench_pipeline.py -> backend/benchmarks -> backend -> repo root
+    return Path(__file__).resolve().parents[2]
+
+
+sys.path.insert(0, str(_repo_root() / "backend" / "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from agents.spec_pipeline.core.browser import close_all_sessions  # noqa: E402
+from agents.spec_pipeline.core.discovery import discover  # noqa: E402
+from agents.spec_pipeline.core.extraction import CanonCameraExtractor, extract  # noqa: E402
+from agents.spec_pipeline.core.registry import load_plugin  # noqa: E402
+from agents.spec_pipeline.core.replay import RECORD, REPLAY, configure_replay, save_recordings  # noqa: E402
+
+STAGES = ["discovery", "extraction", "parse"]
+
+# Applied in replay mode only; a recording run keeps the plugin's polite delays.
+_NO_DELAYS = {"delay_min": 0.0, "delay_max": 0.0, "pacing_min_delay": 0.0}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 3) if seconds > 0 else 0.0
+
+
+def _discovery_pages(payload: Dict[str, Any]) -> int:
+    """Page loads (listing pages + load-more clicks, or sitemap files) behind an inventory."""
+    stats = payload.get("stats") or {}
+    if payload.get("source") == "sitemap":
+        return int(stats.get("sitemaps_fetched", 0))
+    pages = 0
+    for listing in (stats.get("listing_urls") or {}).values():
+        pages += int(listing.get("url_pagination_pages_checked", 0)) + int(listing.get("load_more_clicks", 0))
+    return pages
+
+
+def _bench_discovery(plugin, work_dir: Path, overrides: Dict[str, Any], max_products: int) -> Dict[str, Any]:
+    config = dataclasses.replace(
+        plugin.DISCOVERY_CONFIG,
+        headless=True,
+        browser_profile_dir=None,
+        max_products=max_products,
+        incremental=False,
+        resume=False,
+        output_path=str(work_dir / "urls.json"),
+        **overrides,
+    )
+    start = time.perf_counter()
+    payload = discover(config)
+    seconds = time.perf_counter() - start
+    pages = _discovery_pages(payload)
+    return {
+        "seconds": round(seconds, 3),
+        "pages": pages,
+        "pages_per_second": _rate(pages, seconds),
+        "urls": payload["total_urls"],
+        "source": payload.get("source", "listing"),
+        "product_urls": payload["urls"],
+    }
+
+
+def _bench_extraction(plugin, work_dir: Path, overrides: Dict[str, Any], product_urls: List[str]) -> Dict[str, Any]:
+    config = dataclasses.replace(
+        plugin.EXTRACTION_CONFIG,
+        headless=True,
+        browser_profile_dir=None,
+        max_products=None,
+        html_cache_dir=None,
+        # measure parsing, not parse-cache hits from an earlier run (and keep the tree clean)
+        parse_cache_dir=None,
+        cache_only=False,
+        incremental=False,
+        resume=False,
+        raw_html_dir=str(work_dir / "raw_html"),
+        output_path=str(work_dir / "extractions.json"),
+        **overrides,
+    )
+    start = time.perf_counter()
+    payload = extract(config, product_urls)
+    seconds = time.perf_counter() - start
+    items = payload.get("items", [])
+    failed = [it["product_url"] for it in items if it.get("errors")]
+    return {
+        "seconds": round(seconds, 3),
+        "pages": len(items),
+        "pages_per_second": _rate(len(items), seconds),
+        "ms_per_page": round(seconds * 1000 / len(items), 1) if items else None,
+        "failed": failed,
+        "raw_html_pages": [
+            (it["product_url"], it["raw_html_path"]) for it in items if it.get("raw_html_path") and not it.get("errors")
+        ],
+    }
+
+
+def _bench_parse(plugin, html_pages: List[Tuple[str, str]], repeat: int) -> Dict[str, Any]:
+    """Parse-only cost (BeautifulSoup + spec/image/price parsers) per page, best of `repeat`."""
+    extractor = CanonCameraExtractor(plugin.EXTRACTION_CONFIG)
+    pages = [(url, Path(p).read_text(encoding="utf-8", errors="replace")) for url, p in html_pages]
+    best: List[float] = []
+    for _ in range(repeat):
+        timings: List[float] = []
+        for base_url, html in pages:
+            start = time.perf_counter()
+            soup = BeautifulSoup(html, "html.parser")
+            extractor._parse_canon_tech_specs(soup, base_url=base_url)
+            extractor._parse_canon_product_images(soup, base_url=base_url)
+            extractor._parse_canon_msrp_usd(soup)
+            timings.append((time.perf_counter() - start) * 1000)
+        if not best or sum(timings) < sum(best):
+            best = timings
+    total_s = sum(best) / 1000
+    return {
+        "pages": len(best),
+        "repeat": repeat,
+        "total_seconds": round(total_s, 4),
+        "pages_per_second": _rate(len(best), total_s),
+        "ms_mean": round(statistics.fmean(best), 2) if best else None,
+        "ms_p50": round(_percentile(best, 50), 2),
+        "ms_p95": round(_percentile(best, 95), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--brand", default="canon")
+    parser.add_argument("--product-type", default="camera")
+    parser.add_argument("--replay-dir", default=None, help="Default: data/replay/{brand}_{product_type}")
+    parser.add_argument("--record", action="store_true", help="Hit the live site and (re)record the corpus.")
+    parser.add_argument("--max-products", type=int, default=10, help="Corpus size when recording.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=5, help="Parse-stage repetitions (best run is reported).")
+    parser.add_argument("--output", default=None, help="Write results JSON here.")
+    args = parser.parse_args()
+
+    repo_root = _repo_root()
+    replay_dir = Path(args.replay_dir or f"data/replay/{args.brand}_{args.product_type}")
+    if not replay_dir.is_absolute():
+        replay_dir = repo_root / replay_dir
+    manifest_path = replay_dir / "corpus.json"
+
+    mode = RECORD if args.record else REPLAY
+    if mode == REPLAY and not manifest_path.exists():
+        print(f"No corpus at {replay_dir}; record one first with --record (needs network).")
+        return 1
+    configure_replay(str(replay_dir), mode)
+    overrides = {} if args.record else _NO_DELAYS
+
+    manifest: Dict[str, Any] = {}
+    if manifest_path.exists() and not args.record:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    plugin = load_plugin(args.brand, args.product_type)
+    # A recording run must visit every page a replay run will ask for.
+    stages = STAGES if args.record else args.stages
+    results: Dict[str, Any] = {
+        "brand": args.brand,
+        "product_type": args.product_type,
+        "mode": mode,
+        "replay_dir": str(replay_dir),
+        "stages": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        work_dir = Path(tmp)
+        product_urls: List[str] = list(manifest.get("product_urls") or [])
+        max_products = int(manifest.get("max_products") or args.max_products)
+
+        try:
+            if "discovery" in stages:
+                res = _bench_discovery(plugin, work_dir, overrides, max_products)
+                if args.record or not product_urls:
+                    product_urls = res["product_urls"]
+                res.pop("product_urls")
+                results["stages"]["discovery"] = res
+
+            html_pages: List[Tuple[str, str]] = []
+            if "extraction" in stages or "parse" in stages:
+                res = _bench_extraction(plugin, work_dir, overrides, product_urls)
+                html_pages = res.pop("raw_html_pages")
+                if "extraction" in stages:
+                    results["stages"]["extraction"] = res
+
+            if "parse" in stages:
+                results["stages"]["parse"] = _bench_parse(plugin, html_pages, args.repeat)
+        finally:
+            # Playwright writes the browser HAR when the context closes.
+            close_all_sessions()
+            save_recordings()
+
+    if args.record:
+        manifest_path.write_text(
+            json.dumps(
+                {
+                    "brand": args.brand,
+                    "product_type": args.product_type,
+                    "max_products": max_products,
+                    "product_urls": product_urls,
+                    "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        print(f"Recorded corpus of {len(product_urls)} products to {replay_dir}")
+
+    for name, res in results["stages"].items():
+        rate = res.get("pages_per_second")
+        seconds = res.get("seconds", res.get("total_seconds"))
+        extra = f" p50={res['ms_p50']}ms p95={res['ms_p95']}ms" if name == "parse" else ""
+        print(f"{name:12s} pages={res['pages']:5d} seconds={seconds:9.3f} pages/s={rate:9.2f}{extra}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+    failed = (results["stages"].get("extraction") or {}).get("failed") or []
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
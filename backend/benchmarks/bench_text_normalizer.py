@@ -0,0 +1,249 @@
+"""
+Micro-benchmark: text cleanup engine vs the previous chained-replace implementation.
+
+Checks that `clean_text_for_spec_value`, `clean_label` and `label_group_key` produce
+byte-identical output to the legacy functions on every input, then reports throughput.
+
+Run via:
+  python backend/benchmarks/bench_text_normalizer.py
+  python backend/benchmarks/bench_text_normalizer.py --extractions data/company_product/canon/processed_data/camera/extractions.json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+def _repo_root() -> Path:
+    # backend/benchmarks/bench_text_normalizer.py -> backend/benchmarks -> backend -> repo root
+    return Path(__file__).resolve().parents[2]
+
+
+sys.path.insert(0, str(_repo_root() / "backend" / "src"))
+
+from agents.spec_pipeline.core.text_normalizer import (  # noqa: E402
+    clean_label,
+    clean_text_for_spec_value,
+    label_group_key,
+)
+
+
+# ---------------------------------------------------------------------------
+# Legacy implementations (verbatim copies, used as the reference output)
+# ---------------------------------------------------------------------------
+
+_LEGACY_BULLETS = ["\u2022", "•", "\u25cf", "\u25aa"]
+
+
+def legacy_clean_text_for_spec_value(raw: Optional[str]) -> str:
+    if not raw:
+        return ""
+
+    s = str(raw)
+    s = s.replace("\u00a0", " ")
+    s = s.replace("\u2009", " ")
+    s = s.replace("\u202f", " ")
+    s = s.replace("\u2013", "-")
+    s = s.replace("\u2014", "—")
+    s = s.replace("\u2212", "-")
+    s = s.replace("\u00f7", "/")
+    s = s.replace("\u2044", "/")
+    s = s.replace("\u2215", "/")
+    for b in _LEGACY_BULLETS:
+        s = s.replace(b, "\n- ")
+    s = s.replace("•  ", "\n- ")
+    s = s.replace("• ", "\n- ")
+    s = "\n".join([re.sub(r"[ \t]+", " ", line).strip() for line in s.splitlines()]).strip()
+    s = re.sub(r"\n{3,}", "\n\n", s).strip()
+    return s
+
+
+def legacy_clean_extracted_label(text: str) -> str:
+    s = (text or "").replace("\u00a0", " ").strip()
+    if not s:
+        return ""
+    s = re.sub(r"<[^>]+>", " ", s)
+    s = re.sub(r"@\s*\d+\s*br\s*/?>", " ", s, flags=re.IGNORECASE)
+    s = s.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def legacy_normalize_label_for_grouping(label: str) -> str:
+    s = (label or "").strip().lower()
+    s = s.replace("\u00a0", " ")
+    s = s.rstrip(":")
+    s = re.sub(r"\s+", " ", s)
+    s = s.replace("–", "-").replace("—", "-")
+    return s
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+_ALL_WHITESPACE = "".join(chr(c) for c in range(0x3000 + 1) if chr(c).isspace())
+
+
+def _edge_cases() -> List[str]:
+    cases = [
+        "",
+        " ",
+        "\n",
+        "abc\n",
+        "Approx. 24.2 megapixels",
+        "ISO 100\u201351200 (expandable to 204800)",
+        "• Eye Detection AF • Face Detection  •\tAnimal",
+        "a\n\n\n\n\nb",
+        "Line 1\r\nLine 2 Line 3\x0bLine 4",
+        "Approx. 670 g (Including battery)",
+        "F\u00f72.8 \u2212 F\u204422 \u2215 \u00a0\u2009\u202f",
+        "Shutter Speed:",
+        "  Wi-Fi  Security :",
+        "<br/>Recording\tFormat@999br/>",
+        "Video <b>Format</b> @ 12 BR />",
+        "a < b @999br/> c",
+        "Dimensions (W x H x D)—approx.",
+        "\u25cfOne\u25aaTwo\u2022  Three",
+        "İstanbul",
+        _ALL_WHITESPACE + "x" + _ALL_WHITESPACE + "y" + _ALL_WHITESPACE,
+    ]
+    return cases
+
+
+def _synthetic_corpus(n: int, seed: int = 7) -> List[str]:
+    rnd = random.Random(seed)
+    pieces = [
+        "Approx.", "24.2", "megapixels", "ISO", "100\u201351200", "1/8000", "sec.", "\u2022",
+        " ", "  ", "\t", "\n", "\u00a0", "Eye Detection AF", "<br/>", "@999br/>", "\u2014", ":",
+        "RAW", "C-RAW", "JPEG", "HEIF", "4K", "60p", "Dual Pixel CMOS AF II", "\u2212", "\u00f7",
+    ]
+    out: List[str] = []
+    for _ in range(n):
+        k = rnd.randint(1, 14)
+        out.append("".join(rnd.choice(pieces) + rnd.choice(["", " "]) for _ in range(k)))
+    return out
+
+
+# Shapes seen on Canon tech-spec pages: mostly short single-line ASCII, some bullets/dashes.
+_TYPICAL_VALUES = [
+    "Approx. 24.2 megapixels",
+    "ISO 100\u201351200 (expandable to 204800)",
+    "1/8000 sec. to 30 sec., bulb",
+    "Approx. 670 g (Including battery and card)",
+    "Yes",
+    "RF mount",
+    "3.0-inch Vari-angle Touch Screen LCD, approx. 1.62 million dots",
+    "\u2022 Eye Detection AF \u2022 Face Detection \u2022 Animal Detection",
+    "JPEG, HEIF, RAW (CR3, 14-bit)",
+    "Approx. 138.4 x 98.4 x 88.4 mm / 5.45 x 3.87 x 3.48 in.",
+    "SD/SDHC/SDXC memory card  (UHS-II compatible)",
+    "Dual Pixel CMOS AF II",
+]
+_TYPICAL_LABELS = [
+    "Effective Pixels",
+    "Shutter Speed",
+    "Weight",
+    "Focus Method:",
+    "ISO Speed Range",
+    "Recording Format",
+    "Wi-Fi Security",
+    "Dimensions (W x H x D)",
+    "Movie Recording Size\u2014Frame Rate",
+    "Battery Life<br/>",
+]
+
+
+def _typical_corpus(pool: List[str], n: int) -> List[str]:
+    return [pool[i % len(pool)] for i in range(n)]
+
+
+def _corpus_from_extractions(path: Path) -> Dict[str, List[str]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    values: List[str] = []
+    labels: List[str] = []
+    for item in payload.get("items", []) or []:
+        for section in item.get("manufacturer_sections", []) or []:
+            labels.append(section.get("section_name") or "")
+            for attr in section.get("attributes", []) or []:
+                labels.append(attr.get("raw_key") or "")
+                raw_value = attr.get("raw_value")
+                if isinstance(raw_value, str):
+                    values.append(raw_value)
+    return {"values": values, "labels": labels}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def _check_identical(name: str, new: Callable[[str], str], old: Callable[[str], str], corpus: List[str]) -> int:
+    mismatches = 0
+    for s in corpus:
+        a = new(s)
+        b = old(s)
+        if a.encode("utf-8") != b.encode("utf-8"):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  MISMATCH {name}: {s!r}\n    new={a!r}\n    old={b!r}")
+    return mismatches
+
+
+def _throughput(fn: Callable[[str], str], corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in corpus:
+            fn(s)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best if best > 0 else float("inf")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--extractions", default=None, help="Optional extractions.json to use as a real corpus.")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic corpus size.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Identity is checked on edge cases + a noisy fuzz corpus; throughput is measured on
+    # typical spec-page shapes (or the real extraction corpus when given).
+    fuzz_values = _edge_cases() + _synthetic_corpus(args.size)
+    fuzz_labels = _edge_cases() + _synthetic_corpus(args.size, seed=11)
+    values = _typical_corpus(_TYPICAL_VALUES, args.size)
+    labels = _typical_corpus(_TYPICAL_LABELS, args.size)
+    if args.extractions:
+        real = _corpus_from_extractions(Path(args.extractions))
+        fuzz_values += real["values"]
+        fuzz_labels += real["labels"]
+        values = real["values"] or values
+        labels = real["labels"] or labels
+
+    cases = [
+        ("clean_text_for_spec_value", clean_text_for_spec_value, legacy_clean_text_for_spec_value, fuzz_values, values),
+        ("clean_label", clean_label, legacy_clean_extracted_label, fuzz_labels, labels),
+        ("label_group_key", label_group_key, legacy_normalize_label_for_grouping, fuzz_labels, labels),
+    ]
+
+    failed = False
+    for name, new, old, fuzz, corpus in cases:
+        mismatches = _check_identical(name, new, old, fuzz + corpus)
+        new_tput = _throughput(new, corpus, args.repeat)
+        old_tput = _throughput(old, corpus, args.repeat)
+        print(
+            f"{name:28s} checked={len(fuzz) + len(corpus):6d} mismatches={mismatches} "
+            f"legacy={old_tput:12,.0f}/s new={new_tput:12,.0f}/s speedup={new_tput / old_tput:5.2f}x"
+        )
+        failed = failed or mismatches > 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
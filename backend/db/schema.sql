@@ -87,6 +87,11 @@ CREATE TABLE IF NOT EXISTS product (
     raw_data JSONB, -- Full scrape dump
     last_scraped_at TIMESTAMP WITH TIME ZONE,
     scraping_status TEXT DEFAULT 'pending', -- pending, success, failed
+    -- Refresh bookkeeping (refresh scheduler): hash of the scraped content and how often it changed
+    content_hash TEXT,
+    scrape_count INTEGER NOT NULL DEFAULT 0,
+    change_count INTEGER NOT NULL DEFAULT 0,
+    last_changed_at TIMESTAMP WITH TIME ZONE,
     is_active BOOLEAN DEFAULT TRUE,
     
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -110,6 +115,12 @@ CREATE TABLE IF NOT EXISTS product_spec (
     max_value NUMERIC,
     unit_used TEXT,
     boolean_value BOOLEAN,
+
+    -- Same numbers converted into spec_definition.unit (numeric_value/unit_used keep the source's)
+    canonical_value NUMERIC,
+    canonical_min_value NUMERIC,
+    canonical_max_value NUMERIC,
+    canonical_unit TEXT,
     
     extraction_confidence FLOAT,
     scraped_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -179,11 +190,14 @@ CREATE TABLE IF NOT EXISTS product_document (
 CREATE INDEX idx_product_brand ON product(brand_id);
 CREATE INDEX idx_product_category ON product(category_id);
 CREATE INDEX idx_product_slug ON product(slug);
+CREATE INDEX idx_product_manufacturer_url ON product(manufacturer_url);
 CREATE INDEX idx_product_raw_data ON product USING GIN (raw_data);
 
 CREATE INDEX idx_product_spec_product ON product_spec(product_id);
 CREATE INDEX idx_product_spec_definition ON product_spec(spec_definition_id);
 CREATE INDEX idx_product_spec_numeric ON product_spec(numeric_value);
+CREATE INDEX idx_product_spec_canonical_value ON product_spec(spec_definition_id, canonical_value);
+CREATE INDEX idx_product_spec_canonical_range ON product_spec(spec_definition_id, canonical_min_value, canonical_max_value);
 CREATE INDEX idx_spec_mapping_pattern ON spec_mapping(extraction_pattern);
 
 CREATE INDEX idx_product_spec_matrix_product ON product_spec_matrix(product_id);
@@ -219,6 +233,42 @@ CREATE INDEX idx_product_image_product_id ON product_image(product_id);
 CREATE INDEX idx_product_image_kind ON product_image(kind);
 CREATE INDEX idx_product_image_url ON product_image(url);
 
+-- Pipeline job queue (distributed extraction/normalization workers)
+-- Workers claim pending rows with FOR UPDATE SKIP LOCKED and hold them under a lease.
+CREATE TABLE IF NOT EXISTS pipeline_job (
+    id BIGSERIAL PRIMARY KEY,
+
+    brand_slug TEXT NOT NULL,
+    product_type TEXT NOT NULL,
+    task TEXT NOT NULL, -- extract (fetch + parse), normalize
+    product_url TEXT NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'pending', -- pending, running, done, failed
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+
+    claimed_by TEXT, -- worker id (host:pid)
+    claimed_at TIMESTAMP WITH TIME ZONE,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+
+    result JSONB, -- extraction item / normalized item
+    last_error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE,
+
+    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    UNIQUE (brand_slug, product_type, task, product_url)
+);
+
+-- Claim path: pending rows that are due, plus running rows whose lease ran out.
+CREATE INDEX IF NOT EXISTS idx_pipeline_job_claim
+    ON pipeline_job(brand_slug, product_type, task, status, priority DESC, run_after)
+    WHERE status IN ('pending', 'running');
+
 -- Views
 -- Still image recording pixels matrix (grid-shaped for UI)
 CREATE OR REPLACE VIEW v_still_image_recording_pixels_grid AS
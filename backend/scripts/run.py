@@ -48,40 +48,157 @@ def main() -> int:
     backend_src = repo_root / "backend" / "src"
     sys.path.insert(0, str(backend_src))
 
-    from agents.spec_pipeline.core.discovery import discover  # noqa: WPS433
-    from agents.spec_pipeline.core.registry import load_plugin  # noqa: WPS433
-
     parser = argparse.ArgumentParser()
     parser.add_argument("--brand", default="canon")
     parser.add_argument("--product-type", default="camera")
     parser.add_argument(
         "--stage",
         default="discovery",
-        choices=["discovery", "extraction", "normalize", "persist"],
+        choices=["discovery", "schedule", "extraction", "normalize", "persist"],
     )
     parser.add_argument(
         "--normalized-path",
         default=None,
         help="Override path to normalized JSON for persist stage.",
     )
+    parser.add_argument(
+        "--profile-rules",
+        action="store_true",
+        help="normalize stage: record per-rule spec_mapping coverage/timing (rule_profile_report.json).",
+    )
+    parser.add_argument(
+        "--targeted",
+        action="store_true",
+        help="normalize: re-map only attributes reached by spec_mapping changes since the last normalized.json "
+        "(and products whose extraction changed); also writes spec_patch.json.",
+    )
+    parser.add_argument(
+        "--patch-db",
+        action="store_true",
+        help="normalize (implies --targeted): apply spec_patch.json to the DB instead of a full persist.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="discovery: stop at known URLs and write a diff vs the last inventory; extraction: only fetch added/changed products.",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="discovery/extraction: ignore an unfinished checkpoint journal and start from scratch.",
+    )
+    parser.add_argument(
+        "--replay-dir",
+        default=None,
+        help="discovery/extraction: serve site traffic from HAR files in this directory (no network).",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="with --replay-dir: fetch from the live site and record the traffic instead of replaying it.",
+    )
+    parser.add_argument(
+        "--in-page-extraction",
+        action="store_true",
+        help="extraction: parse specs/images/price inside the browser page and return JSON instead of the HTML.",
+    )
+    parser.add_argument(
+        "--budget-minutes",
+        type=float,
+        default=60.0,
+        help="schedule: fetch time the refresh window may spend; the work list holds what fits.",
+    )
+    parser.add_argument(
+        "--work-list",
+        default=None,
+        help="schedule: where to write the refresh work list (default: data/schedules/<brand>_<product_type>_refresh.json); "
+        "extraction: fetch only the URLs of this work list and carry the rest over.",
+    )
+    parser.add_argument(
+        "--browser-profile-dir",
+        default=None,
+        help="discovery/extraction: Chromium user-data-dir (one process per directory; "
+        "parallel runs need their own).",
+    )
+    parser.add_argument(
+        "--metrics-path",
+        default=None,
+        help="Per-stage timing/resource metrics JSON (default: data/metrics/<brand>_<product_type>_<stage>.json).",
+    )
+    parser.add_argument(
+        "--openmetrics",
+        default=None,
+        help="Also write the metrics in OpenMetrics text format to this path.",
+    )
     args = parser.parse_args()
 
+    if args.replay_dir:
+        from agents.spec_pipeline.core.replay import RECORD, REPLAY, configure_replay  # noqa: WPS433
+
+        replay_dir = Path(args.replay_dir)
+        if not replay_dir.is_absolute():
+            replay_dir = repo_root / replay_dir
+        configure_replay(str(replay_dir), RECORD if args.record else REPLAY)
+
+    try:
+        return _run_stage(args, repo_root)
+    finally:
+        from agents.spec_pipeline.core.metrics import write_metrics  # noqa: WPS433
+
+        metrics_path = Path(args.metrics_path or f"data/metrics/{args.brand}_{args.product_type}_{args.stage}.json")
+        if not metrics_path.is_absolute():
+            metrics_path = repo_root / metrics_path
+        write_metrics(str(metrics_path), args.openmetrics)
+
+
+def _run_stage(args, repo_root: Path) -> int:
+    from agents.spec_pipeline.core.registry import load_plugin  # noqa: WPS433
+
     plugin = load_plugin(args.brand, args.product_type)
     discovery_config = getattr(plugin, "DISCOVERY_CONFIG")
+    if args.incremental:
+        discovery_config.incremental = True
+        extraction_config = getattr(plugin, "EXTRACTION_CONFIG", None)
+        if extraction_config is not None:
+            extraction_config.incremental = True
+    if args.browser_profile_dir:
+        discovery_config.browser_profile_dir = args.browser_profile_dir
+        extraction_config = getattr(plugin, "EXTRACTION_CONFIG", None)
+        if extraction_config is not None:
+            extraction_config.browser_profile_dir = args.browser_profile_dir
+    if args.no_resume:
+        discovery_config.resume = False
+        extraction_config = getattr(plugin, "EXTRACTION_CONFIG", None)
+        if extraction_config is not None:
+            extraction_config.resume = False
 
     if args.stage == "discovery":
-        payload = discover(discovery_config)
+        from agents.spec_pipeline.core.discovery import discover  # noqa: WPS433
+
         out_path = repo_root / discovery_config.output_path
+        previous = None
+        if discovery_config.incremental and out_path.exists():
+            previous = json.loads(out_path.read_text(encoding="utf-8"))
+        payload = discover(discovery_config, previous_payload=previous)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         out_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
         logging.info("Wrote URL inventory: %s", out_path)
         logging.info("Total URLs: %s", payload.get("total_urls"))
+        diff = payload.get("diff")
+        if diff:
+            logging.info(
+                "Inventory diff: +%s added, -%s removed, %s unchanged (complete crawl: %s)",
+                len(diff["added"]),
+                len(diff["removed"]),
+                diff["unchanged_count"],
+                diff["complete_crawl"],
+            )
         return 0
 
     # stages requiring DB access
     db_url = os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL")
-    if args.stage in {"normalize", "persist"} and not db_url:
+    if args.stage in {"schedule", "normalize", "persist"} and not db_url:
         raise RuntimeError("Set DATABASE_URL (or SUPABASE_DB_URL).")
 
     if args.stage == "persist":
@@ -115,16 +232,78 @@ def main() -> int:
             f"URL inventory not found at {url_inventory_path}. Run discovery stage first."
         )
 
+    work_list_path = Path(args.work_list or f"data/schedules/{args.brand}_{args.product_type}_refresh.json")
+    if not work_list_path.is_absolute():
+        work_list_path = repo_root / work_list_path
+
+    if args.stage == "schedule":
+        import psycopg2  # noqa: WPS433
+
+        from agents.spec_pipeline.core.refresh_scheduler import (  # noqa: WPS433
+            RefreshConfig,
+            load_product_state,
+            plan_refresh,
+            seconds_per_fetch,
+        )
+
+        inventory = json.loads(url_inventory_path.read_text(encoding="utf-8"))
+        config = RefreshConfig(budget_seconds=args.budget_minutes * 60)
+        fetch_seconds = seconds_per_fetch(
+            str(repo_root / "data" / "metrics" / f"{args.brand}_{args.product_type}_extraction.json"),
+            config.default_seconds_per_fetch,
+        )
+        conn = psycopg2.connect(db_url)
+        try:
+            state = load_product_state(conn, args.brand, inventory.get("urls", []) or [])
+        finally:
+            conn.close()
+        plan = plan_refresh(inventory, state, config, fetch_seconds)
+        work_list_path.parent.mkdir(parents=True, exist_ok=True)
+        work_list_path.write_text(json.dumps(plan, indent=2), encoding="utf-8")
+        logging.info(
+            "Wrote refresh work list: %s (%s of %s URLs at %.1fs/fetch, by reason: %s)",
+            work_list_path,
+            plan["scheduled_count"],
+            plan["candidates"],
+            plan["seconds_per_fetch"],
+            plan["scheduled_by_reason"],
+        )
+        return 0
+
     if args.stage == "extraction":
+        if args.in_page_extraction:
+            getattr(plugin, "EXTRACTION_CONFIG").in_page_extraction = True
+        if args.work_list:
+            extraction_config = getattr(plugin, "EXTRACTION_CONFIG")
+            extraction_config.work_list_path = str(work_list_path)
+            # plugins load the previous extraction (to carry unscheduled items over) in incremental mode
+            extraction_config.incremental = True
         extract_urls = getattr(plugin, "extract_urls")
         extraction_output_path = extract_urls(str(url_inventory_path))
         logging.info("Wrote extraction JSON: %s", extraction_output_path)
         return 0
 
     # normalize stage
+    if args.profile_rules:
+        getattr(plugin, "NORMALIZATION_CONFIG").profile_rules = True
+    if args.targeted or args.patch_db:
+        getattr(plugin, "NORMALIZATION_CONFIG").targeted = True
     normalize_fn = getattr(plugin, "normalize")
     normalized_output_path = normalize_fn(str(url_inventory_path), db_url=db_url)
     logging.info("Wrote normalized JSON: %s", normalized_output_path)
+
+    if args.patch_db:
+        from agents.spec_pipeline.core.persistence import (  # noqa: WPS433
+            PersistenceConfig,
+            apply_spec_patch,
+        )
+
+        report = apply_spec_patch(
+            PersistenceConfig(brand_slug=args.brand, product_type=args.product_type),
+            spec_patch_path=str(Path(normalized_output_path).parent / "spec_patch.json"),
+            db_url=db_url,
+        )
+        logging.info("Spec patch report: %s", json.dumps(report, indent=2))
     return 0
 
 
@@ -0,0 +1,264 @@
+"""
+Run one pipeline stage for many registered plugins at once, e.g. a nightly refresh:
+
+  python3 backend/scripts/run_all.py --stage discovery --incremental
+  python3 backend/scripts/run_all.py --stage extraction --workers 4 --max-per-host 2
+  python3 backend/scripts/run_all.py --stage normalize --plugins canon:camera canon:lens
+
+Each plugin runs `run.py` in its own worker process (own browser, own metrics file). At most
+--workers jobs run at a time, and at most --max-per-host of them talk to the same host: the
+manufacturer site for discovery/extraction, the database server for normalize/persist.
+Cache-only extraction touches no host and is only bounded by --workers.
+
+A combined report (per-plugin exit code, wall time, log file and stage metrics) is written to
+data/run_reports/<stage>_<timestamp>.json.
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from run import _load_env_files, _repo_root
+
+
+STAGES = ["discovery", "schedule", "extraction", "normalize", "persist"]
+DB_STAGES = {"schedule", "normalize", "persist"}
+
+# run.py flags forwarded to every job
+PASS_THROUGH_FLAGS = ["incremental", "no_resume", "profile_rules", "in_page_extraction", "targeted", "patch_db"]
+
+
+@dataclass
+class StageJob:
+    brand: str
+    product_type: str
+    host: str
+    log_path: Path
+    metrics_path: Path
+    proc: Optional[subprocess.Popen] = None
+    started: float = 0.0
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.brand}:{self.product_type}"
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _job_host(plugin, stage: str, db_url: Optional[str]) -> str:
+    """The host a job's requests go to; jobs on the same host share the --max-per-host cap."""
+    name = f"{plugin.BRAND_SLUG}:{plugin.PRODUCT_TYPE}"
+    if stage in DB_STAGES:
+        return f"db:{urlparse(db_url or '').hostname or 'default'}"
+    if stage == "extraction":
+        cfg = getattr(plugin, "EXTRACTION_CONFIG", None)
+        if cfg is not None and cfg.cache_only and cfg.html_cache_dir:
+            return f"local:{name}"
+    cfg = plugin.DISCOVERY_CONFIG
+    urls = list(cfg.sitemap_urls or []) + list(cfg.listing_urls or [])
+    return urlparse(urls[0]).netloc if urls else f"local:{name}"
+
+
+def _metrics_summary(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return {
+        "path": str(path),
+        "stages": [
+            {k: s.get(k) for k in ("stage", "wall_seconds", "peak_rss_bytes", "counters", "url_seconds")}
+            for s in payload.get("stages", [])
+        ],
+    }
+
+
+def _start(job: StageJob, stage: str, args: argparse.Namespace, run_py: Path, repo_root: Path) -> None:
+    cmd = [
+        sys.executable,
+        str(run_py),
+        "--stage",
+        stage,
+        "--brand",
+        job.brand,
+        "--product-type",
+        job.product_type,
+        "--metrics-path",
+        str(job.metrics_path),
+        # Chromium allows one process per user-data-dir, and jobs on one host run side by side
+        "--browser-profile-dir",
+        f"data/browser_profile/{job.brand}_{job.product_type}",
+    ]
+    for flag in PASS_THROUGH_FLAGS:
+        if getattr(args, flag):
+            cmd.append("--" + flag.replace("_", "-"))
+
+    job.log_path.parent.mkdir(parents=True, exist_ok=True)
+    log = job.log_path.open("w", encoding="utf-8")
+    job.proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=str(repo_root))
+    log.close()  # the child keeps its own handle
+    job.started = time.monotonic()
+    logging.info("Started %s (%s) pid=%s log=%s", job.name, job.host, job.proc.pid, job.log_path)
+
+
+def _finish(job: StageJob, returncode: int) -> None:
+    job.result = {
+        "plugin": job.name,
+        "host": job.host,
+        "returncode": returncode,
+        "ok": returncode == 0,
+        "seconds": round(time.monotonic() - job.started, 3),
+        "log_path": str(job.log_path),
+        "metrics": _metrics_summary(job.metrics_path),
+    }
+    level = logging.INFO if returncode == 0 else logging.ERROR
+    logging.log(level, "Finished %s rc=%s in %.1fs", job.name, returncode, job.result["seconds"])
+
+
+def run_jobs(jobs: List[StageJob], stage: str, args: argparse.Namespace, repo_root: Path) -> None:
+    """Start jobs in order as worker and per-host slots free up; returns when all have exited."""
+    run_py = Path(__file__).resolve().parent / "run.py"
+    pending = list(jobs)
+    running: List[StageJob] = []
+    try:
+        while pending or running:
+            for job in list(running):
+                rc = job.proc.poll()
+                if rc is not None:
+                    running.remove(job)
+                    _finish(job, rc)
+
+            busy_hosts: Dict[str, int] = {}
+            for job in running:
+                busy_hosts[job.host] = busy_hosts.get(job.host, 0) + 1
+            for job in list(pending):
+                if len(running) >= args.workers:
+                    break
+                if busy_hosts.get(job.host, 0) >= args.max_per_host:
+                    continue
+                pending.remove(job)
+                _start(job, stage, args, run_py, repo_root)
+                running.append(job)
+                busy_hosts[job.host] = busy_hosts.get(job.host, 0) + 1
+
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        for job in running:
+            job.proc.terminate()
+        for job in running:
+            _finish(job, job.proc.wait())
+        raise
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    repo_root = _repo_root()
+    _load_env_files(repo_root)
+    sys.path.insert(0, str(repo_root / "backend" / "src"))
+
+    from agents.spec_pipeline.core.registry import load_plugin, registered_plugins  # noqa: WPS433
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stage", default="discovery", choices=STAGES)
+    parser.add_argument(
+        "--plugins",
+        nargs="+",
+        default=None,
+        metavar="BRAND:TYPE",
+        help="Plugins to run (default: every registered plugin).",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Jobs running at once.")
+    parser.add_argument("--max-per-host", type=int, default=1, help="Jobs running at once against one host.")
+    parser.add_argument("--report-path", default=None, help="Default: data/run_reports/<stage>_<timestamp>.json")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--no-resume", action="store_true")
+    parser.add_argument("--profile-rules", action="store_true")
+    parser.add_argument("--in-page-extraction", action="store_true")
+    parser.add_argument("--targeted", action="store_true")
+    parser.add_argument("--patch-db", action="store_true")
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    args.max_per_host = max(1, args.max_per_host)
+
+    if args.plugins:
+        keys = []
+        for spec in args.plugins:
+            brand, _, product_type = spec.partition(":")
+            if not product_type:
+                parser.error(f"--plugins expects BRAND:TYPE, got {spec!r}")
+            keys.append((brand.lower(), product_type.lower()))
+    else:
+        keys = registered_plugins()
+
+    db_url = os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL")
+    if args.stage in DB_STAGES and not db_url:
+        raise RuntimeError("Set DATABASE_URL (or SUPABASE_DB_URL).")
+
+    started_at = _utc_now()
+    stamp = started_at.strftime("%Y%m%dT%H%M%SZ")
+    report_dir = repo_root / "data" / "run_reports"
+    jobs: List[StageJob] = []
+    for brand, product_type in keys:
+        plugin = load_plugin(brand, product_type)
+        jobs.append(
+            StageJob(
+                brand=brand,
+                product_type=product_type,
+                host=_job_host(plugin, args.stage, db_url),
+                log_path=report_dir / "logs" / f"{args.stage}_{brand}_{product_type}_{stamp}.log",
+                metrics_path=repo_root / "data" / "metrics" / f"{brand}_{product_type}_{args.stage}.json",
+            )
+        )
+
+    logging.info(
+        "Running %s for %s plugin(s), workers=%s, max_per_host=%s",
+        args.stage,
+        len(jobs),
+        args.workers,
+        args.max_per_host,
+    )
+    start = time.monotonic()
+    run_jobs(jobs, args.stage, args, repo_root)
+
+    results = [job.result for job in jobs]
+    failed = [r["plugin"] for r in results if not r["ok"]]
+    report = {
+        "stage": args.stage,
+        "started_at": started_at.isoformat(),
+        "finished_at": _utc_now().isoformat(),
+        "wall_seconds": round(time.monotonic() - start, 3),
+        "workers": args.workers,
+        "max_per_host": args.max_per_host,
+        "total_jobs": len(results),
+        "failed": failed,
+        # sum of job times / wall time: how much of the parallelism was actually used
+        "parallelism": round(sum(r["seconds"] for r in results) / max(time.monotonic() - start, 1e-9), 2),
+        "jobs": results,
+    }
+
+    report_path = Path(args.report_path) if args.report_path else report_dir / f"{args.stage}_{stamp}.json"
+    if not report_path.is_absolute():
+        report_path = repo_root / report_path
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logging.info("Wrote run report: %s (%s ok, %s failed)", report_path, len(results) - len(failed), len(failed))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
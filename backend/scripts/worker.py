@@ -0,0 +1,320 @@
+"""
+Distributed extraction/normalization over the Postgres job queue (table pipeline_job).
+
+Queue the product URLs of a discovery inventory, then start workers on as many machines as
+needed; each claims batches with FOR UPDATE SKIP LOCKED, runs them through the plugin's
+extractor (fetch + parse) and normalizer, and writes the per-URL result back to the job row.
+A finished extract job queues the normalize job for the same URL. A crashed worker's jobs
+are picked up again once their lease runs out; failed attempts retry with backoff.
+
+  python3 backend/scripts/worker.py enqueue --brand canon --product-type camera
+  python3 backend/scripts/worker.py work --brand canon --product-type camera --batch-size 10
+  python3 backend/scripts/worker.py status --brand canon --product-type camera
+  python3 backend/scripts/worker.py export --brand canon --product-type camera
+
+`export` writes the usual extractions.json / normalized.json from the stored results, so
+`run.py --stage persist` works unchanged afterwards.
+"""
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from run import _load_env_files, _repo_root
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _inventory_urls(inventory: Dict[str, Any], changed_only: bool) -> List[str]:
+    urls: List[str] = list(inventory.get("urls", []) or [])
+    diff = inventory.get("diff")
+    if changed_only and diff is not None:
+        wanted = set(diff.get("added") or []) | set(diff.get("changed") or [])
+        urls = [u for u in urls if u in wanted]
+    return urls
+
+
+def _enqueue(conn, plugin, args, repo_root: Path) -> int:
+    from agents.spec_pipeline.core.job_queue import TASK_EXTRACT, TASK_NORMALIZE, enqueue_urls  # noqa: WPS433
+
+    brand, product_type = plugin.BRAND_SLUG, plugin.PRODUCT_TYPE
+    if args.task == TASK_NORMALIZE:
+        # Re-normalize what was already extracted (e.g. after spec_mapping changes).
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT product_url FROM pipeline_job WHERE brand_slug = %s AND product_type = %s "
+                "AND task = %s AND status = 'done' ORDER BY id",
+                (brand, product_type, TASK_EXTRACT),
+            )
+            urls = [row[0] for row in cur.fetchall()]
+    else:
+        inventory_path = repo_root / plugin.DISCOVERY_CONFIG.output_path
+        if not inventory_path.exists():
+            raise FileNotFoundError(f"URL inventory not found at {inventory_path}. Run discovery stage first.")
+        inventory = json.loads(inventory_path.read_text(encoding="utf-8"))
+        urls = _inventory_urls(inventory, args.changed_only)
+
+    queued = enqueue_urls(
+        conn,
+        brand,
+        product_type,
+        urls,
+        task=args.task,
+        priority=args.priority,
+        max_attempts=args.max_attempts,
+    )
+    logging.info("Queued %s %s job(s) for %s:%s (%s URLs offered)", queued, args.task, brand, product_type, len(urls))
+    return 0
+
+
+def _run_extract_batch(conn, plugin, jobs, args, worker_id: str, work_dir: Path) -> None:
+    from agents.spec_pipeline.core.extraction import _normalize_url, extract  # noqa: WPS433
+    from agents.spec_pipeline.core.job_queue import TASK_NORMALIZE, complete, enqueue_urls, fail  # noqa: WPS433
+
+    config = dataclasses.replace(
+        plugin.EXTRACTION_CONFIG,
+        max_products=None,
+        incremental=False,
+        # The queue is the checkpoint; a per-worker journal keeps workers on one host apart.
+        resume=False,
+        checkpoint_path=str(work_dir / "extraction.checkpoint.jsonl"),
+        # Chromium allows one process per user-data-dir
+        browser_profile_dir=str(work_dir / "browser_profile"),
+        in_page_extraction=args.in_page_extraction or plugin.EXTRACTION_CONFIG.in_page_extraction,
+    )
+    try:
+        payload = extract(config, [job.product_url for job in jobs])
+    except Exception as e:
+        logging.exception("Extraction batch failed")
+        for job in jobs:
+            fail(conn, job, f"batch_error: {e}", worker_id, retry_base_seconds=args.retry_base_seconds)
+        return
+
+    items = {it.get("product_url"): it for it in payload.get("items", [])}
+    extracted: List[str] = []
+    for job in jobs:
+        item = items.get(_normalize_url(job.product_url))
+        if item is None:
+            fail(conn, job, "no_item", worker_id, retry_base_seconds=args.retry_base_seconds)
+        elif item.get("errors"):
+            fail(conn, job, ";".join(item["errors"]), worker_id, result=item, retry_base_seconds=args.retry_base_seconds)
+        elif complete(conn, job, item, worker_id):
+            extracted.append(job.product_url)
+
+    if extracted:
+        enqueue_urls(conn, plugin.BRAND_SLUG, plugin.PRODUCT_TYPE, extracted, task=TASK_NORMALIZE)
+
+
+def _run_normalize_batch(conn, plugin, jobs, mapper, args, worker_id: str, work_dir: Path) -> None:
+    from agents.spec_pipeline.core.extraction import _normalize_url  # noqa: WPS433
+    from agents.spec_pipeline.core.job_queue import TASK_EXTRACT, complete, fail, results_by_url  # noqa: WPS433
+    from agents.spec_pipeline.core.normalization import normalize_extractions  # noqa: WPS433
+
+    extraction_items = results_by_url(
+        conn, plugin.BRAND_SLUG, plugin.PRODUCT_TYPE, TASK_EXTRACT, [job.product_url for job in jobs]
+    )
+    todo = [job for job in jobs if job.product_url in extraction_items]
+    for job in jobs:
+        if job.product_url not in extraction_items:
+            fail(conn, job, "no_extraction_result", worker_id, retry_base_seconds=args.retry_base_seconds)
+    if not todo:
+        return
+
+    # Reports (unmapped_report.json) go to the worker's own directory, not the shared output.
+    config = dataclasses.replace(plugin.NORMALIZATION_CONFIG, output_path=str(work_dir / "normalized.json"))
+    try:
+        payload = normalize_extractions(
+            config,
+            "pipeline_job",
+            db_url=None,
+            mapper=mapper,
+            extractions={"items": [extraction_items[job.product_url] for job in todo]},
+        )
+    except Exception as e:
+        logging.exception("Normalization batch failed")
+        for job in todo:
+            fail(conn, job, f"batch_error: {e}", worker_id, retry_base_seconds=args.retry_base_seconds)
+        return
+
+    normalized = {it["product"]["manufacturer_url"]: it for it in payload.get("items", [])}
+    pdf_queue: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in payload.get("pdf_queue", []):
+        pdf_queue.setdefault(entry["product_url"], []).append(entry)
+    for job in todo:
+        url = _normalize_url(job.product_url)
+        item = normalized.get(url)
+        if item is None:
+            fail(conn, job, "no_item", worker_id, retry_base_seconds=args.retry_base_seconds)
+            continue
+        complete(conn, job, {"item": item, "pdf_queue": pdf_queue.get(url, [])}, worker_id)
+
+
+def _work(conn, plugin, args, repo_root: Path) -> int:
+    from agents.spec_pipeline.core.job_queue import TASK_EXTRACT, claim_batch, default_worker_id  # noqa: WPS433
+    from agents.spec_pipeline.core.metrics import reset_metrics  # noqa: WPS433
+
+    worker_id = args.worker_id or default_worker_id()
+    work_dir = repo_root / "data" / "jobs" / re.sub(r"[^A-Za-z0-9_.-]+", "_", worker_id)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    mapper = None
+
+    batches = 0
+    logging.info("Worker %s: tasks=%s batch_size=%s", worker_id, args.tasks, args.batch_size)
+    while args.max_batches is None or batches < args.max_batches:
+        claimed = False
+        for task in args.tasks:
+            jobs = claim_batch(
+                conn,
+                plugin.BRAND_SLUG,
+                plugin.PRODUCT_TYPE,
+                task,
+                worker_id,
+                limit=args.batch_size,
+                lease_seconds=args.lease_seconds,
+            )
+            if not jobs:
+                continue
+            claimed = True
+            batches += 1
+            logging.info("Claimed %s %s job(s)", len(jobs), task)
+            if task == TASK_EXTRACT:
+                _run_extract_batch(conn, plugin, jobs, args, worker_id, work_dir)
+            else:
+                if mapper is None:
+                    from services.spec_mapper import SpecMapperService  # noqa: WPS433
+
+                    mapper = SpecMapperService(conn, rule_cache_path=plugin.NORMALIZATION_CONFIG.rule_cache_path)
+                    conn.commit()
+                _run_normalize_batch(conn, plugin, jobs, mapper, args, worker_id, work_dir)
+            # A long-lived worker would otherwise keep every batch's stage metrics in memory.
+            reset_metrics()
+            break
+
+        if not claimed:
+            if args.exit_when_empty:
+                logging.info("Queue empty; exiting after %s batch(es)", batches)
+                break
+            time.sleep(args.poll_seconds)
+    return 0
+
+
+def _export(conn, plugin, args, repo_root: Path) -> int:
+    from agents.spec_pipeline.core.job_queue import TASK_EXTRACT, TASK_NORMALIZE, job_results  # noqa: WPS433
+
+    brand, product_type = plugin.BRAND_SLUG, plugin.PRODUCT_TYPE
+    extraction_items = job_results(conn, brand, product_type, TASK_EXTRACT)
+    extraction_path = repo_root / plugin.EXTRACTION_CONFIG.output_path
+    extraction_path.parent.mkdir(parents=True, exist_ok=True)
+    extraction_path.write_text(
+        json.dumps(
+            {
+                "brand": brand,
+                "product_type": product_type,
+                "generated_at": _utc_now_iso(),
+                "total_items": len(extraction_items),
+                "items": extraction_items,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    logging.info("Wrote extraction JSON: %s (%s items)", extraction_path, len(extraction_items))
+
+    normalize_results = job_results(conn, brand, product_type, TASK_NORMALIZE)
+    pdf_queue = [entry for r in normalize_results for entry in r.get("pdf_queue", [])]
+    normalized_path = repo_root / plugin.NORMALIZATION_CONFIG.output_path
+    normalized_path.parent.mkdir(parents=True, exist_ok=True)
+    normalized_path.write_text(
+        json.dumps(
+            {
+                "brand": brand,
+                "product_type": product_type,
+                "generated_at": _utc_now_iso(),
+                "source_extractions_path": "pipeline_job",
+                "items": [r["item"] for r in normalize_results],
+                "pdf_queue": pdf_queue,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    (normalized_path.parent / "pdf_queue.json").write_text(json.dumps(pdf_queue, indent=2), encoding="utf-8")
+    logging.info("Wrote normalized JSON: %s (%s items)", normalized_path, len(normalize_results))
+    return 0
+
+
+def _status(conn, plugin, args, repo_root: Path) -> int:
+    from agents.spec_pipeline.core.job_queue import queue_counts  # noqa: WPS433
+
+    print(json.dumps(queue_counts(conn, plugin.BRAND_SLUG, plugin.PRODUCT_TYPE), indent=2, sort_keys=True))
+    return 0
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    repo_root = _repo_root()
+    _load_env_files(repo_root)
+    sys.path.insert(0, str(repo_root / "backend" / "src"))
+
+    from agents.spec_pipeline.core.job_queue import TASK_EXTRACT, TASKS  # noqa: WPS433
+
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def _command(name: str, help_text: str) -> argparse.ArgumentParser:
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("--brand", default="canon")
+        sub.add_argument("--product-type", default="camera")
+        return sub
+
+    enqueue = _command("enqueue", "Queue jobs for the URLs of the discovery inventory.")
+    enqueue.add_argument("--task", default=TASK_EXTRACT, choices=TASKS)
+    enqueue.add_argument("--changed-only", action="store_true", help="Only URLs the inventory diff marks added/changed.")
+    enqueue.add_argument("--priority", type=int, default=0)
+    enqueue.add_argument("--max-attempts", type=int, default=3)
+
+    work = _command("work", "Claim and run jobs until stopped (or the queue is empty).")
+    work.add_argument("--tasks", nargs="+", default=list(TASKS), choices=TASKS)
+    work.add_argument("--batch-size", type=int, default=10)
+    work.add_argument("--lease-seconds", type=int, default=1800, help="Jobs of a worker that stops for this long are reclaimed.")
+    work.add_argument("--retry-base-seconds", type=int, default=60)
+    work.add_argument("--poll-seconds", type=float, default=10.0)
+    work.add_argument("--max-batches", type=int, default=None)
+    work.add_argument("--exit-when-empty", action="store_true")
+    work.add_argument("--worker-id", default=None, help="Default: <hostname>:<pid>")
+    work.add_argument("--in-page-extraction", action="store_true")
+
+    _command("export", "Write extractions.json / normalized.json from finished jobs.")
+    _command("status", "Print job counts per task and status.")
+    args = parser.parse_args()
+
+    db_url = os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL")
+    if not db_url:
+        raise RuntimeError("Set DATABASE_URL (or SUPABASE_DB_URL).")
+
+    import psycopg2  # noqa: WPS433
+
+    from agents.spec_pipeline.core.registry import load_plugin  # noqa: WPS433
+
+    plugin = load_plugin(args.brand, args.product_type)
+    handler = {"enqueue": _enqueue, "work": _work, "export": _export, "status": _status}[args.command]
+    conn = psycopg2.connect(db_url)
+    try:
+        return handler(conn, plugin, args, repo_root)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+import atexit
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = "data/browser_profile/spec_pipeline"
+
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+]
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+# realistic headers
+EXTRA_HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+class BrowserSession:
+    """
+    One warm Chromium context shared by every stage in the process.
+
+    With `profile_dir` set the context is persistent (cookies, local storage, solved bot
+    challenges survive across stages *and* runs); otherwise it's an ephemeral context that
+    still lives for the whole process. Pages are pooled: `page()` hands out an idle page
+    when there is one instead of opening a fresh tab.
+
+    Playwright's sync API is bound to the thread that started it, so sessions are too.
+    """
+
+    def __init__(self, headless: bool = True, profile_dir: Optional[str] = DEFAULT_PROFILE_DIR, pool_size: int = 2):
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.pool_size = pool_size
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle_pages: List[Any] = []
+        self.stats: Dict[str, int] = {"launches": 0, "pages_created": 0, "pages_reused": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._context is not None
+
+    def start(self) -> None:
+        if self.started:
+            return
+        # Imported here so modules that only need configs (or DB-only stages) never load Playwright.
+        from playwright.sync_api import sync_playwright
+
+        from agents.spec_pipeline.core.replay import active_replay, apply_to_context
+
+        self._playwright = sync_playwright().start()
+        chromium = self._playwright.chromium
+        if self.profile_dir:
+            Path(self.profile_dir).mkdir(parents=True, exist_ok=True)
+            self._context = chromium.launch_persistent_context(
+                self.profile_dir,
+                headless=self.headless,
+                args=LAUNCH_ARGS,
+                viewport=VIEWPORT,
+                extra_http_headers=EXTRA_HTTP_HEADERS,
+            )
+            # A persistent context opens with one blank tab; put it in the pool.
+            self._idle_pages.extend(self._context.pages[: self.pool_size])
+        else:
+            self._browser = chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+            self._context = self._browser.new_context(viewport=VIEWPORT, extra_http_headers=EXTRA_HTTP_HEADERS)
+        # Record/replay (core/replay.py): routes every request of the context through a HAR.
+        apply_to_context(self._context)
+        self.stats["launches"] += 1
+        replay = active_replay()
+        logger.info(
+            "Browser session started (headless=%s, profile_dir=%s, replay=%s)",
+            self.headless,
+            self.profile_dir,
+            replay.mode if replay else None,
+        )
+
+    @contextmanager
+    def page(self) -> Iterator[Any]:
+        """Borrow a page; it goes back to the pool (or is closed if the pool is full)."""
+        self.start()
+        page = None
+        while self._idle_pages and page is None:
+            candidate = self._idle_pages.pop()
+            if not candidate.is_closed():
+                page = candidate
+                self.stats["pages_reused"] += 1
+        if page is None:
+            page = self._context.new_page()
+            self.stats["pages_created"] += 1
+
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                pass
+            elif len(self._idle_pages) < self.pool_size:
+                self._idle_pages.append(page)
+            else:
+                page.close()
+
+    def close(self) -> None:
+        for closer in (self._context, self._browser):
+            if closer is None:
+                continue
+            try:
+                closer.close()
+            except Exception as e:
+                logger.debug("Error closing browser session: %s", e)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug("Error stopping playwright: %s", e)
+        self._playwright = self._browser = self._context = None
+        self._idle_pages = []
+
+
+# profile_dir (or an ephemeral key per headless mode) -> session
+_SESSIONS: Dict[str, BrowserSession] = {}
+
+
+def get_session(headless: bool = True, profile_dir: Optional[str] = DEFAULT_PROFILE_DIR) -> BrowserSession:
+    """
+    Process-wide session for these options; launched on first use, closed at exit.
+
+    A profile directory can only be opened by one Chromium at a time, so a persistent session
+    is shared per directory even if a later stage asks for a different headless mode.
+    """
+    key = profile_dir or f"<ephemeral headless={headless}>"
+    session = _SESSIONS.get(key)
+    if session is None:
+        session = _SESSIONS[key] = BrowserSession(headless=headless, profile_dir=profile_dir)
+    elif session.headless != headless:
+        logger.info("Reusing browser session %s (headless=%s) for a headless=%s request", key, session.headless, headless)
+    return session
+
+
+def close_all_sessions() -> None:
+    for session in list(_SESSIONS.values()):
+        session.close()
+    _SESSIONS.clear()
+
+
+atexit.register(close_all_sessions)
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def default_checkpoint_path(output_path: str) -> str:
+    """Journal lives next to the stage output, e.g. extractions.json -> extractions.json.checkpoint.jsonl"""
+    return f"{output_path}.checkpoint.jsonl"
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of per-URL progress for a long-running stage.
+
+    Each record is one line, flushed and fsync'd before the next URL starts, so a crash loses
+    at most the URL in flight. A torn last line (crash mid-write) is ignored on load.
+
+    Lifecycle:
+    - `open()` returns the records of an unfinished previous run (empty if none / resume=False)
+    - `append()` after every unit of work
+    - `finish()` marks the run complete; the next `open()` starts a fresh journal
+    """
+
+    def __init__(self, path: str, stage: str, resume: bool = True):
+        self.path = Path(path)
+        self.stage = stage
+        self.resume = resume
+        self._fh = None
+
+    def _read(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        records: List[Dict[str, Any]] = []
+        with self.path.open("r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except Exception:
+                    logger.warning("Checkpoint %s: skipping unreadable line %s", self.path, line_no)
+        return records
+
+    def open(self) -> List[Dict[str, Any]]:
+        previous = self._read() if self.resume else []
+        finished = bool(previous) and previous[-1].get("type") == "finished"
+        stage_ok = bool(previous) and previous[0].get("type") == "run" and previous[0].get("stage") == self.stage
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if previous and stage_ok and not finished:
+            logger.info("Resuming %s from checkpoint %s (%s records)", self.stage, self.path, len(previous) - 1)
+            with self.path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            self._fh = self.path.open("a", encoding="utf-8")
+            if torn:
+                self._fh.write("\n")  # terminate a half-written record so the next one parses
+            self.append({"type": "resumed", "at": _utc_now_iso()})
+            return previous[1:]
+
+        self._fh = self.path.open("w", encoding="utf-8")
+        self.append({"type": "run", "stage": self.stage, "started_at": _utc_now_iso()})
+        return []
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._fh is None:
+            raise RuntimeError("CheckpointJournal.append() called before open()")
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def finish(self) -> None:
+        if self._fh is None:
+            self._fh = self.path.open("a", encoding="utf-8")
+        self.append({"type": "finished", "at": _utc_now_iso()})
+        self.close()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def iter_records(records: List[Dict[str, Any]], record_type: str) -> Iterator[Dict[str, Any]]:
+    for r in records:
+        if r.get("type") == record_type:
+            yield r
+
+
+def completed_items(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    product_url -> extraction item for URLs that finished cleanly.
+
+    Items recorded with errors (access denied, timeouts, cache misses) are left out so a
+    resumed run retries them. Later records win.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for r in iter_records(records, "item"):
+        item = r.get("item") or {}
+        url = r.get("url")
+        if not url:
+            continue
+        if item.get("errors"):
+            out.pop(url, None)
+        else:
+            out[url] = item
+    return out
+
+
+def completed_pages(records: List[Dict[str, Any]], listing_url: str) -> Dict[int, List[str]]:
+    """page_num -> product URLs for listing pages already visited."""
+    return {
+        int(r["page_num"]): list(r.get("urls") or [])
+        for r in iter_records(records, "page")
+        if r.get("listing_url") == listing_url and r.get("page_num") is not None
+    }
+
+
+def completed_listings(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """listing_url -> {"urls": [...], "stats": {...}} for listing URLs fully processed."""
+    return {
+        r["listing_url"]: {"urls": list(r.get("urls") or []), "stats": r.get("stats") or {}}
+        for r in iter_records(records, "listing")
+        if r.get("listing_url")
+    }
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import logging
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_VERSION_DIR = re.compile(r"^[0-9a-f]{16}$")
+
+
+def version_hash(*parts: str) -> str:
+    """16-hex-digit cache version from the things that decide a cached result besides its input."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class ContentCache:
+    """
+    Content-addressed JSON results: {root}/{version}/{key[:2]}/{key}.json.
+
+    `key` hashes the input (a page's HTML, an extraction item); `version` (see version_hash)
+    covers the code/rules that turn input into result. A different version is a different
+    directory, so a parser or ruleset change invalidates everything at once; `open()` removes
+    the directories of other versions. Writes go through a tmp file + rename, so a crash
+    mid-write leaves no partial entry.
+    """
+
+    def __init__(self, root: str, version: str):
+        self.root = Path(root)
+        self.version = version
+        self.dir = self.root / version
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def open(self) -> "ContentCache":
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for child in self.root.iterdir():
+            if child.is_dir() and child != self.dir and _VERSION_DIR.match(child.name):
+                logger.info("Dropping cache %s for old version %s", self.root, child.name)
+                shutil.rmtree(child, ignore_errors=True)
+        return self
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            result = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", key, e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+            self.writes += 1
+        except OSError as e:
+            # A cache that can't be written only costs recomputing the result next time.
+            logger.warning("Could not write cache entry %s: %s", key, e)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -3,13 +3,24 @@ import logging
 import random
 import re
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
 from urllib.parse import urljoin, urlparse, urlunparse
 
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+from agents.spec_pipeline.core.browser import DEFAULT_PROFILE_DIR, get_session
+from agents.spec_pipeline.core.checkpoint import (
+    CheckpointJournal,
+    completed_listings,
+    completed_pages,
+    default_checkpoint_path,
+)
+from agents.spec_pipeline.core.metrics import StageMetrics, start_stage
+from agents.spec_pipeline.core.rate_limiter import AdaptiveRateLimiter
+from agents.spec_pipeline.core.readiness import PageReadiness
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -69,15 +80,76 @@ def _is_valid_product_url(
     return True, None
 
 
-def _dedupe_preserve_order(urls: Iterable[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for u in urls:
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(u)
-    return out
+class UrlAccumulator:
+    """
+    Insertion-ordered set of URLs (dict keys), so membership and dedupe stay O(1) per URL
+    however many listing pages and anchors we collect. `offered` counts every add, so
+    `duplicates` is what a dedupe pass would have removed.
+    """
+
+    __slots__ = ("_urls", "offered")
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._urls: Dict[str, None] = {}
+        self.offered = 0
+        self.extend(urls)
+
+    def add(self, url: str) -> bool:
+        self.offered += 1
+        if url in self._urls:
+            return False
+        self._urls[url] = None
+        return True
+
+    def extend(self, urls: Iterable[str]) -> List[str]:
+        """Adds `urls`; returns the ones that were new, in order."""
+        return [u for u in urls if self.add(u)]
+
+    @property
+    def duplicates(self) -> int:
+        return self.offered - len(self._urls)
+
+    def to_list(self) -> List[str]:
+        return list(self._urls)
+
+    def __contains__(self, url: object) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+_PRODUCT_ITEM_LINK_RE = re.compile(r"product-item-link", re.I)
+
+# Runs inside the listing page: returns hrefs of product anchors not returned by an earlier
+# call on the same document, in the order _extract_product_links would see them (Canon's
+# product-item-link anchors first, then any anchor whose href contains the product pattern).
+# The seen-set lives on `window`, so a navigation starts a fresh one.
+_HARVEST_LINKS_JS = """
+(pattern) => {
+    const seen = window.__specPipelineSeenHrefs || (window.__specPipelineSeenHrefs = new Set());
+    const fresh = [];
+    const take = (a) => {
+        const href = a.getAttribute("href");
+        if (href && !seen.has(href)) {
+            seen.add(href);
+            fresh.push(href);
+        }
+    };
+    for (const a of document.querySelectorAll("a[class]")) {
+        if (/product-item-link/i.test(a.getAttribute("class"))) take(a);
+    }
+    for (const a of document.querySelectorAll("a[href]")) {
+        if (a.getAttribute("href").includes(pattern)) take(a);
+    }
+    return {hrefs: fresh, access_denied: document.title.includes("Access Denied")};
+}
+"""
 
 
 @dataclass
@@ -95,14 +167,52 @@ class DiscoveryConfig:
     max_pages: int = 30  # URL pagination pages (?p=2..)
     max_load_more_clicks: int = 30
     stop_after_consecutive_empty_pages: int = 3
+    # Load-more listings: collect product hrefs with a script in the page that only returns
+    # anchors added since the previous click, instead of serializing and re-parsing the whole
+    # DOM after every click. Falls back to the DOM path if page scripts can't be evaluated.
+    harvest_links_in_page: bool = True
     # Delay controls (seconds)
     delay_min: float = 2.0
     delay_max: float = 5.0
     long_break_every: int = 10
     long_break_min: float = 8.0
     long_break_max: float = 12.0
+    # Adaptive pacing: when enabled, spacing between requests follows server signals
+    # (429/403, "Access Denied", slow TTFB) and the fixed delays above shrink to a short
+    # render settle of delay_min seconds.
+    adaptive_pacing: bool = True
+    pacing_min_delay: float = 1.0
+    pacing_max_delay: float = 60.0
+    slow_ttfb_ms: float = 3000.0
+    # Readiness waits: after a listing navigation wait until product links (or one of
+    # listing_ready_selectors, e.g. Magento's empty-category message) are in the DOM, and after a
+    # load-more click until the product link count grows, each capped at ready_timeout_ms, instead
+    # of sleeping a fixed delay. Network idle (capped) is the fallback signal. Without adaptive
+    # pacing the fixed delays still bound request spacing from below; the wait counts toward them.
+    readiness_waits: bool = True
+    listing_ready_selectors: List[str] = field(default_factory=lambda: [".message.info.empty"])
+    ready_timeout_ms: float = 10000.0
+    network_idle_cap_ms: float = 3000.0
+    # Shared browser session (core/browser.py). A persistent profile keeps cookies and solved
+    # bot challenges across stages and runs; None uses a throwaway context.
+    browser_profile_dir: Optional[str] = DEFAULT_PROFILE_DIR
+    # Sitemap backend: read product URLs from these sitemap XML files (gzip and sitemap indexes
+    # supported) and only fall back to Playwright listing crawling if they fail or yield nothing.
+    # Sitemaps aren't category-scoped, so product_url_pattern/exclude_slug_substrings must be
+    # enough to select this product type.
+    sitemap_urls: Optional[List[str]] = None
+    # Only follow child sitemaps of an index whose URL contains one of these substrings.
+    sitemap_child_filter: Optional[List[str]] = None
+    # Incremental mode: stop paginating once listing pages only show URLs from the previous
+    # inventory, and emit a diff (added/removed/unchanged) against it.
+    incremental: bool = False
+    stop_after_known_pages: int = 1
     # Output path (repo-root relative)
     output_path: str = "data/url_lists/canon_camera_urls.json"
+    # Per-page checkpoint journal (default: {output_path}.checkpoint.jsonl). With resume=True a
+    # restarted run skips listing pages it already visited.
+    checkpoint_path: Optional[str] = None
+    resume: bool = True
 
 
 def validate_discovery_output(payload: Dict[str, Any]) -> Tuple[bool, List[str]]:
@@ -131,13 +241,67 @@ def validate_discovery_output(payload: Dict[str, Any]) -> Tuple[bool, List[str]]
     return len(errors) == 0, errors
 
 
+def diff_inventory(
+    previous_urls: List[str],
+    current_urls: List[str],
+    complete: bool,
+    changed: Optional[List[str]] = None,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Merge a (possibly partial) crawl with the previous inventory.
+
+    Returns (urls, diff). When the crawl did not see every listing page (`complete=False`,
+    e.g. it stopped on known URLs), previous URLs it didn't reach are carried over instead
+    of being reported as removed. `changed` lists existing URLs known to have changed
+    (e.g. from sitemap lastmod); listing pages carry no such signal.
+    """
+    previous_set = set(previous_urls)
+    current_set = set(current_urls)
+
+    added = [u for u in current_urls if u not in previous_set]
+    if complete:
+        removed = [u for u in previous_urls if u not in current_set]
+        urls = list(current_urls)
+    else:
+        removed = []
+        urls = list(current_urls) + [u for u in previous_urls if u not in current_set]
+
+    changed_urls = [u for u in (changed or []) if u in previous_set and u in current_set]
+    diff = {
+        "complete_crawl": complete,
+        "added": added,
+        "removed": removed,
+        "changed": changed_urls,
+        "unchanged_count": len(urls) - len(added) - len(changed_urls),
+    }
+    return urls, diff
+
+
 class BaseDiscovery:
-    def __init__(self, config: DiscoveryConfig):
+    def __init__(self, config: DiscoveryConfig, metrics: Optional[StageMetrics] = None):
         self.config = config
-
-    def discover(self) -> Dict[str, Any]:
+        self._metrics = metrics or StageMetrics("discovery")
+        self._journal: Optional[CheckpointJournal] = None
+        self._checkpoint_records: List[Dict[str, Any]] = []
+        self._limiter: Optional[AdaptiveRateLimiter] = None
+        # URLs from the previous inventory (incremental mode only)
+        self._known_urls: Set[str] = set()
+        self._stopped_on_known = False
+        # href -> (normalized, fragment_stripped, ok, excluded_substring); see _take_link
+        self._link_cache: Dict[Tuple[str, str], Tuple[str, bool, bool, Optional[str]]] = {}
+        # In-page link harvesting for load-more listings; turned off after a failed evaluate
+        self._harvest = config.harvest_links_in_page
+        self._readiness: Optional[PageReadiness] = None
+        if config.readiness_waits:
+            self._readiness = PageReadiness(self._metrics, config.ready_timeout_ms, config.network_idle_cap_ms)
+
+    def discover(self, previous_payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         raise NotImplementedError
 
+    def _all_known(self, urls: List[str]) -> bool:
+        """Incremental mode: True when a non-empty page only contains URLs we already had."""
+        return bool(self.config.incremental and self._known_urls and urls) and all(u in self._known_urls for u in urls)
+
 
 class CanonDiscovery(BaseDiscovery):
     """
@@ -157,63 +321,170 @@ class CanonDiscovery(BaseDiscovery):
     ]
 
     def _random_delay(self, is_long_break: bool = False) -> None:
-        if is_long_break:
+        if self._limiter is not None:
+            delay = self.config.delay_min
+        elif is_long_break:
             delay = random.uniform(self.config.long_break_min, self.config.long_break_max)
         else:
             delay = random.uniform(self.config.delay_min, self.config.delay_max)
-        time.sleep(delay)
+        with self._metrics.phase("settle"):
+            time.sleep(delay)
+
+    def _product_link_selector(self) -> str:
+        return f'a.product-item-link, a[href*="{self.config.product_url_pattern}"]'
+
+    def _settle(self, page, grown_from: Optional[int] = None, is_long_break: bool = False) -> None:
+        """
+        After a listing navigation (or a load-more click, with grown_from = product links before it):
+        wait for the page to be ready, or sleep the fixed delay without readiness waits.
+        """
+        if self._readiness is None:
+            self._random_delay(is_long_break=is_long_break)
+            return
+        start = time.monotonic()
+        selector = self._product_link_selector()
+        if grown_from is not None:
+            ready = self._readiness.wait_for_count_above(page, selector, grown_from)
+        else:
+            ready = self._readiness.wait_for_any(page, [selector, *self.config.listing_ready_selectors])
+        if not ready:
+            self._readiness.wait_for_network_idle(page)
+        if self._limiter is None:
+            if is_long_break:
+                floor = random.uniform(self.config.long_break_min, self.config.long_break_max)
+            else:
+                floor = random.uniform(self.config.delay_min, self.config.delay_max)
+            remaining = floor - (time.monotonic() - start)
+            if remaining > 0:
+                with self._metrics.phase("settle"):
+                    time.sleep(remaining)
+
+    def _make_limiter(self) -> Optional[AdaptiveRateLimiter]:
+        if not self.config.adaptive_pacing:
+            return None
+        return AdaptiveRateLimiter(
+            initial_delay=(self.config.delay_min + self.config.delay_max) / 2,
+            min_delay=self.config.pacing_min_delay,
+            max_delay=self.config.pacing_max_delay,
+            slow_ttfb_ms=self.config.slow_ttfb_ms,
+        )
+
+    def _pace_request(self) -> None:
+        """Called right before each navigation/click that hits the site."""
+        if self._limiter is not None:
+            with self._metrics.phase("pace"):
+                self._limiter.wait()
+
+    def _observe(self, response, html: Optional[str]) -> bool:
+        """Feed the pacer; True when the page came back denied or with an error status."""
+        if self._limiter is not None:
+            self._limiter.observe_response(response, html)
+        status = getattr(response, "status", None)
+        return bool(html and "Access Denied" in html) or (status is not None and status >= 400)
+
+    def _page_html(self, page) -> str:
+        with self._metrics.phase("fetch"):
+            html = page.content()
+        self._metrics.add("bytes_fetched", len(html.encode("utf-8")))
+        return html
 
-    def _extract_product_links(self, soup: BeautifulSoup, base_url: str, stats: Dict[str, Any]) -> List[str]:
-        product_urls: List[str] = []
+    def _parse_links(self, html: str, base_url: str, stats: Dict[str, Any]) -> List[str]:
+        with self._metrics.phase("parse"):
+            from bs4 import BeautifulSoup
 
-        # Prefer Canon's typical selector when present
-        for link in soup.find_all("a", class_=re.compile(r"product-item-link", re.I)):
-            href = link.get("href")
-            if not href:
-                continue
-            full_url = urljoin(base_url, href)
-            normalized, stripped = _normalize_product_url(full_url)
-            if stripped:
-                stats["fragments_stripped"] += 1
+            soup = BeautifulSoup(html, "html.parser")
+            return self._extract_product_links(soup, base_url, stats)
+
+    def _harvest_links(self, page, base_url: str, stats: Dict[str, Any]) -> Tuple[List[str], bool]:
+        """New product URLs since the last harvest on this document, plus an access-denied flag."""
+        with self._metrics.phase("fetch"):
+            result = page.evaluate(_HARVEST_LINKS_JS, self.config.product_url_pattern)
+        hrefs = result.get("hrefs") or []
+        self._metrics.add("bytes_fetched", sum(len(h) for h in hrefs))
+        stats["harvested_hrefs"] = stats.get("harvested_hrefs", 0) + len(hrefs)
+        with self._metrics.phase("parse"):
+            found = UrlAccumulator()
+            origin = _origin(base_url)
+            for href in hrefs:
+                self._take_link(found, base_url, origin, href, stats)
+        return found.to_list(), bool(result.get("access_denied"))
+
+    def _load_more_links(self, page, base_url: str, response, stats: Dict[str, Any]) -> List[str]:
+        """Product links after a load-more listing navigation/click (in-page harvest or full DOM)."""
+        if self._harvest:
+            try:
+                urls, denied = self._harvest_links(page, base_url, stats)
+                self._observe(response, "Access Denied" if denied else None)
+                return urls
+            except Exception as e:
+                # The DOM path re-reads every anchor, so nothing harvested so far is lost.
+                logger.warning("In-page link harvest failed (%s); falling back to DOM parsing", e)
+                self._harvest = False
+                stats["harvest_fallback"] = True
+        html = self._page_html(page)
+        self._observe(response, html)
+        return self._parse_links(html, base_url, stats)
+
+    def _take_link(self, found: UrlAccumulator, base_url: str, origin: str, href: str, stats: Dict[str, Any]) -> None:
+        """
+        Normalize/validate one anchor href, memoized per run.
+
+        The same product links repeat on every listing page (nav, carousels, "related"), so
+        each distinct href is joined, normalized and validated once. Absolute hrefs key on
+        the href alone, root-relative ones on the site origin, anything else on the page URL.
+        """
+        if href.startswith(("http://", "https://")):
+            key = ("", href)
+        elif href.startswith("/") and not href.startswith("//"):
+            key = (origin, href)
+        else:
+            key = (base_url, href)
+
+        result = self._link_cache.get(key)
+        if result is None:
+            normalized, stripped = _normalize_product_url(urljoin(base_url, href))
             ok, reason = _is_valid_product_url(
                 normalized,
                 self.config.product_url_pattern,
                 exclude_slug_substrings=self.config.exclude_slug_substrings,
             )
-            if ok:
-                product_urls.append(normalized)
-            elif reason and reason.startswith("excluded_slug_contains:"):
-                stats["excluded_urls"] += 1
-                sub = reason.split("excluded_slug_contains:", 1)[1]
-                stats["excluded_by_substring"][sub] = stats["excluded_by_substring"].get(sub, 0) + 1
+            excluded = None
+            if not ok and reason and reason.startswith("excluded_slug_contains:"):
+                excluded = reason.split("excluded_slug_contains:", 1)[1]
+            result = self._link_cache[key] = (normalized, stripped, ok, excluded)
+        else:
+            stats["link_cache_hits"] += 1
+
+        normalized, stripped, ok, excluded = result
+        if stripped:
+            stats["fragments_stripped"] += 1
+        if ok:
+            found.add(normalized)
+        elif excluded is not None:
+            stats["excluded_urls"] += 1
+            stats["excluded_by_substring"][excluded] = stats["excluded_by_substring"].get(excluded, 0) + 1
+
+    def _extract_product_links(self, soup: "BeautifulSoup", base_url: str, stats: Dict[str, Any]) -> List[str]:
+        found = UrlAccumulator()
+        origin = _origin(base_url)
+
+        # Prefer Canon's typical selector when present
+        for link in soup.find_all("a", class_=_PRODUCT_ITEM_LINK_RE):
+            href = link.get("href")
+            if href:
+                self._take_link(found, base_url, origin, href, stats)
 
         # Fallback: any link containing /shop/p/
+        pattern = self.config.product_url_pattern
         for link in soup.find_all("a", href=True):
             href = link.get("href")
-            if not href:
-                continue
-            if self.config.product_url_pattern not in href and not href.startswith(self.config.product_url_pattern):
-                continue
-            full_url = urljoin(base_url, href)
-            normalized, stripped = _normalize_product_url(full_url)
-            if stripped:
-                stats["fragments_stripped"] += 1
-            ok, reason = _is_valid_product_url(
-                normalized,
-                self.config.product_url_pattern,
-                exclude_slug_substrings=self.config.exclude_slug_substrings,
-            )
-            if ok:
-                product_urls.append(normalized)
-            elif reason and reason.startswith("excluded_slug_contains:"):
-                stats["excluded_urls"] += 1
-                sub = reason.split("excluded_slug_contains:", 1)[1]
-                stats["excluded_by_substring"][sub] = stats["excluded_by_substring"].get(sub, 0) + 1
+            if href and pattern in href:
+                self._take_link(found, base_url, origin, href, stats)
 
-        return _dedupe_preserve_order(product_urls)
+        return found.to_list()
 
     def _scrape_url_pagination(self, page, base_url: str) -> Tuple[List[str], Dict[str, Any]]:
-        collected: List[str] = []
+        collected = UrlAccumulator()
         stats = {
             "url_pagination_pages_checked": 0,
             "url_pagination_pages_with_products": 0,
@@ -221,40 +492,65 @@ class CanonDiscovery(BaseDiscovery):
             "fragments_stripped": 0,
             "excluded_urls": 0,
             "excluded_by_substring": {},
+            "link_cache_hits": 0,
         }
 
+        done_pages = completed_pages(self._checkpoint_records, base_url)
         consecutive_empty = 0
+        consecutive_known = 0
         for page_num in range(1, self.config.max_pages + 1):
             page_url = base_url if page_num == 1 else f"{base_url}?p={page_num}"
             stats["url_pagination_pages_checked"] += 1
 
-            logger.info("Canon discovery: visiting %s", page_url)
-            page.goto(page_url, wait_until="domcontentloaded", timeout=30000)
-            self._random_delay()
-
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-            urls = self._extract_product_links(soup, page_url, stats)
+            if page_num in done_pages:
+                urls = done_pages[page_num]
+                stats["url_pagination_pages_resumed"] = stats.get("url_pagination_pages_resumed", 0) + 1
+            else:
+                logger.info("Canon discovery: visiting %s", page_url)
+                with self._metrics.url(page_url) as rec:
+                    self._pace_request()
+                    with self._metrics.phase("fetch"):
+                        response = page.goto(page_url, wait_until="domcontentloaded", timeout=30000)
+                    self._settle(page)
+
+                    html = self._page_html(page)
+                    blocked = self._observe(response, html)
+                    urls = self._parse_links(html, page_url, stats)
+                    rec["product_urls"] = len(urls)
+                    if blocked:
+                        # Not checkpointed, so a resumed run fetches this page again.
+                        stats["url_pagination_pages_blocked"] = stats.get("url_pagination_pages_blocked", 0) + 1
+                    elif self._journal is not None:
+                        with self._metrics.phase("checkpoint"):
+                            self._journal.append(
+                                {"type": "page", "listing_url": base_url, "page_num": page_num, "urls": urls}
+                            )
 
             if urls:
                 stats["url_pagination_pages_with_products"] += 1
                 consecutive_empty = 0
                 stats["url_pagination_consecutive_empty_pages"] = 0
                 collected.extend(urls)
+
+                consecutive_known = consecutive_known + 1 if self._all_known(urls) else 0
+                if consecutive_known >= self.config.stop_after_known_pages:
+                    stats["stopped_on_known_urls"] = True
+                    self._stopped_on_known = True
+                    break
             else:
                 consecutive_empty += 1
                 stats["url_pagination_consecutive_empty_pages"] = consecutive_empty
                 if consecutive_empty >= self.config.stop_after_consecutive_empty_pages:
                     break
 
-            if self.config.max_products and len(_dedupe_preserve_order(collected)) >= self.config.max_products:
+            if self.config.max_products and len(collected) >= self.config.max_products:
                 break
 
             # Throttle every N pages
-            if page_num % self.config.long_break_every == 0:
+            if self._limiter is None and page_num not in done_pages and page_num % self.config.long_break_every == 0:
                 self._random_delay(is_long_break=True)
 
-        return _dedupe_preserve_order(collected), stats
+        return collected.to_list(), stats
 
     def _find_load_more_button(self, page):
         for selector in self.LOAD_MORE_SELECTORS:
@@ -285,112 +581,140 @@ class CanonDiscovery(BaseDiscovery):
             "fragments_stripped": 0,
             "excluded_urls": 0,
             "excluded_by_substring": {},
+            "link_cache_hits": 0,
         }
-        collected: List[str] = []
+        collected = UrlAccumulator()
+        self._harvest = self.config.harvest_links_in_page
 
-        page.goto(base_url, wait_until="domcontentloaded", timeout=30000)
-        self._random_delay(is_long_break=True)
+        with self._metrics.url(base_url) as rec:
+            self._pace_request()
+            with self._metrics.phase("fetch"):
+                response = page.goto(base_url, wait_until="domcontentloaded", timeout=30000)
+            self._settle(page, is_long_break=True)
 
-        html = page.content()
-        soup = BeautifulSoup(html, "html.parser")
-        collected.extend(self._extract_product_links(soup, base_url, stats))
+            rec["product_urls"] = len(collected.extend(self._load_more_links(page, base_url, response, stats)))
 
         for click in range(self.config.max_load_more_clicks):
             btn = self._find_load_more_button(page)
             if not btn:
                 break
 
-            try:
-                btn.click()
-            except Exception:
-                break
+            with self._metrics.url(base_url) as rec:
+                rec["load_more_click"] = click + 1
+                links_before = PageReadiness.count(page, self._product_link_selector()) if self._readiness else 0
+                self._pace_request()
+                try:
+                    with self._metrics.phase("fetch"):
+                        btn.click()
+                except Exception:
+                    break
 
-            stats["load_more_clicks"] += 1
-            self._random_delay(is_long_break=True)
+                stats["load_more_clicks"] += 1
+                self._settle(page, grown_from=links_before, is_long_break=True)
 
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-            new_urls = self._extract_product_links(soup, base_url, stats)
-            before = len(collected)
-            collected.extend([u for u in new_urls if u not in collected])
-            after = len(collected)
+                fresh = collected.extend(self._load_more_links(page, base_url, None, stats))
+                rec["product_urls"] = len(fresh)
 
-            if after == before:
+            if not fresh:
                 # No new items loaded, stop
                 break
 
+            if self._all_known(fresh):
+                stats["stopped_on_known_urls"] = True
+                self._stopped_on_known = True
+                break
+
             if self.config.max_products and len(collected) >= self.config.max_products:
                 break
 
-            if (click + 1) % self.config.long_break_every == 0:
+            if self._limiter is None and (click + 1) % self.config.long_break_every == 0:
                 self._random_delay(is_long_break=True)
 
-        return _dedupe_preserve_order(collected), stats
+        stats["link_harvest"] = "in_page" if self._harvest else "dom"
+        return collected.to_list(), stats
 
-    def discover(self) -> Dict[str, Any]:
-        all_urls: List[str] = []
+    def discover(self, previous_payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        previous_urls: List[str] = list((previous_payload or {}).get("urls") or [])
+        self._known_urls = set(previous_urls) if self.config.incremental else set()
+        self._stopped_on_known = False
+
+        self._link_cache = {}
+        all_urls = UrlAccumulator()
         errors: List[Dict[str, Any]] = []
+        blocked_listings = 0
         stats: Dict[str, Any] = {"listing_urls": {}}
+        self._limiter = self._make_limiter()
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=self.config.headless,
-                args=[
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                ],
-            )
-            page = browser.new_page()
-            page.set_viewport_size({"width": 1920, "height": 1080})
-
-            # realistic headers
-            page.set_extra_http_headers(
-                {
-                    "User-Agent": (
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    ),
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Upgrade-Insecure-Requests": "1",
-                }
-            )
+        self._journal = CheckpointJournal(
+            self.config.checkpoint_path or default_checkpoint_path(self.config.output_path),
+            stage="discovery",
+            resume=self.config.resume,
+        )
+        self._checkpoint_records = self._journal.open()
+        done_listings = completed_listings(self._checkpoint_records)
 
+        with get_session(self.config.headless, self.config.browser_profile_dir).page() as page:
             try:
                 for idx, listing_url in enumerate(self.config.listing_urls):
+                    if listing_url in done_listings:
+                        stats["listing_urls"][listing_url] = {**done_listings[listing_url]["stats"], "resumed": True}
+                        all_urls.extend(done_listings[listing_url]["urls"])
+                        continue
+
                     listing_stats: Dict[str, Any] = {}
                     try:
                         urls, url_stats = self._scrape_url_pagination(page, listing_url)
                         listing_stats.update(url_stats)
 
                         # If URL pagination returns very few, try load-more
-                        if len(urls) < 10:
+                        if len(urls) < 10 and not listing_stats.get("stopped_on_known_urls"):
                             lm_urls, lm_stats = self._scrape_load_more(page, listing_url)
                             listing_stats.update(lm_stats)
-                            urls = _dedupe_preserve_order(urls + lm_urls)
+                            merged = UrlAccumulator(urls)
+                            merged.extend(lm_urls)
+                            urls = merged.to_list()
 
                         stats["listing_urls"][listing_url] = listing_stats
                         all_urls.extend(urls)
+                        if listing_stats.get("url_pagination_pages_blocked"):
+                            blocked_listings += 1
+                        else:
+                            self._journal.append(
+                                {"type": "listing", "listing_url": listing_url, "urls": urls, "stats": listing_stats}
+                            )
 
                         # pacing between listing URLs
-                        if idx < len(self.config.listing_urls) - 1:
+                        if self._limiter is None and idx < len(self.config.listing_urls) - 1:
                             self._random_delay(is_long_break=True)
 
-                        if self.config.max_products and len(_dedupe_preserve_order(all_urls)) >= self.config.max_products:
+                        if self.config.max_products and len(all_urls) >= self.config.max_products:
                             break
                     except Exception as e:
                         errors.append({"listing_url": listing_url, "error": str(e)})
             finally:
-                browser.close()
+                self._journal.close()
+
+        if not errors and not blocked_listings:
+            # Keep the journal after a failed or blocked listing so --resume can pick up from it.
+            self._journal.finish()
+        self._journal = None
+        if self._limiter is not None:
+            stats["pacing"] = self._limiter.snapshot()
 
-        final_urls = _dedupe_preserve_order(all_urls)
-        duplicates_removed = len(all_urls) - len(final_urls)
+        final_urls = all_urls.to_list()
+        duplicates_removed = all_urls.duplicates
+        stats["distinct_hrefs_classified"] = len(self._link_cache)
 
+        capped = bool(self.config.max_products and len(final_urls) > self.config.max_products)
         if self.config.max_products:
             final_urls = final_urls[: self.config.max_products]
 
+        diff: Optional[Dict[str, Any]] = None
+        if self.config.incremental and previous_payload is not None:
+            complete = not (self._stopped_on_known or errors or capped)
+            final_urls, diff = diff_inventory(previous_urls, final_urls, complete)
+            diff["previous_discovery_date"] = previous_payload.get("discovery_date")
+
         payload: Dict[str, Any] = {
             "brand": self.config.brand_slug,
             "product_type": self.config.product_type,
@@ -405,22 +729,126 @@ class CanonDiscovery(BaseDiscovery):
                 **stats,
             },
         }
+        if diff is not None:
+            payload["diff"] = diff
         if errors:
             payload["errors"] = errors
 
         return payload
 
 
-def discover(config: DiscoveryConfig) -> Dict[str, Any]:
+class SitemapDiscovery(BaseDiscovery):
+    """
+    Enumerate product URLs from the manufacturer's sitemap(s), no browser involved.
+
+    URLs pass the same `_is_valid_product_url` rules as listing discovery and are ordered by
+    `lastmod` (newest first) so downstream stages see recently changed products first. The
+    per-URL lastmod map is stored in the inventory; in incremental mode a newer lastmod than the
+    previous inventory's marks the URL as changed.
+    """
+
+    def discover(self, previous_payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "sitemap_entries": 0,
+            "fragments_stripped": 0,
+            "excluded_urls": 0,
+            "excluded_by_substring": {},
+            "rejected_by_reason": {},
+        }
+        lastmod: Dict[str, Optional[str]] = {}
+
+        # requests is only needed by this backend
+        from agents.spec_pipeline.core.sitemap import iter_sitemap
+
+        for sitemap_url in self.config.sitemap_urls or []:
+            # Streaming: download and XML parsing interleave, so they are timed as one phase.
+            with self._metrics.url(sitemap_url), self._metrics.phase("fetch_parse"):
+                for entry in iter_sitemap(sitemap_url, child_filter=self.config.sitemap_child_filter, stats=stats):
+                    stats["sitemap_entries"] += 1
+                    normalized, stripped = _normalize_product_url(entry.loc)
+                    if stripped:
+                        stats["fragments_stripped"] += 1
+                    ok, reason = _is_valid_product_url(
+                        normalized,
+                        self.config.product_url_pattern,
+                        exclude_slug_substrings=self.config.exclude_slug_substrings,
+                    )
+                    if ok:
+                        # keep the newest lastmod if a URL is listed twice
+                        if normalized not in lastmod or (entry.lastmod or "") > (lastmod[normalized] or ""):
+                            lastmod[normalized] = entry.lastmod
+                    elif reason and reason.startswith("excluded_slug_contains:"):
+                        stats["excluded_urls"] += 1
+                        sub = reason.split("excluded_slug_contains:", 1)[1]
+                        stats["excluded_by_substring"][sub] = stats["excluded_by_substring"].get(sub, 0) + 1
+                    elif reason:
+                        stats["rejected_by_reason"][reason] = stats["rejected_by_reason"].get(reason, 0) + 1
+
+        # Newest first; URLs without lastmod keep sitemap order at the end (sort is stable).
+        final_urls = sorted(lastmod, key=lambda u: lastmod[u] or "", reverse=True)
+        capped = bool(self.config.max_products and len(final_urls) > self.config.max_products)
+        if self.config.max_products:
+            final_urls = final_urls[: self.config.max_products]
+
+        diff: Optional[Dict[str, Any]] = None
+        if self.config.incremental and previous_payload is not None:
+            previous_lastmod = previous_payload.get("lastmod") or {}
+            changed = [
+                u for u in final_urls
+                if lastmod.get(u) and previous_lastmod.get(u) and lastmod[u] > previous_lastmod[u]
+            ]
+            final_urls, diff = diff_inventory(
+                list(previous_payload.get("urls") or []), final_urls, complete=not capped, changed=changed
+            )
+            diff["previous_discovery_date"] = previous_payload.get("discovery_date")
+
+        payload: Dict[str, Any] = {
+            "brand": self.config.brand_slug,
+            "product_type": self.config.product_type,
+            "category_slug": self.config.category_slug,
+            "listing_urls": self.config.listing_urls,
+            "sitemap_urls": self.config.sitemap_urls,
+            "source": "sitemap",
+            "product_url_pattern": self.config.product_url_pattern,
+            "discovery_date": _utc_now_iso(),
+            "total_urls": len(final_urls),
+            "urls": final_urls,
+            "lastmod": {u: lastmod.get(u) for u in final_urls},
+            "stats": stats,
+        }
+        if diff is not None:
+            payload["diff"] = diff
+        return payload
+
+
+def discover(config: DiscoveryConfig, previous_payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Dispatch to the correct discovery implementation.
+
+    `previous_payload` is the last written inventory; it is only used when config.incremental.
     """
     brand = (config.brand_slug or "").lower()
-    if brand == "canon":
-        payload = CanonDiscovery(config).discover()
-    else:
+    if brand != "canon":
         raise ValueError(f"No discovery implementation for brand={config.brand_slug}")
 
+    metrics = start_stage("discovery", brand=config.brand_slug, product_type=config.product_type)
+    payload: Optional[Dict[str, Any]] = None
+    try:
+        if config.sitemap_urls:
+            try:
+                payload = SitemapDiscovery(config, metrics).discover(previous_payload)
+                if not payload["urls"]:
+                    logger.warning("Sitemap discovery found no product URLs; falling back to listing crawl")
+                    payload = None
+            except Exception as e:
+                logger.warning("Sitemap discovery failed (%s); falling back to listing crawl", e)
+                payload = None
+
+        if payload is None:
+            payload = CanonDiscovery(config, metrics).discover(previous_payload)
+    finally:
+        metrics.finish()
+
     ok, errs = validate_discovery_output(payload)
     if not ok:
         raise ValueError("Discovery output validation failed: " + "; ".join(errs))
@@ -1,16 +1,27 @@
+import hashlib
+import inspect
 import json
 import logging
 import random
 import re
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse, urlunparse
 
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+from agents.spec_pipeline.core.browser import DEFAULT_PROFILE_DIR, get_session
+from agents.spec_pipeline.core.checkpoint import CheckpointJournal, completed_items, default_checkpoint_path
+from agents.spec_pipeline.core.metrics import StageMetrics, start_stage
+from agents.spec_pipeline.core.content_cache import ContentCache, version_hash
+from agents.spec_pipeline.core.rate_limiter import AdaptiveRateLimiter
+from agents.spec_pipeline.core.readiness import PageReadiness
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -25,12 +36,111 @@ def _normalize_url(url: str) -> str:
     return urlunparse(parsed._replace(fragment=""))
 
 
+def _html_key(html: str, base_url: str) -> str:
+    """Parse cache key: sha256 over the page URL (links resolve against it) and the HTML."""
+    return hashlib.sha256(f"{base_url}\0{html}".encode("utf-8")).hexdigest()
+
+
 def _slug_from_url(url: str) -> str:
     parsed = urlparse(url)
     parts = [p for p in parsed.path.split("/") if p]
     return parts[-1] if parts else "unknown"
 
 
+# Runs inside the product page (in_page_extraction mode) and returns the same raw pieces the
+# BeautifulSoup parsers read: tech-spec rows, image candidates, JSON-LD blocks and the price box.
+# Text mirrors BeautifulSoup's get_text(sep, strip=True): trimmed text nodes joined by sep.
+_PAGE_FACTS_JS = """
+() => {
+    const SKIP = new Set(["SCRIPT", "STYLE", "TEMPLATE"]);
+    const text = (el, sep) => {
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+            if (n.parentElement && SKIP.has(n.parentElement.tagName) && n.parentElement !== el) continue;
+            const t = n.data.trim();
+            if (t) parts.push(t);
+        }
+        return parts.join(sep);
+    };
+    const attr = (el, name) => (el ? el.getAttribute(name) : null);
+
+    const sections = [];
+    const techSpec = document.querySelector("div#tech-spec-data");
+    if (techSpec) {
+        for (const h3 of techSpec.querySelectorAll("h3")) {
+            const container = h3.parentElement && h3.parentElement.closest("div.tech-spec");
+            if (!container) continue;
+            const cells = container.querySelectorAll("div.tech-spec-attr");
+            const attributes = [];
+            for (let i = 0; i + 1 < cells.length; i += 2) {
+                const valDiv = cells[i + 1];
+                const table = valDiv.querySelector("table");
+                attributes.push({
+                    raw_key: text(cells[i], ""),
+                    value_text: text(valDiv, " "),
+                    table_html: table ? table.outerHTML : null,
+                    href: table ? null : attr(valDiv.querySelector("a[href]"), "href"),
+                });
+            }
+            sections.push({section_name: text(h3, ""), attributes});
+        }
+    }
+
+    const active = document.querySelector(".fotorama__stage__frame.fotorama__active");
+    const priceAmount = document.querySelector(
+        ".product-info-price .price-box [data-price-type='finalPrice'][data-price-amount]"
+    );
+    const priceText = document.querySelector(".product-info-price .price-box .price");
+    return {
+        access_denied: document.documentElement.outerHTML.includes("Access Denied"),
+        tech_specs: sections,
+        sources: {
+            placeholder: attr(document.querySelector("img.gallery-placeholder__image"), "src"),
+            active_href: attr(active, "href"),
+            active_img: active ? attr(active.querySelector("img.fotorama__img"), "src") : null,
+            og_image: attr(document.querySelector("meta[property='og:image']"), "content"),
+            ld_json: Array.from(
+                document.querySelectorAll("script[type='application/ld+json']"), (s) => s.textContent || ""
+            ),
+            fotorama: Array.from(
+                document.querySelectorAll(".fotorama__stage__frame img.fotorama__img"), (img) => attr(img, "src")
+            ),
+            img_srcs: Array.from(document.querySelectorAll("img[src]"), (img) => img.getAttribute("src")).filter(
+                (src) => src.includes("s7d1.scene7.com") && src.includes("/is/image/canon/")
+            ),
+            price_amount: attr(priceAmount, "data-price-amount"),
+            price_text: priceText ? text(priceText, "") : null,
+        },
+    };
+}
+"""
+
+
+def _pdf_context(href: Optional[str], base_url: str) -> Optional[Dict[str, str]]:
+    """Context for a spec value that links to a PDF (e.g. "View Full Technical Specs PDF")."""
+    if not href:
+        return None
+    pdf_url = urljoin(base_url, href)
+    if pdf_url.lower().endswith(".pdf") or "pdf" in (pdf_url.lower()):
+        return {"pdf_url": pdf_url}
+    return None
+
+
+def _ld_json_nodes(texts: List[str]) -> List[Dict[str, Any]]:
+    nodes: List[Dict[str, Any]] = []
+    for txt in texts:
+        txt = (txt or "").strip()
+        if not txt:
+            continue
+        try:
+            data = json.loads(txt)
+        except Exception:
+            continue
+        nodes.extend(n for n in (data if isinstance(data, list) else [data]) if isinstance(n, dict))
+    return nodes
+
+
 @dataclass
 class ExtractionConfig:
     brand_slug: str
@@ -53,26 +163,136 @@ class ExtractionConfig:
     long_break_min: float = 8.0
     long_break_max: float = 12.0
     max_retries: int = 3
+    # Adaptive pacing: when enabled, spacing between requests follows server signals
+    # (429/403, "Access Denied", slow TTFB) and the fixed delays above shrink to a short
+    # render settle of delay_min seconds.
+    adaptive_pacing: bool = True
+    pacing_min_delay: float = 1.0
+    pacing_max_delay: float = 60.0
+    slow_ttfb_ms: float = 3000.0
+    # Readiness waits: after navigating (and clicking the specs tab) wait until one of
+    # ready_selectors is in the DOM, falling back to network idle (capped) when none shows up,
+    # instead of sleeping a fixed settle delay. Without adaptive pacing, delay_min..delay_max
+    # still bounds request spacing from below and the readiness wait counts toward it.
+    readiness_waits: bool = True
+    ready_selectors: List[str] = field(default_factory=lambda: ["#tech-spec-data"])
+    ready_timeout_ms: float = 10000.0
+    network_idle_cap_ms: float = 3000.0
+    # Shared browser session (core/browser.py). A persistent profile keeps cookies and solved
+    # bot challenges across stages and runs; None uses a throwaway context.
+    browser_profile_dir: Optional[str] = DEFAULT_PROFILE_DIR
+    # Incremental mode: when the URL inventory carries a discovery diff, only extract added/changed
+    # products (plus any missing or errored in the previous extraction) and merge the rest.
+    incremental: bool = False
+    # Refresh work list (refresh_scheduler.plan_refresh output): exactly its URLs are fetched and
+    # every other item is carried over from the previous extraction (which plugins load when
+    # incremental is on, so run.py sets both).
+    work_list_path: Optional[str] = None
+    # Per-URL checkpoint journal (default: {output_path}.checkpoint.jsonl). With resume=True a
+    # restarted run reuses items already extracted cleanly and only re-visits the rest.
+    checkpoint_path: Optional[str] = None
+    resume: bool = True
+    # Live fetches: run the spec/image/price extraction as a script in the page and pull back
+    # compact JSON instead of the rendered HTML. Table values keep the browser's outerHTML.
+    in_page_extraction: bool = False
+    # With in_page_extraction, still archive the rendered HTML to raw_html_dir (written off the
+    # extraction thread). Turning it off also skips transferring the HTML out of the browser.
+    archive_raw_html: bool = True
+    # Parse results of HTML pages, content-addressed by (sha256(url + html), parser version);
+    # re-extracting an unchanged page skips BeautifulSoup entirely. None disables the cache.
+    parse_cache_dir: Optional[str] = "data/cache/parse"
+
+
+# Bump for parser changes the source hash in parser_version() can't see (e.g. a bs4 upgrade).
+PARSER_VERSION = 1
 
 
 class BaseExtractor:
-    def __init__(self, config: ExtractionConfig):
+    # Methods whose source defines the parse output; part of the parse cache version.
+    PARSER_METHODS: List[str] = []
+
+    def __init__(self, config: ExtractionConfig, metrics: Optional[StageMetrics] = None):
         self.config = config
+        self._limiter: Optional[AdaptiveRateLimiter] = None
+        self._metrics = metrics or StageMetrics("extraction")
+        self._readiness: Optional[PageReadiness] = None
+        if config.readiness_waits:
+            self._readiness = PageReadiness(self._metrics, config.ready_timeout_ms, config.network_idle_cap_ms)
+        # Background raw-HTML writer (in_page_extraction mode), open for the duration of extract()
+        self._archiver: Optional[ThreadPoolExecutor] = None
 
     def extract(self, product_urls: List[str]) -> Dict[str, Any]:
         raise NotImplementedError
 
+    @classmethod
+    def parser_version(cls) -> str:
+        """PARSER_VERSION plus a hash of the parser source, so editing a parse method invalidates the cache."""
+        parts = [str(PARSER_VERSION), cls.__qualname__]
+        for fn in [getattr(cls, name) for name in cls.PARSER_METHODS] + [_normalize_url, _pdf_context, _ld_json_nodes]:
+            try:
+                parts.append(inspect.getsource(fn))
+            except (OSError, TypeError):
+                # No source available (e.g. a .pyc-only install): PARSER_VERSION alone decides.
+                parts.append(getattr(fn, "__qualname__", repr(fn)))
+        return version_hash(*parts)
+
 
 class CanonCameraExtractor(BaseExtractor):
     """
     Extraction-only: fetch raw HTML for each product page and parse Canon tech specs.
     """
 
+    PARSER_METHODS = [
+        "_parse_html",
+        "_parse_canon_tech_specs",
+        "_page_sources",
+        "_images_from_sources",
+        "_msrp_from_sources",
+    ]
+
     def _random_delay(self, is_long_break: bool = False) -> None:
-        if is_long_break:
-            time.sleep(random.uniform(self.config.long_break_min, self.config.long_break_max))
+        if self._limiter is not None:
+            delay = self.config.delay_min
+        elif is_long_break:
+            delay = random.uniform(self.config.long_break_min, self.config.long_break_max)
         else:
-            time.sleep(random.uniform(self.config.delay_min, self.config.delay_max))
+            delay = random.uniform(self.config.delay_min, self.config.delay_max)
+        with self._metrics.phase("settle"):
+            time.sleep(delay)
+
+    def _settle(self, page) -> None:
+        """After a navigation/click: wait for the page to be ready (or the fixed delay without readiness waits)."""
+        if self._readiness is None:
+            self._random_delay()
+            return
+        start = time.monotonic()
+        if not self._readiness.wait_for_any(page, self.config.ready_selectors):
+            self._readiness.wait_for_network_idle(page)
+        if self._limiter is None:
+            remaining = random.uniform(self.config.delay_min, self.config.delay_max) - (time.monotonic() - start)
+            if remaining > 0:
+                with self._metrics.phase("settle"):
+                    time.sleep(remaining)
+
+    def _make_limiter(self) -> Optional[AdaptiveRateLimiter]:
+        if not self.config.adaptive_pacing:
+            return None
+        return AdaptiveRateLimiter(
+            initial_delay=(self.config.delay_min + self.config.delay_max) / 2,
+            min_delay=self.config.pacing_min_delay,
+            max_delay=self.config.pacing_max_delay,
+            slow_ttfb_ms=self.config.slow_ttfb_ms,
+        )
+
+    def _pace_request(self) -> None:
+        """Called right before each navigation/click that hits the site."""
+        if self._limiter is not None:
+            with self._metrics.phase("pace"):
+                self._limiter.wait()
+
+    def _observe(self, response, html: Optional[str]) -> None:
+        if self._limiter is not None:
+            self._limiter.observe_response(response, html)
 
     def _save_raw_html(self, slug: str, html: str) -> str:
         out_dir = Path(self.config.raw_html_dir)
@@ -81,6 +301,10 @@ class CanonCameraExtractor(BaseExtractor):
         path.write_text(html, encoding="utf-8")
         return str(path)
 
+    def _archive_raw_html(self, slug: str, html: str) -> "Future[str]":
+        """Queue the raw HTML write on the archiver thread; the future resolves to the written path."""
+        return self._archiver.submit(self._save_raw_html, slug, html)
+
     def _read_cached_html(self, slug: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
         Returns (html, path, error)
@@ -100,37 +324,66 @@ class CanonCameraExtractor(BaseExtractor):
         except Exception as e:
             return None, str(cache_path), f"cache_read_error:{e}"
 
-    def _fetch_page_html(self, page, url: str) -> Tuple[Optional[str], Optional[str]]:
+    def _fetch_page(self, page, url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[str]]:
         """
-        Returns (html, error).
+        Returns (html, page_facts, error).
+
+        page_facts is the _PAGE_FACTS_JS result in in_page_extraction mode (else None); html is
+        None there when archive_raw_html is off.
         """
         last_error: Optional[str] = None
         for attempt in range(1, self.config.max_retries + 1):
             try:
-                page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                self._random_delay()
+                self._pace_request()
+                with self._metrics.phase("fetch"):
+                    response = page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                self._settle(page)
 
                 # If there's a specs tab, click it (best-effort)
                 try:
-                    specs_tab = page.get_by_text("Specifications", exact=False).first
-                    if specs_tab.is_visible():
-                        specs_tab.click()
-                        self._random_delay()
+                    with self._metrics.phase("fetch"):
+                        specs_tab = page.get_by_text("Specifications", exact=False).first
+                        clicked = specs_tab.is_visible()
+                        if clicked:
+                            specs_tab.click()
+                    if clicked:
+                        self._settle(page)
                 except Exception:
                     pass
 
-                html = page.content()
-                if "Access Denied" in html or "<title>Access Denied</title>" in html:
-                    return None, "access_denied"
-
-                return html, None
+                facts = None
+                html = None
+                if self.config.in_page_extraction:
+                    with self._metrics.phase("fetch"):
+                        facts = page.evaluate(_PAGE_FACTS_JS)
+                    self._metrics.add("bytes_fetched", len(json.dumps(facts)))
+                    denied = bool(facts.get("access_denied"))
+                    self._observe(response, "Access Denied" if denied else None)
+                    if denied:
+                        return None, None, "access_denied"
+
+                if facts is None or self.config.archive_raw_html:
+                    with self._metrics.phase("fetch"):
+                        html = page.content()
+                    self._metrics.add("bytes_fetched", len(html.encode("utf-8")))
+                if facts is None:
+                    self._observe(response, html)
+                    if "Access Denied" in html or "<title>Access Denied</title>" in html:
+                        return None, None, "access_denied"
+
+                return html, facts, None
             except Exception as e:
                 last_error = f"attempt_{attempt}_error:{e}"
+                if self._limiter is not None:
+                    # Timeouts/resets are the softest "slow down" signal we get.
+                    self._limiter.observe(ttfb_ms=self.config.slow_ttfb_ms + 1)
                 # exponential-ish backoff
-                time.sleep(min(10, 2 ** (attempt - 1)))
-        return None, last_error
+                self._metrics.add("fetch_retries")
+                with self._metrics.phase("retry_backoff"):
+                    time.sleep(min(10, 2 ** (attempt - 1)))
+        return None, None, last_error
 
-    def _parse_canon_tech_specs(self, soup: BeautifulSoup, base_url: str) -> List[Dict[str, Any]]:
+    def _parse_canon_tech_specs(self, soup: "BeautifulSoup", base_url: str) -> List[Dict[str, Any]]:
         """
         Returns manufacturer_sections[] shaped like:
         [{section_name, attributes:[{raw_key, raw_value, context?}]}]
@@ -173,11 +426,9 @@ class CanonCameraExtractor(BaseExtractor):
 
                     # If this value contains a PDF link (e.g. "View Full Technical Specs PDF"), capture it.
                     a = val_div.find("a", href=True)
-                    if a and a.get("href"):
-                        href = a.get("href")
-                        pdf_url = urljoin(base_url, href)
-                        if pdf_url.lower().endswith(".pdf") or "pdf" in (pdf_url.lower()):
-                            record["context"] = {"pdf_url": pdf_url}
+                    context = _pdf_context(a.get("href") if a else None, base_url)
+                    if context:
+                        record["context"] = context
 
                     section_attrs.append(record)
 
@@ -185,13 +436,64 @@ class CanonCameraExtractor(BaseExtractor):
 
         return sections
 
-    def _parse_canon_product_images(self, soup: BeautifulSoup, base_url: str) -> List[Dict[str, Any]]:
+    def _sections_from_page(self, tech_specs: List[Dict[str, Any]], base_url: str) -> List[Dict[str, Any]]:
+        """manufacturer_sections[] from the rows _PAGE_FACTS_JS collected (same shape as _parse_canon_tech_specs)."""
+        sections: List[Dict[str, Any]] = []
+        for section in tech_specs:
+            section_attrs: List[Dict[str, Any]] = []
+            for row in section.get("attributes") or []:
+                if row.get("table_html") is not None:
+                    section_attrs.append(
+                        {
+                            "raw_key": row["raw_key"],
+                            "raw_value": "[table]",
+                            "context": {"table_html": row["table_html"], "text_fallback": row["value_text"]},
+                        }
+                    )
+                    continue
+                record: Dict[str, Any] = {"raw_key": row["raw_key"], "raw_value": row["value_text"]}
+                context = _pdf_context(row.get("href"), base_url)
+                if context:
+                    record["context"] = context
+                section_attrs.append(record)
+            sections.append({"section_name": section["section_name"], "attributes": section_attrs})
+        return sections
+
+    @staticmethod
+    def _page_sources(soup: "BeautifulSoup") -> Dict[str, Any]:
+        """Raw image/price inputs from parsed HTML (same keys _PAGE_FACTS_JS returns as `sources`)."""
+        active = soup.select_one(".fotorama__stage__frame.fotorama__active")
+        active_img = active.select_one("img.fotorama__img") if active is not None else None
+        placeholder = soup.select_one("img.gallery-placeholder__image")
+        og = soup.find("meta", attrs={"property": "og:image"})
+        price_span = soup.select_one(
+            ".product-info-price .price-box [data-price-type='finalPrice'][data-price-amount]"
+        )
+        price_text = soup.select_one(".product-info-price .price-box .price")
+        return {
+            "placeholder": placeholder.get("src") if placeholder else None,
+            "active_href": active.get("href") if active is not None else None,
+            "active_img": active_img.get("src") if active_img else None,
+            "og_image": og.get("content") if og else None,
+            "ld_json": [
+                s.string or s.get_text() or "" for s in soup.find_all("script", attrs={"type": "application/ld+json"})
+            ],
+            "fotorama": [img.get("src") for img in soup.select(".fotorama__stage__frame img.fotorama__img")],
+            "img_srcs": [img.get("src") or "" for img in soup.find_all("img", src=True)],
+            "price_amount": price_span.get("data-price-amount") if price_span else None,
+            "price_text": price_text.get_text(strip=True) if price_text else None,
+        }
+
+    def _parse_canon_product_images(self, soup: "BeautifulSoup", base_url: str) -> List[Dict[str, Any]]:
         """
         Extract product image URLs from a Canon shop product page.
 
         Returns images[] shaped like:
         [{"url": "...", "kind": "primary|gallery|og", "sort_order": int?, "source": {...}, "raw_metadata": {...}}]
         """
+        return self._images_from_sources(self._page_sources(soup), base_url)
+
+    def _images_from_sources(self, sources: Dict[str, Any], base_url: str) -> List[Dict[str, Any]]:
         urls: List[str] = []
         primary_url: Optional[str] = None
 
@@ -214,60 +516,42 @@ class CanonCameraExtractor(BaseExtractor):
             _add(u2)
 
         # 0) Canon gallery placeholder (often the main/primary image)
-        placeholder = soup.select_one("img.gallery-placeholder__image")
-        if placeholder and placeholder.get("src"):
-            _set_primary(placeholder.get("src"))
+        if sources.get("placeholder"):
+            _set_primary(sources["placeholder"])
 
         # 0b) Active fotorama stage frame (sometimes exposes href to the primary image)
-        active = soup.select_one(".fotorama__stage__frame.fotorama__active")
-        if active is not None:
-            if active.get("href"):
-                _set_primary(active.get("href"))
-            else:
-                active_img = active.select_one("img.fotorama__img")
-                if active_img and active_img.get("src"):
-                    _set_primary(active_img.get("src"))
+        if sources.get("active_href"):
+            _set_primary(sources["active_href"])
+        elif sources.get("active_img"):
+            _set_primary(sources["active_img"])
 
         # 1) og:image (usually primary)
-        og = soup.find("meta", attrs={"property": "og:image"})
-        if og and og.get("content"):
+        og_image = sources.get("og_image")
+        if og_image:
             if primary_url is None:
-                _set_primary(og.get("content"))
+                _set_primary(og_image)
             else:
-                _add(og.get("content"))
+                _add(og_image)
 
         # 2) JSON-LD Product.image (often primary)
-        for s in soup.find_all("script", attrs={"type": "application/ld+json"}):
-            txt = (s.string or s.get_text() or "").strip()
-            if not txt:
-                continue
-            try:
-                data = json.loads(txt)
-            except Exception:
-                continue
-
-            nodes = data if isinstance(data, list) else [data]
-            for node in nodes:
-                if not isinstance(node, dict):
-                    continue
-                img = node.get("image")
-                if isinstance(img, str):
-                    if primary_url is None:
-                        _set_primary(img)
-                    else:
-                        _add(img)
-                elif isinstance(img, list):
-                    for x in img:
-                        if isinstance(x, str):
-                            _add(x)
+        for node in _ld_json_nodes(sources.get("ld_json") or []):
+            img = node.get("image")
+            if isinstance(img, str):
+                if primary_url is None:
+                    _set_primary(img)
+                else:
+                    _add(img)
+            elif isinstance(img, list):
+                for x in img:
+                    if isinstance(x, str):
+                        _add(x)
 
         # 3) Fotorama gallery frames (usually full gallery)
-        for img in soup.select(".fotorama__stage__frame img.fotorama__img"):
-            _add(img.get("src"))
+        for src in sources.get("fotorama") or []:
+            _add(src)
 
         # 4) Any explicit <img> tags pointing at scene7 canon assets (fallback)
-        for img in soup.find_all("img", src=True):
-            src = img.get("src") or ""
+        for src in sources.get("img_srcs") or []:
             if "s7d1.scene7.com" in src and "/is/image/canon/" in src:
                 _add(src)
 
@@ -285,13 +569,16 @@ class CanonCameraExtractor(BaseExtractor):
             )
         return out
 
-    def _parse_canon_msrp_usd(self, soup: BeautifulSoup) -> Optional[float]:
+    def _parse_canon_msrp_usd(self, soup: "BeautifulSoup") -> Optional[float]:
         """
         Best-effort MSRP/price extraction from Canon shop HTML.
 
         Preferred source: JSON-LD (Product/Offer.price).
         Fallback: price-box DOM (data-price-amount).
         """
+        return self._msrp_from_sources(self._page_sources(soup))
+
+    def _msrp_from_sources(self, sources: Dict[str, Any]) -> Optional[float]:
 
         def _as_float(v: Any) -> Optional[float]:
             if v is None:
@@ -311,52 +598,47 @@ class CanonCameraExtractor(BaseExtractor):
             return None
 
         # 1) JSON-LD
-        for s in soup.find_all("script", attrs={"type": "application/ld+json"}):
-            txt = (s.string or s.get_text() or "").strip()
-            if not txt:
-                continue
-            try:
-                data = json.loads(txt)
-            except Exception:
-                continue
-
-            nodes = data if isinstance(data, list) else [data]
-            for node in nodes:
-                if not isinstance(node, dict):
-                    continue
-
-                offers = node.get("offers")
-                offer_nodes: List[Dict[str, Any]] = []
-                if isinstance(offers, dict):
-                    offer_nodes = [offers]
-                elif isinstance(offers, list):
-                    offer_nodes = [o for o in offers if isinstance(o, dict)]
-
-                for offer in offer_nodes:
-                    currency = (offer.get("priceCurrency") or "").strip().upper()
-                    price = _as_float(offer.get("price"))
-                    if price is not None and (not currency or currency == "USD"):
-                        return price
-
-                # Some pages put "price" at the top-level node
-                price = _as_float(node.get("price"))
-                if price is not None:
+        for node in _ld_json_nodes(sources.get("ld_json") or []):
+            offers = node.get("offers")
+            offer_nodes: List[Dict[str, Any]] = []
+            if isinstance(offers, dict):
+                offer_nodes = [offers]
+            elif isinstance(offers, list):
+                offer_nodes = [o for o in offers if isinstance(o, dict)]
+
+            for offer in offer_nodes:
+                currency = (offer.get("priceCurrency") or "").strip().upper()
+                price = _as_float(offer.get("price"))
+                if price is not None and (not currency or currency == "USD"):
                     return price
 
+            # Some pages put "price" at the top-level node
+            price = _as_float(node.get("price"))
+            if price is not None:
+                return price
+
         # 2) DOM: Magento price box (avoid cart subtotal "$0.00")
-        price_span = soup.select_one(
-            ".product-info-price .price-box [data-price-type='finalPrice'][data-price-amount]"
-        )
-        if price_span and price_span.get("data-price-amount"):
-            return _as_float(price_span.get("data-price-amount"))
+        if sources.get("price_amount"):
+            return _as_float(sources["price_amount"])
 
         # 3) DOM fallback: any visible product-info-price .price text
-        price_text = soup.select_one(".product-info-price .price-box .price")
-        if price_text:
-            return _as_float(price_text.get_text(strip=True))
+        if sources.get("price_text") is not None:
+            return _as_float(sources["price_text"])
 
         return None
 
+    def _parse_html(self, html: str, base_url: str) -> Dict[str, Any]:
+        """manufacturer_sections/images/msrp_usd of one page's HTML (the part the parse cache stores)."""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "html.parser")
+        sources = self._page_sources(soup)
+        return {
+            "manufacturer_sections": self._parse_canon_tech_specs(soup, base_url=base_url),
+            "images": self._images_from_sources(sources, base_url=base_url),
+            "msrp_usd": self._msrp_from_sources(sources),
+        }
+
     def _compute_completeness(self, manufacturer_sections: List[Dict[str, Any]], errors: List[str]) -> Dict[str, Any]:
         total_sections = len(manufacturer_sections)
         total_attributes = 0
@@ -399,49 +681,104 @@ class CanonCameraExtractor(BaseExtractor):
             urls = urls[: self.config.max_products]
 
         items: List[Dict[str, Any]] = []
+        self._limiter = self._make_limiter()
+        parse_cache: Optional[ContentCache] = None
+        if self.config.parse_cache_dir:
+            parse_cache = ContentCache(self.config.parse_cache_dir, self.parser_version()).open()
+
+        journal = CheckpointJournal(
+            self.config.checkpoint_path or default_checkpoint_path(self.config.output_path),
+            stage="extraction",
+            resume=self.config.resume,
+        )
+        done = completed_items(journal.open())
+        resumed = 0
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=self.config.headless,
-                args=[
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                ],
-            )
-            page = browser.new_page()
-            page.set_viewport_size({"width": 1920, "height": 1080})
-            page.set_extra_http_headers(
-                {
-                    "User-Agent": (
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    ),
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Upgrade-Insecure-Requests": "1",
-                }
-            )
+        # (archive write, url, item) waiting for their raw HTML to land before being journaled
+        pending: List[Tuple["Future[str]", str, Dict[str, Any]]] = []
+
+        def _journal_archived(wait: bool = False) -> None:
+            # An item is checkpointed only once its raw_html_path exists, so a resumed run never
+            # reuses a path to a file that was never written.
+            while pending and (wait or pending[0][0].done()):
+                future, url, item = pending.pop(0)
+                try:
+                    item["raw_html_path"] = future.result()
+                except Exception as e:
+                    logger.warning("Failed to archive raw HTML for %s: %s", url, e)
+                    item["raw_html_path"] = None
+                with self._metrics.phase("checkpoint"):
+                    journal.append({"type": "item", "url": url, "item": item})
+
+        def _record(url: str, item: Dict[str, Any], archive: Optional["Future[str]"] = None) -> None:
+            items.append(item)
+            if archive is not None:
+                pending.append((archive, url, item))
+            else:
+                with self._metrics.phase("checkpoint"):
+                    journal.append({"type": "item", "url": url, "item": item})
+            _journal_archived()
+
+        session = get_session(self.config.headless, self.config.browser_profile_dir)
+        with ExitStack() as stack:
+            page = None
+
+            def _page():
+                # Borrowed lazily: cache-only and fully resumed runs never touch the browser.
+                nonlocal page
+                if page is None:
+                    page = stack.enter_context(session.page())
+                return page
+
+            if self.config.in_page_extraction:
+                # Shut down (waiting for queued writes) when the stack unwinds, before extract() returns.
+                self._archiver = stack.enter_context(ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-html"))
 
             try:
                 for idx, url in enumerate(urls, start=1):
-                    slug = _slug_from_url(url)
-                    logger.info("Extracting (%s/%s): %s", idx, len(urls), url)
-
-                    # Prefer cached HTML (if provided)
-                    cached_html, cached_path, cache_err = self._read_cached_html(slug)
-                    if cached_html is not None:
-                        html, err = cached_html, None
-                        raw_html_path = cached_path
-                    else:
-                        if self.config.cache_only and self.config.html_cache_dir:
-                            errors = [cache_err or "cache_miss"]
-                            items.append(
+                    if url in done:
+                        items.append(done[url])
+                        resumed += 1
+                        continue
+
+                    with self._metrics.url(url):
+                        slug = _slug_from_url(url)
+                        logger.info("Extracting (%s/%s): %s", idx, len(urls), url)
+
+                        # Prefer cached HTML (if provided)
+                        with self._metrics.phase("cache_read"):
+                            cached_html, cached_path, cache_err = self._read_cached_html(slug)
+                        facts = None
+                        if cached_html is not None:
+                            html, err = cached_html, None
+                            raw_html_path = cached_path
+                        else:
+                            if self.config.cache_only and self.config.html_cache_dir:
+                                errors = [cache_err or "cache_miss"]
+                                _record(
+                                    url,
+                                    {
+                                        "product_url": url,
+                                        "product_slug": slug,
+                                        "raw_html_path": cached_path,
+                                        "manufacturer_sections": [],
+                                        "errors": errors,
+                                        "completeness": self._compute_completeness([], errors),
+                                        "scraped_at": _utc_now_iso(),
+                                    }
+                                )
+                                continue
+
+                            html, facts, err = self._fetch_page(_page(), url)
+                            raw_html_path = None
+                        if err or (html is None and facts is None):
+                            errors = [err or "unknown_error"]
+                            _record(
+                                url,
                                 {
                                     "product_url": url,
                                     "product_slug": slug,
-                                    "raw_html_path": cached_path,
+                                    "raw_html_path": None,
                                     "manufacturer_sections": [],
                                     "errors": errors,
                                     "completeness": self._compute_completeness([], errors),
@@ -450,65 +787,172 @@ class CanonCameraExtractor(BaseExtractor):
                             )
                             continue
 
-                        html, err = self._fetch_page_html(page, url)
-                        raw_html_path = None
-                    if err or html is None:
-                        errors = [err or "unknown_error"]
-                        items.append(
+                        # If we fetched from web, save an artifact copy; if using cache, keep cached_path.
+                        archive = None
+                        if raw_html_path is None and html is not None:
+                            with self._metrics.phase("save_html"):
+                                if self._archiver is not None:
+                                    # raw_html_path is filled in once the write has landed
+                                    archive = self._archive_raw_html(slug, html)
+                                else:
+                                    raw_html_path = self._save_raw_html(slug, html)
+                        if facts is not None:
+                            with self._metrics.phase("parse"):
+                                sources = facts["sources"]
+                                parsed = {
+                                    "manufacturer_sections": self._sections_from_page(facts["tech_specs"], base_url=url),
+                                    "images": self._images_from_sources(sources, base_url=url),
+                                    "msrp_usd": self._msrp_from_sources(sources),
+                                }
+                        else:
+                            parsed = None
+                            if parse_cache is not None:
+                                with self._metrics.phase("parse_cache"):
+                                    key = _html_key(html, url)
+                                    parsed = parse_cache.get(key)
+                                self._metrics.add("parse_cache_hits" if parsed is not None else "parse_cache_misses")
+                            if parsed is None:
+                                with self._metrics.phase("parse"):
+                                    parsed = self._parse_html(html, url)
+                                if parse_cache is not None:
+                                    with self._metrics.phase("parse_cache"):
+                                        parse_cache.put(key, parsed)
+                        manufacturer_sections = parsed["manufacturer_sections"]
+                        images = parsed["images"]
+                        msrp_usd = parsed["msrp_usd"]
+                        errors: List[str] = []
+
+                        _record(
+                            url,
                             {
                                 "product_url": url,
                                 "product_slug": slug,
-                                "raw_html_path": None,
-                                "manufacturer_sections": [],
+                                "raw_html_path": raw_html_path,
+                                "manufacturer_sections": manufacturer_sections,
+                                "images": images,
+                                "msrp_usd": msrp_usd,
                                 "errors": errors,
-                                "completeness": self._compute_completeness([], errors),
+                                "completeness": self._compute_completeness(manufacturer_sections, errors),
                                 "scraped_at": _utc_now_iso(),
-                            }
+                            },
+                            archive,
                         )
-                        continue
 
-                    # If we fetched from web, save an artifact copy; if using cache, keep cached_path.
-                    if raw_html_path is None:
-                        raw_html_path = self._save_raw_html(slug, html)
-                    soup = BeautifulSoup(html, "html.parser")
-                    manufacturer_sections = self._parse_canon_tech_specs(soup, base_url=url)
-                    images = self._parse_canon_product_images(soup, base_url=url)
-                    msrp_usd = self._parse_canon_msrp_usd(soup)
-                    errors: List[str] = []
-
-                    items.append(
-                        {
-                            "product_url": url,
-                            "product_slug": slug,
-                            "raw_html_path": raw_html_path,
-                            "manufacturer_sections": manufacturer_sections,
-                            "images": images,
-                            "msrp_usd": msrp_usd,
-                            "errors": errors,
-                            "completeness": self._compute_completeness(manufacturer_sections, errors),
-                            "scraped_at": _utc_now_iso(),
-                        }
-                    )
-
-                    if idx % self.config.long_break_every == 0:
-                        self._random_delay(is_long_break=True)
-                    else:
-                        self._random_delay()
+                        # With adaptive pacing, spacing is enforced before the next navigation instead.
+                        if self._limiter is None:
+                            if idx % self.config.long_break_every == 0:
+                                self._random_delay(is_long_break=True)
+                            else:
+                                self._random_delay()
             finally:
-                browser.close()
+                _journal_archived(wait=True)
+                journal.close()
+                self._archiver = None
 
-        return {
+        if resumed:
+            logger.info("Reused %s items from checkpoint %s", resumed, journal.path)
+        journal.finish()
+
+        payload: Dict[str, Any] = {
             "brand": self.config.brand_slug,
             "product_type": self.config.product_type,
             "generated_at": _utc_now_iso(),
             "total_items": len(items),
             "items": items,
         }
+        stats: Dict[str, Any] = {}
+        if self._limiter is not None:
+            stats["pacing"] = self._limiter.snapshot()
+        if parse_cache is not None:
+            stats["parse_cache"] = parse_cache.snapshot()
+            logger.info(
+                "Parse cache: %s hits, %s misses (hit rate %s, parser %s)",
+                parse_cache.hits,
+                parse_cache.misses,
+                stats["parse_cache"]["hit_rate"],
+                parse_cache.version,
+            )
+        if stats:
+            payload["stats"] = stats
+        return payload
 
 
 def extract(config: ExtractionConfig, product_urls: List[str]) -> Dict[str, Any]:
     brand = (config.brand_slug or "").lower()
     if brand == "canon" and config.product_type in {"camera", "lens"}:
-        return CanonCameraExtractor(config).extract(product_urls)
+        metrics = start_stage("extraction", brand=config.brand_slug, product_type=config.product_type)
+        try:
+            return CanonCameraExtractor(config, metrics).extract(product_urls)
+        finally:
+            metrics.finish()
     raise ValueError(f"No extractor implementation for brand={config.brand_slug} product_type={config.product_type}")
 
+
+def extract_inventory(
+    config: ExtractionConfig,
+    inventory: Dict[str, Any],
+    previous_payload: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract the URLs of a discovery inventory.
+
+    With config.incremental, an inventory `diff` and a previous extraction payload, only URLs
+    that were added/changed (or have no clean previous item) are fetched; every other item is
+    carried over from `previous_payload`, and items for URLs no longer in the inventory drop out.
+    With config.work_list_path the fetched URLs are the work list's instead.
+    """
+    urls: List[str] = list(inventory.get("urls", []) or [])
+    diff = inventory.get("diff")
+    work_list = None
+    if config.work_list_path:
+        work_list = json.loads(Path(config.work_list_path).read_text(encoding="utf-8"))
+        if not previous_payload:
+            # Nothing to carry over: extract the scheduled URLs only.
+            return extract(config, list(work_list.get("urls", []) or []))
+    if work_list is None and not (config.incremental and diff is not None and previous_payload):
+        return extract(config, urls)
+
+    previous_items: Dict[str, Dict[str, Any]] = {
+        it["product_url"]: it for it in previous_payload.get("items", []) or [] if it.get("product_url")
+    }
+    if work_list is not None:
+        scheduled = set(work_list.get("urls", []) or [])
+        todo = [u for u in urls if _normalize_url(u) in scheduled]
+        logger.info("Scheduled refresh: %s of %s URLs to fetch (work list %s)", len(todo), len(urls), config.work_list_path)
+    else:
+        wanted = set(diff.get("added") or []) | set(diff.get("changed") or [])
+        todo = [
+            u for u in urls
+            if u in wanted or u not in previous_items or previous_items[u].get("errors")
+        ]
+        logger.info(
+            "Incremental extraction: %s of %s URLs to fetch (%s added, %s changed)",
+            len(todo), len(urls), len(diff.get("added") or []), len(diff.get("changed") or []),
+        )
+
+    if todo:
+        payload = extract(config, todo)
+    else:
+        payload = {
+            "brand": config.brand_slug,
+            "product_type": config.product_type,
+            "generated_at": _utc_now_iso(),
+            "items": [],
+        }
+
+    fresh_items = {it["product_url"]: it for it in payload.get("items", []) if it.get("product_url")}
+    items: List[Dict[str, Any]] = []
+    for u in urls:
+        item = fresh_items.get(u) or previous_items.get(u)
+        if item is not None:
+            items.append(item)
+
+    url_set = set(urls)
+    payload["items"] = items
+    payload["total_items"] = len(items)
+    payload["incremental"] = {
+        "fetched": len(fresh_items),
+        "reused": len(items) - len([u for u in urls if u in fresh_items]),
+        "dropped": len([u for u in previous_items if u not in url_set]),
+    }
+    return payload
@@ -0,0 +1,244 @@
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from psycopg2.extras import Json, execute_values
+
+logger = logging.getLogger(__name__)
+
+TASK_EXTRACT = "extract"
+TASK_NORMALIZE = "normalize"
+TASKS = [TASK_EXTRACT, TASK_NORMALIZE]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Job:
+    id: int
+    brand_slug: str
+    product_type: str
+    task: str
+    product_url: str
+    attempts: int
+    max_attempts: int
+
+    @property
+    def exhausted(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+def enqueue_urls(
+    conn,
+    brand_slug: str,
+    product_type: str,
+    urls: Iterable[str],
+    task: str = TASK_EXTRACT,
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> int:
+    """
+    Queue one `task` job per URL. Finished (done/failed) jobs for the same URL are reset to
+    pending; pending/running ones are left alone. Returns the number of rows queued or reset.
+    """
+    rows = [(brand_slug, product_type, task, url, priority, max_attempts) for url in dict.fromkeys(urls) if url]
+    if not rows:
+        return 0
+    with conn.cursor() as cur:
+        queued = execute_values(
+            cur,
+            """
+            INSERT INTO pipeline_job (brand_slug, product_type, task, product_url, priority, max_attempts)
+            VALUES %s
+            ON CONFLICT (brand_slug, product_type, task, product_url) DO UPDATE SET
+                status = 'pending',
+                priority = EXCLUDED.priority,
+                max_attempts = EXCLUDED.max_attempts,
+                attempts = 0,
+                run_after = NOW(),
+                last_error = NULL,
+                updated_at = NOW()
+            WHERE pipeline_job.status IN ('done', 'failed')
+            RETURNING id
+            """,
+            rows,
+            page_size=500,
+            fetch=True,
+        )
+    conn.commit()
+    return len(queued)
+
+
+def claim_batch(
+    conn,
+    brand_slug: str,
+    product_type: str,
+    task: str,
+    worker_id: str,
+    limit: int = 10,
+    lease_seconds: int = 1800,
+) -> List[Job]:
+    """
+    Claim up to `limit` due jobs for this worker and mark them running under a lease.
+
+    Rows are picked with FOR UPDATE SKIP LOCKED, so concurrent workers never claim the same
+    job and never block on each other. Running jobs whose lease expired (the worker died) are
+    claimable again; those that already used every attempt are marked failed instead.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE pipeline_job
+            SET status = 'failed',
+                last_error = COALESCE(last_error, 'lease expired'),
+                finished_at = NOW(),
+                updated_at = NOW()
+            WHERE brand_slug = %s AND product_type = %s AND task = %s
+              AND status = 'running' AND lease_expires_at < NOW()
+              AND attempts >= max_attempts
+            """,
+            (brand_slug, product_type, task),
+        )
+        if cur.rowcount:
+            logger.warning("Marked %s %s job(s) failed after their last lease expired", cur.rowcount, task)
+
+        cur.execute(
+            """
+            WITH picked AS (
+                SELECT id
+                FROM pipeline_job
+                WHERE brand_slug = %s AND product_type = %s AND task = %s
+                  AND (
+                    (status = 'pending' AND run_after <= NOW())
+                    OR (status = 'running' AND lease_expires_at < NOW())
+                  )
+                ORDER BY priority DESC, run_after, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE pipeline_job j
+            SET status = 'running',
+                attempts = j.attempts + 1,
+                claimed_by = %s,
+                claimed_at = NOW(),
+                lease_expires_at = NOW() + %s * INTERVAL '1 second',
+                updated_at = NOW()
+            FROM picked
+            WHERE j.id = picked.id
+            RETURNING j.id, j.brand_slug, j.product_type, j.task, j.product_url, j.attempts, j.max_attempts
+            """,
+            (brand_slug, product_type, task, limit, worker_id, lease_seconds),
+        )
+        jobs = [Job(*row) for row in cur.fetchall()]
+    conn.commit()
+    return sorted(jobs, key=lambda j: j.id)
+
+
+def complete(conn, job: Job, result: Dict[str, Any], worker_id: str) -> bool:
+    """
+    Store the result and mark the job done. Returns False when this worker no longer holds the
+    job (its lease expired and another worker claimed it); the result is dropped then.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE pipeline_job
+            SET status = 'done', result = %s, last_error = NULL,
+                lease_expires_at = NULL, finished_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND status = 'running' AND claimed_by = %s
+            """,
+            (Json(result), job.id, worker_id),
+        )
+        owned = cur.rowcount == 1
+    conn.commit()
+    if not owned:
+        logger.warning("Job %s (%s) was reclaimed by another worker; dropping result", job.id, job.product_url)
+    return owned
+
+
+def fail(
+    conn,
+    job: Job,
+    error: str,
+    worker_id: str,
+    result: Optional[Dict[str, Any]] = None,
+    retry_base_seconds: int = 60,
+) -> bool:
+    """
+    Record a failed attempt. The job goes back to pending after an exponential backoff
+    (retry_base_seconds * 2^(attempts-1)) until max_attempts is used up, then stays failed.
+    `result` (e.g. the error item) is kept either way so exports still see the URL.
+    """
+    status = "failed" if job.exhausted else "pending"
+    backoff = retry_base_seconds * 2 ** max(job.attempts - 1, 0)
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE pipeline_job
+            SET status = %s, last_error = %s, result = COALESCE(%s, result),
+                run_after = NOW() + %s * INTERVAL '1 second',
+                lease_expires_at = NULL,
+                finished_at = CASE WHEN %s = 'failed' THEN NOW() ELSE NULL END,
+                updated_at = NOW()
+            WHERE id = %s AND status = 'running' AND claimed_by = %s
+            """,
+            (status, error, Json(result) if result is not None else None, backoff, status, job.id, worker_id),
+        )
+        owned = cur.rowcount == 1
+    conn.commit()
+    return owned
+
+
+def job_results(conn, brand_slug: str, product_type: str, task: str) -> List[Dict[str, Any]]:
+    """Stored results of finished jobs (done, or failed with an error item), oldest job first."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT result
+            FROM pipeline_job
+            WHERE brand_slug = %s AND product_type = %s AND task = %s
+              AND status IN ('done', 'failed') AND result IS NOT NULL
+            ORDER BY id
+            """,
+            (brand_slug, product_type, task),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def results_by_url(conn, brand_slug: str, product_type: str, task: str, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """{product_url: result} of finished `task` jobs for the given URLs (e.g. extraction items to normalize)."""
+    if not urls:
+        return {}
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT product_url, result
+            FROM pipeline_job
+            WHERE brand_slug = %s AND product_type = %s AND task = %s
+              AND product_url = ANY(%s) AND result IS NOT NULL
+            """,
+            (brand_slug, product_type, task, list(urls)),
+        )
+        return {url: result for url, result in cur.fetchall()}
+
+
+def queue_counts(conn, brand_slug: str, product_type: str) -> Dict[str, Dict[str, int]]:
+    """{task: {status: count}} for one plugin."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT task, status, COUNT(*)
+            FROM pipeline_job
+            WHERE brand_slug = %s AND product_type = %s
+            GROUP BY task, status
+            """,
+            (brand_slug, product_type),
+        )
+        counts: Dict[str, Dict[str, int]] = {}
+        for task, status, n in cur.fetchall():
+            counts.setdefault(task, {})[status] = int(n)
+    return counts
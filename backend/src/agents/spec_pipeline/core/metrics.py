@@ -0,0 +1,236 @@
+import json
+import logging
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far (None where getrusage isn't available)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class StageMetrics:
+    """
+    Wall time per phase and per URL, plus counters, for one pipeline stage run.
+
+    Phases nest and are recorded as *self* time: a "db" phase inside "map" is subtracted
+    from "map", so phase seconds add up to (at most) the stage wall time and show where the
+    time actually went. Time outside any phase is reported as "other".
+
+    - `phase(name)`: time a block (fetch, parse, map, table_normalize, db, ...)
+    - `url(url)`: time one unit of work; phases inside it are also attributed to that URL
+    - `add(counter, n)`: bytes_fetched, db_round_trips, urls, ...
+    """
+
+    def __init__(self, stage: str, **labels: str):
+        self.stage = stage
+        self.labels = {k: str(v) for k, v in labels.items() if v is not None}
+        self.started_at = _utc_now_iso()
+        self._t0 = time.perf_counter()
+        self._wall: Optional[float] = None
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.urls: List[Dict[str, Any]] = []
+        # [name, start, child_seconds]
+        self._stack: List[List[Any]] = []
+        self._url: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            own = elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+            p = self.phases.get(name)
+            if p is None:
+                p = self.phases[name] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+            p["count"] += 1
+            p["seconds"] += own
+            if own > p["max_seconds"]:
+                p["max_seconds"] = own
+            if self._url is not None:
+                url_phases = self._url["phases"]
+                url_phases[name] = url_phases.get(name, 0.0) + own
+
+    @contextmanager
+    def url(self, url: str) -> Iterator[Dict[str, Any]]:
+        """Times one URL; the yielded dict takes extra fields (status, bytes, cached, ...)."""
+        record: Dict[str, Any] = {"url": url, "phases": {}}
+        outer, self._url = self._url, record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            record["phases"] = {k: round(v, 4) for k, v in record["phases"].items()}
+            self.urls.append(record)
+            self._url = outer
+            self.add("urls")
+
+    def add(self, counter: str, n: float = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + n
+        if self._url is not None and counter != "urls":
+            self._url[counter] = self._url.get(counter, 0) + n
+
+    def finish(self) -> Dict[str, Any]:
+        if self._wall is None:
+            self._wall = time.perf_counter() - self._t0
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        wall = self._wall if self._wall is not None else time.perf_counter() - self._t0
+        phases = {
+            name: {"count": int(p["count"]), "seconds": round(p["seconds"], 4), "max_seconds": round(p["max_seconds"], 4)}
+            for name, p in sorted(self.phases.items(), key=lambda kv: -kv[1]["seconds"])
+        }
+        in_phases = sum(p["seconds"] for p in self.phases.values())
+        phases["other"] = {"count": 1, "seconds": round(max(0.0, wall - in_phases), 4), "max_seconds": None}
+
+        url_seconds = sorted(u["seconds"] for u in self.urls)
+        return {
+            "stage": self.stage,
+            "labels": self.labels,
+            "started_at": self.started_at,
+            "wall_seconds": round(wall, 4),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "counters": dict(self.counters),
+            "phases": phases,
+            "url_seconds": {
+                "count": len(url_seconds),
+                "p50": url_seconds[len(url_seconds) // 2] if url_seconds else None,
+                "p95": url_seconds[min(len(url_seconds) - 1, int(len(url_seconds) * 0.95))] if url_seconds else None,
+                "max": url_seconds[-1] if url_seconds else None,
+            },
+            "urls": self.urls,
+        }
+
+
+# Stage runs of this process, in order; run.py writes them out at the end.
+_RUNS: List[StageMetrics] = []
+
+
+def start_stage(stage: str, **labels: str) -> StageMetrics:
+    metrics = StageMetrics(stage, **labels)
+    _RUNS.append(metrics)
+    return metrics
+
+
+def collected_metrics() -> List[Dict[str, Any]]:
+    return [m.snapshot() for m in _RUNS]
+
+
+def reset_metrics() -> None:
+    _RUNS.clear()
+
+
+def counting_cursor_factory(metrics: StageMetrics):
+    """
+    psycopg2 cursor class that counts DB round trips and times them as the "db" phase.
+
+    Pass as `psycopg2.connect(..., cursor_factory=counting_cursor_factory(metrics))`.
+    executemany counts one round trip per parameter set, which is what psycopg2 sends.
+    """
+    from psycopg2.extensions import cursor as _cursor
+
+    class CountingCursor(_cursor):
+        def execute(self, query, vars=None):
+            metrics.add("db_round_trips")
+            with metrics.phase("db"):
+                return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            vars_list = list(vars_list)
+            metrics.add("db_round_trips", len(vars_list))
+            with metrics.phase("db"):
+                return super().executemany(query, vars_list)
+
+    return CountingCursor
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+_METRIC_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _om_labels(labels: Dict[str, str]) -> str:
+    def esc(v: str) -> str:
+        return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def to_openmetrics(snapshots: List[Dict[str, Any]], prefix: str = "spec_pipeline") -> str:
+    """OpenMetrics text exposition of stage snapshots (gauges; per-URL detail stays in the JSON)."""
+    families: Dict[str, List[str]] = {}
+
+    def sample(name: str, labels: Dict[str, str], value: Any) -> None:
+        if value is None:
+            return
+        families.setdefault(name, []).append(f"{prefix}_{name}{_om_labels(labels)} {float(value)}")
+
+    for snap in snapshots:
+        base = {"stage": snap["stage"], **snap.get("labels", {})}
+        sample("stage_wall_seconds", base, snap["wall_seconds"])
+        sample("peak_rss_bytes", base, snap.get("peak_rss_bytes"))
+        for name, p in snap["phases"].items():
+            labels = {**base, "phase": name}
+            sample("phase_seconds", labels, p["seconds"])
+            sample("phase_count", labels, p["count"])
+        for counter, value in snap["counters"].items():
+            sample(_METRIC_NAME_RE.sub("_", counter), base, value)
+        for q in ("p50", "p95", "max"):
+            sample("url_seconds", {**base, "stat": q}, snap["url_seconds"].get(q))
+
+    lines: List[str] = []
+    for name, samples in families.items():
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        lines.extend(samples)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str, openmetrics_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Write every stage run of this process to `path` (JSON) and optionally OpenMetrics text."""
+    snapshots = collected_metrics()
+    if not snapshots:
+        return None
+    payload = {"generated_at": _utc_now_iso(), "stages": snapshots}
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    logger.info("Wrote run metrics: %s", out)
+    if openmetrics_path:
+        om = Path(openmetrics_path)
+        om.parent.mkdir(parents=True, exist_ok=True)
+        om.write_text(to_openmetrics(snapshots), encoding="utf-8")
+        logger.info("Wrote OpenMetrics: %s", om)
+    return payload
@@ -1,22 +1,31 @@
+import hashlib
 import json
-import re
+import logging
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-import psycopg2
-
+from agents.spec_pipeline.core.content_cache import ContentCache, version_hash
 from agents.spec_pipeline.core.extraction import _normalize_url
-from agents.spec_pipeline.core.text_normalizer import clean_text_for_spec_value
+from agents.spec_pipeline.core.metrics import StageMetrics, counting_cursor_factory, start_stage
+from agents.spec_pipeline.core.text_normalizer import (
+    clean_label,
+    clean_text_for_spec_value,
+    label_group_key,
+)
 from agents.spec_pipeline.core.table_normalizer import (
     normalize_canon_playback_display_format_table,
     normalize_canon_still_file_size_table,
     normalize_canon_wifi_security_table,
 )
+from services.rule_cache import save_snapshot
 from services.spec_mapper import SpecMapperService
 
+logger = logging.getLogger(__name__)
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -30,21 +39,10 @@ def _clean_extracted_label(text: str) -> str:
     - remove obvious HTML artifacts (tags, stray <br/> remnants)
     - normalize whitespace/tab/newline noise
     - keep the meaning intact (do not over-normalize)
-    """
-    s = (text or "").replace("\u00a0", " ").strip()
-    if not s:
-        return ""
 
-    # Remove HTML tags that may leak through extraction
-    s = re.sub(r"<[^>]+>", " ", s)
-
-    # Canon pages sometimes leak weird artifacts like "@999br/>" into labels
-    s = re.sub(r"@\s*\d+\s*br\s*/?>", " ", s, flags=re.IGNORECASE)
-
-    # Normalize tabs/newlines and collapse whitespace
-    s = s.replace("\t", " ").replace("\r", " ").replace("\n", " ")
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    Shares the precompiled engine in text_normalizer (see `clean_label`).
+    """
+    return clean_label(text)
 
 
 def _normalize_label_for_grouping(label: str) -> str:
@@ -54,14 +52,7 @@ def _normalize_label_for_grouping(label: str) -> str:
     We keep this conservative: the goal is to group obvious variants
     (case/spacing/punctuation), not to merge distinct concepts.
     """
-    s = (label or "").strip().lower()
-    s = s.replace("\u00a0", " ")  # nbsp
-    s = s.rstrip(":")
-    # collapse whitespace
-    s = re.sub(r"\s+", " ", s)
-    # normalize some punctuation variants
-    s = s.replace("–", "-").replace("—", "-")
-    return s
+    return label_group_key(label)
 
 
 def build_unmapped_report(normalized_payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -155,204 +146,296 @@ def build_unmapped_report(normalized_payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _populate_parsed_values(mapper: SpecMapperService, normalized_items: List[Dict[str, Any]]) -> None:
+    """
+    Fill numeric_value/min_value/max_value/unit_used/boolean_value on every spec record,
+    plus the canonical_* columns converted into spec_definition.unit.
+
+    Records are grouped by spec_definition so each definition's values across the whole
+    catalog are parsed in one batch with that definition's compiled patterns.
+    """
+    records_by_def: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for it in normalized_items:
+        for rec in it.get("spec_records", []) or []:
+            records_by_def[rec["spec_definition_id"]].append(rec)
+
+    for def_id, recs in records_by_def.items():
+        columns = mapper.parse_values(def_id, [rec.get("raw_value") for rec in recs])
+        for col, values in columns.items():
+            for rec, v in zip(recs, values):
+                rec[col] = v
+
+
 @dataclass
 class NormalizationConfig:
     brand_slug: str
     product_type: str
     category_slug: Optional[str] = None
     output_path: str = "data/company_product/_normalized/normalized.json"
+    # Record per-rule evaluations/matches/regex time and write rule_profile_report.json
+    # next to unmapped_report.json.
+    profile_rules: bool = False
+    # On-disk spec_mapping/spec_definition snapshot; reused while the DB version stamp is unchanged.
+    rule_cache_path: Optional[str] = None
+    # Normalized items keyed by a hash of the extraction item, under a version fingerprinting the
+    # loaded ruleset (DB version stamp) and the normalization code; unchanged items are copied
+    # from here instead of being re-mapped. None disables it (so does profile_rules).
+    result_cache_dir: Optional[str] = "data/cache/normalize"
+    # Re-map only what changed since the last output at output_path: attributes whose label or
+    # section matches an added/changed/removed spec_mapping rule, and items whose extraction
+    # changed (see core/renormalize.py). Falls back to a full run when that can't be worked out.
+    targeted: bool = False
+
+
+# Bump for output changes the module hash in _normalizer_version() can't see.
+NORMALIZER_VERSION = 1
+
+# Modules whose code decides a normalized item, besides the ruleset.
+_NORMALIZER_MODULES = [
+    __name__,
+    "agents.spec_pipeline.core.text_normalizer",
+    "agents.spec_pipeline.core.table_normalizer",
+    "services.spec_mapper",
+    "services.spec_value_parser",
+    "services.unit_registry",
+]
+
+
+def _code_version() -> str:
+    """Fingerprint of the normalization code: NORMALIZER_VERSION plus the source of _NORMALIZER_MODULES."""
+    parts = [str(NORMALIZER_VERSION)]
+    for name in _NORMALIZER_MODULES:
+        path = getattr(sys.modules.get(name), "__file__", None)
+        try:
+            parts.append(Path(path).read_text(encoding="utf-8") if path else name)
+        except OSError:
+            parts.append(name)
+    return version_hash(*parts)
 
 
-def normalize_extractions(
-    config: NormalizationConfig,
-    extractions_json_path: str,
-    db_url: str,
+def _normalizer_version(mapper: SpecMapperService) -> Optional[str]:
+    """Result cache version, or None when the ruleset has no version stamp (nothing to key on)."""
+    if not mapper.rules_version:
+        return None
+    return version_hash(_code_version(), mapper.rules_version)
+
+
+def _item_key(config: NormalizationConfig, item: Dict[str, Any]) -> str:
+    """Hash of one extraction item plus the config fields copied into its output (scraped_at excluded)."""
+    content = {k: v for k, v in item.items() if k != "scraped_at"}
+    ident = [config.brand_slug, config.category_slug, config.product_type]
+    return hashlib.sha256(json.dumps([ident, content], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _unmapped_record(section_name: str, raw_key: str, raw_value: str, product_url: str) -> Dict[str, Any]:
+    return {
+        "section": section_name,
+        "label": raw_key,
+        "raw_value": raw_value,
+        "source": {
+            "type": "web",
+            "url": product_url,
+            "section": section_name,
+            "label": raw_key,
+        },
+    }
+
+
+def _spec_record(
+    mapper: SpecMapperService,
+    mapped: Dict[str, Any],
+    section_name: str,
+    raw_key: str,
+    raw_value: str,
+    product_url: str,
 ) -> Dict[str, Any]:
-    payload = json.loads(Path(extractions_json_path).read_text(encoding="utf-8"))
-    items = payload.get("items", [])
+    """spec_records[] entry for a map_spec(parse_value=False) match; typed fields are filled later."""
+    def_id = mapped["spec_definition_id"]
+    definition = mapper.definitions.get(def_id, {})
+    return {
+        "spec_definition_id": def_id,
+        "normalized_key": definition.get("normalized_key"),
+        # Preserve raw_value; clean spec_value for UI
+        "spec_value": clean_text_for_spec_value(mapped.get("value_text") or raw_value),
+        "raw_value": raw_value,
+        "numeric_value": mapped.get("numeric_value"),
+        "min_value": mapped.get("min_value"),
+        "max_value": mapped.get("max_value"),
+        "boolean_value": mapped.get("boolean_value"),
+        "unit_used": mapped.get("unit_used"),
+        "canonical_value": mapped.get("canonical_value"),
+        "canonical_min_value": mapped.get("canonical_min_value"),
+        "canonical_max_value": mapped.get("canonical_max_value"),
+        "canonical_unit": mapped.get("canonical_unit"),
+        "extraction_confidence": 0.9,
+        "source": {
+            "type": "web",
+            "url": product_url,
+            "section": section_name,
+            "label": raw_key,
+        },
+    }
 
-    conn = psycopg2.connect(db_url)
-    try:
-        mapper = SpecMapperService(conn)
-        normalized_items: List[Dict[str, Any]] = []
-        pdf_queue: List[Dict[str, Any]] = []
-
-        for item in items:
-            product_slug = item.get("product_slug")
-            product_url = _normalize_url(item.get("product_url", ""))
-            raw_html_path = item.get("raw_html_path")
-            extraction_errors = item.get("errors", []) or []
-            extraction_completeness = item.get("completeness", {}) or {}
-            msrp_usd = item.get("msrp_usd")
-
-            spec_records: List[Dict[str, Any]] = []
-            unmapped: List[Dict[str, Any]] = []
-            table_records: List[Dict[str, Any]] = []
-            documents: List[Dict[str, Any]] = []
-            matrix_records: List[Dict[str, Any]] = []
-            images: List[Dict[str, Any]] = []
-            primary_image_url: Optional[str] = None
-
-            for img in item.get("images", []) or []:
-                if not isinstance(img, dict):
-                    continue
-                url = (img.get("url") or "").strip()
-                if not url:
-                    continue
-                kind = img.get("kind")
-                if primary_image_url is None and kind == "primary":
-                    primary_image_url = _normalize_url(url)
-                images.append(
-                    {
-                        "url": _normalize_url(url),
-                        "kind": kind,
-                        "sort_order": img.get("sort_order"),
-                        "source": img.get("source") or {"type": "web", "url": product_url},
-                        "raw_metadata": img.get("raw_metadata") or {},
-                    }
-                )
-            if primary_image_url is None and images:
-                # fallback: first image in list
-                primary_image_url = images[0].get("url")
-
-            for section in item.get("manufacturer_sections", []) or []:
-                section_name_raw = section.get("section_name", "") or ""
-                section_name = _clean_extracted_label(section_name_raw)
-                for attr in section.get("attributes", []) or []:
-                    raw_key_raw = attr.get("raw_key", "") or ""
-                    raw_key = _clean_extracted_label(raw_key_raw)
-                    raw_value = attr.get("raw_value", "") or ""
-                    ctx = attr.get("context") or {}
-
-                    # Document handling: PDF links are assets, not specs
-                    if ctx.get("pdf_url"):
-                        documents.append(
-                            {
-                                "document_kind": "technical_specs_pdf",
-                                "url": ctx.get("pdf_url"),
-                                "source": {
-                                    "type": "web",
-                                    "url": product_url,
-                                    "section": section_name,
-                                    "label": raw_key,
-                                },
-                            }
-                        )
-                        continue
-
-                    # Table handling: defer to later matrix normalizer
-                    if raw_value == "[table]":
-                        table_rec = {
-                            "section": section_name,
-                            "label": raw_key,
-                            "raw_value": raw_value,
-                            "raw_value_jsonb": {
-                                "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
-                                "table_html": ctx.get("table_html"),
-                                "text_fallback": ctx.get("text_fallback"),
-                            },
-                        }
 
-                        # Attempt concrete table→matrix conversions (Canon tables we explicitly support).
-                        mapped_table = mapper.map_spec(raw_key=raw_key, raw_context=section_name, raw_value=raw_value)
-                        mapped_key = None
-                        if mapped_table:
-                            mapped_key = mapper.definitions.get(mapped_table["spec_definition_id"], {}).get("normalized_key")
-
-                        table_html = (ctx.get("table_html") or "")
-                        converted = False
-
-                        if mapped_key == "still_image_file_size_table":
-                            normalized = normalize_canon_still_file_size_table(table_html)
-                            matrix_records.append(
-                                {
-                                    "normalized_key": "still_image_file_size_table",
-                                    "spec_value": "See product_spec_matrix",
-                                    "raw_value": "HTML table: File Size (approx. MB) / possible shots / max burst",
-                                    "raw_value_jsonb": {
-                                        "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
-                                        "dims": normalized.get("dims"),
-                                        "value_fields": normalized.get("value_fields"),
-                                    },
-                                    "matrix_cells": normalized.get("cells", []),
-                                }
-                            )
-                            converted = True
-
-                        if mapped_key == "playback_display_format_table":
-                            normalized = normalize_canon_playback_display_format_table(table_html)
-                            matrix_records.append(
-                                {
-                                    "normalized_key": "playback_display_format_table",
-                                    "spec_value": "See product_spec_matrix",
-                                    "raw_value": "HTML table: Display Format (Still Photo vs Movie)",
-                                    "raw_value_jsonb": {
-                                        "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
-                                        "dims": normalized.get("dims"),
-                                        "value_fields": normalized.get("value_fields"),
-                                    },
-                                    "matrix_cells": normalized.get("cells", []),
-                                }
-                            )
-                            converted = True
-
-                        if mapped_key == "wifi_security_table":
-                            normalized = normalize_canon_wifi_security_table(table_html)
-                            matrix_records.append(
-                                {
-                                    "normalized_key": "wifi_security_table",
-                                    "spec_value": "See product_spec_matrix",
-                                    "raw_value": "HTML table: Wi-Fi Security (Authentication/Encryption)",
-                                    "raw_value_jsonb": {
-                                        "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
-                                        "dims": normalized.get("dims"),
-                                        "value_fields": normalized.get("value_fields"),
-                                    },
-                                    "matrix_cells": normalized.get("cells", []),
-                                }
-                            )
-                            converted = True
-
-                        table_rec["converted_to_matrix"] = converted
-
-                        table_records.append(
-                            {
-                                **table_rec
-                            }
-                        )
-                        continue
-
-                    mapped = mapper.map_spec(raw_key=raw_key, raw_context=section_name, raw_value=raw_value)
-                    if not mapped:
-                        unmapped.append(
-                            {
-                                "section": section_name,
-                                "label": raw_key,
-                                "raw_value": raw_value,
-                                "source": {
-                                    "type": "web",
-                                    "url": product_url,
-                                    "section": section_name,
-                                    "label": raw_key,
-                                },
-                            }
-                        )
-                        continue
-
-                    def_id = mapped["spec_definition_id"]
-                    definition = mapper.definitions.get(def_id, {})
-
-                    spec_records.append(
+def _table_record(
+    mapper: SpecMapperService,
+    section_name: str,
+    raw_key: str,
+    raw_value: str,
+    ctx: Dict[str, Any],
+    product_url: str,
+    matrix_records: List[Dict[str, Any]],
+    metrics: StageMetrics,
+) -> Dict[str, Any]:
+    """table_records[] entry for a "[table]" attribute; supported tables also add a matrix record."""
+    table_rec = {
+        "section": section_name,
+        "label": raw_key,
+        "raw_value": raw_value,
+        "raw_value_jsonb": {
+            "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
+            "table_html": ctx.get("table_html"),
+            "text_fallback": ctx.get("text_fallback"),
+        },
+    }
+
+    # Attempt concrete table→matrix conversions (Canon tables we explicitly support).
+    mapped_table = mapper.map_spec(
+        raw_key=raw_key,
+        raw_context=section_name,
+        raw_value=raw_value,
+        parse_value=False,
+    )
+    mapped_key = None
+    if mapped_table:
+        mapped_key = mapper.definitions.get(mapped_table["spec_definition_id"], {}).get("normalized_key")
+
+    table_html = (ctx.get("table_html") or "")
+    converted = False
+
+    if mapped_key == "still_image_file_size_table":
+        with metrics.phase("table_normalize"):
+            normalized = normalize_canon_still_file_size_table(table_html)
+        matrix_records.append(
+            {
+                "normalized_key": "still_image_file_size_table",
+                "spec_value": "See product_spec_matrix",
+                "raw_value": "HTML table: File Size (approx. MB) / possible shots / max burst",
+                "raw_value_jsonb": {
+                    "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
+                    "dims": normalized.get("dims"),
+                    "value_fields": normalized.get("value_fields"),
+                },
+                "matrix_cells": normalized.get("cells", []),
+            }
+        )
+        converted = True
+
+    if mapped_key == "playback_display_format_table":
+        with metrics.phase("table_normalize"):
+            normalized = normalize_canon_playback_display_format_table(table_html)
+        matrix_records.append(
+            {
+                "normalized_key": "playback_display_format_table",
+                "spec_value": "See product_spec_matrix",
+                "raw_value": "HTML table: Display Format (Still Photo vs Movie)",
+                "raw_value_jsonb": {
+                    "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
+                    "dims": normalized.get("dims"),
+                    "value_fields": normalized.get("value_fields"),
+                },
+                "matrix_cells": normalized.get("cells", []),
+            }
+        )
+        converted = True
+
+    if mapped_key == "wifi_security_table":
+        with metrics.phase("table_normalize"):
+            normalized = normalize_canon_wifi_security_table(table_html)
+        matrix_records.append(
+            {
+                "normalized_key": "wifi_security_table",
+                "spec_value": "See product_spec_matrix",
+                "raw_value": "HTML table: Wi-Fi Security (Authentication/Encryption)",
+                "raw_value_jsonb": {
+                    "source": {"type": "web", "url": product_url, "section": section_name, "label": raw_key},
+                    "dims": normalized.get("dims"),
+                    "value_fields": normalized.get("value_fields"),
+                },
+                "matrix_cells": normalized.get("cells", []),
+            }
+        )
+        converted = True
+
+    table_rec["converted_to_matrix"] = converted
+    return table_rec
+
+def _normalize_item(
+    config: NormalizationConfig,
+    mapper: SpecMapperService,
+    item: Dict[str, Any],
+    metrics: StageMetrics,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    One extraction item -> (normalized item, its pdf_queue entries).
+
+    Typed values (numeric/canonical/...) of spec_records are left empty; callers fill them in
+    bulk with _populate_parsed_values.
+    """
+    pdf_queue: List[Dict[str, Any]] = []
+    product_slug = item.get("product_slug")
+    product_url = _normalize_url(item.get("product_url", ""))
+    raw_html_path = item.get("raw_html_path")
+    extraction_errors = item.get("errors", []) or []
+    extraction_completeness = item.get("completeness", {}) or {}
+    msrp_usd = item.get("msrp_usd")
+
+    spec_records: List[Dict[str, Any]] = []
+    unmapped: List[Dict[str, Any]] = []
+    table_records: List[Dict[str, Any]] = []
+    documents: List[Dict[str, Any]] = []
+    matrix_records: List[Dict[str, Any]] = []
+    images: List[Dict[str, Any]] = []
+    primary_image_url: Optional[str] = None
+
+    for img in item.get("images", []) or []:
+        if not isinstance(img, dict):
+            continue
+        url = (img.get("url") or "").strip()
+        if not url:
+            continue
+        kind = img.get("kind")
+        if primary_image_url is None and kind == "primary":
+            primary_image_url = _normalize_url(url)
+        images.append(
+            {
+                "url": _normalize_url(url),
+                "kind": kind,
+                "sort_order": img.get("sort_order"),
+                "source": img.get("source") or {"type": "web", "url": product_url},
+                "raw_metadata": img.get("raw_metadata") or {},
+            }
+        )
+    if primary_image_url is None and images:
+        # fallback: first image in list
+        primary_image_url = images[0].get("url")
+
+    with metrics.phase("map"):
+        for section in item.get("manufacturer_sections", []) or []:
+            section_name_raw = section.get("section_name", "") or ""
+            section_name = _clean_extracted_label(section_name_raw)
+            for attr in section.get("attributes", []) or []:
+                raw_key_raw = attr.get("raw_key", "") or ""
+                raw_key = _clean_extracted_label(raw_key_raw)
+                raw_value = attr.get("raw_value", "") or ""
+                ctx = attr.get("context") or {}
+
+                # Document handling: PDF links are assets, not specs
+                if ctx.get("pdf_url"):
+                    documents.append(
                         {
-                            "spec_definition_id": def_id,
-                            "normalized_key": definition.get("normalized_key"),
-                            # Preserve raw_value; clean spec_value for UI
-                            "spec_value": clean_text_for_spec_value(mapped.get("value_text") or raw_value),
-                            "raw_value": raw_value,
-                            "numeric_value": mapped.get("numeric_value"),
-                            "boolean_value": mapped.get("boolean_value"),
-                            "unit_used": mapped.get("unit_used"),
-                            "extraction_confidence": 0.9,
+                            "document_kind": "technical_specs_pdf",
+                            "url": ctx.get("pdf_url"),
                             "source": {
                                 "type": "web",
                                 "url": product_url,
@@ -361,96 +444,263 @@ def normalize_extractions(
                             },
                         }
                     )
+                    continue
 
-            normalized_items.append(
-                {
-                    "product": {
-                        "brand_slug": config.brand_slug,
-                        "category_slug": config.category_slug,
-                        "product_type": config.product_type,
-                        "slug": product_slug,
-                        "manufacturer_url": product_url,
-                        "msrp_usd": msrp_usd,
-                        "primary_image_url": primary_image_url,
-                    },
-                    "extraction": {
-                        "raw_html_path": raw_html_path,
-                        "errors": extraction_errors,
-                        "completeness": extraction_completeness,
-                    },
-                    "spec_records": spec_records,
-                    "table_records": table_records,
-                    "matrix_records": matrix_records,
-                    "documents": documents,
-                    "images": images,
-                    "unmapped": unmapped,
-                    "run_summary": {
-                        "mapped_count": len(spec_records),
-                        "unmapped_count": len(unmapped),
-                        "tables_count": len(table_records),
-                        "documents_count": len(documents),
-                        "images_count": len(images),
-                    },
-                }
-            )
-
-            # HTML inconsistency handling: decide if we need PDFs for this product.
-            needs_pdf_reasons: List[str] = []
-            needs_pdf = False
-            if extraction_errors:
-                needs_pdf = True
-                needs_pdf_reasons.append("extraction_errors")
-            if extraction_completeness.get("needs_pdf") is True:
-                needs_pdf = True
-                needs_pdf_reasons.append("low_completeness")
-
-            # If Canon HTML has no sections but we did find a PDF link, treat as needs_pdf.
-            if len(spec_records) == 0 and len(unmapped) == 0 and len(documents) > 0:
-                needs_pdf = True
-                needs_pdf_reasons.append("no_html_specs")
-
-            # Add needs_pdf + reasons to the last appended item (same product)
-            normalized_items[-1]["needs_pdf"] = needs_pdf
-            normalized_items[-1]["needs_pdf_reasons"] = needs_pdf_reasons
-
-            if needs_pdf:
-                for doc in documents:
-                    if doc.get("document_kind") == "technical_specs_pdf" and doc.get("url"):
-                        pdf_queue.append(
-                            {
-                                "brand": config.brand_slug,
-                                "product_type": config.product_type,
-                                "product_slug": product_slug,
-                                "product_url": product_url,
-                                "pdf_url": doc["url"],
-                                "pdf_kind": "technical_specs_pdf",
-                                "reason": ";".join(needs_pdf_reasons) or "needs_pdf",
-                                "status": "needs_download",
-                            }
-                        )
-
-        normalized_payload = {
-            "brand": config.brand_slug,
+                # Table handling: defer to later matrix normalizer
+                if raw_value == "[table]":
+                    table_records.append(
+                        _table_record(mapper, section_name, raw_key, raw_value, ctx, product_url, matrix_records, metrics)
+                    )
+                    continue
+
+                # Typed fields are filled per spec_definition in one batch after the item loop.
+                mapped = mapper.map_spec(
+                    raw_key=raw_key,
+                    raw_context=section_name,
+                    raw_value=raw_value,
+                    parse_value=False,
+                )
+                if not mapped:
+                    unmapped.append(_unmapped_record(section_name, raw_key, raw_value, product_url))
+                    continue
+
+                spec_records.append(_spec_record(mapper, mapped, section_name, raw_key, raw_value, product_url))
+
+    normalized_item: Dict[str, Any] = {
+        "product": {
+            "brand_slug": config.brand_slug,
+            "category_slug": config.category_slug,
             "product_type": config.product_type,
-            "generated_at": _utc_now_iso(),
-            "source_extractions_path": extractions_json_path,
-            "items": normalized_items,
-            "pdf_queue": pdf_queue,
-        }
+            "slug": product_slug,
+            "manufacturer_url": product_url,
+            "msrp_usd": msrp_usd,
+            "primary_image_url": primary_image_url,
+        },
+        "extraction": {
+            "raw_html_path": raw_html_path,
+            "errors": extraction_errors,
+            "completeness": extraction_completeness,
+            # when the page was actually fetched; carried-over items keep their original time
+            "scraped_at": item.get("scraped_at"),
+        },
+        "spec_records": spec_records,
+        "table_records": table_records,
+        "matrix_records": matrix_records,
+        "documents": documents,
+        "images": images,
+        "unmapped": unmapped,
+        "run_summary": {
+            "mapped_count": len(spec_records),
+            "unmapped_count": len(unmapped),
+            "tables_count": len(table_records),
+            "documents_count": len(documents),
+            "images_count": len(images),
+        },
+    }
+
+    # HTML inconsistency handling: decide if we need PDFs for this product.
+    needs_pdf_reasons: List[str] = []
+    needs_pdf = False
+    if extraction_errors:
+        needs_pdf = True
+        needs_pdf_reasons.append("extraction_errors")
+    if extraction_completeness.get("needs_pdf") is True:
+        needs_pdf = True
+        needs_pdf_reasons.append("low_completeness")
+
+    # If Canon HTML has no sections but we did find a PDF link, treat as needs_pdf.
+    if len(spec_records) == 0 and len(unmapped) == 0 and len(documents) > 0:
+        needs_pdf = True
+        needs_pdf_reasons.append("no_html_specs")
+
+    normalized_item["needs_pdf"] = needs_pdf
+    normalized_item["needs_pdf_reasons"] = needs_pdf_reasons
+
+    if needs_pdf:
+        for doc in documents:
+            if doc.get("document_kind") == "technical_specs_pdf" and doc.get("url"):
+                pdf_queue.append(
+                    {
+                        "brand": config.brand_slug,
+                        "product_type": config.product_type,
+                        "product_slug": product_slug,
+                        "product_url": product_url,
+                        "pdf_url": doc["url"],
+                        "pdf_kind": "technical_specs_pdf",
+                        "reason": ";".join(needs_pdf_reasons) or "needs_pdf",
+                        "status": "needs_download",
+                    }
+                )
+
+    return normalized_item, pdf_queue
+
+
+def _normalize_all(
+    config: NormalizationConfig,
+    mapper: SpecMapperService,
+    items: List[Dict[str, Any]],
+    extractions_json_path: str,
+    metrics: StageMetrics,
+) -> Dict[str, Any]:
+    """Full normalization of every extraction item (through the result cache when enabled)."""
+    normalized_items: List[Dict[str, Any]] = []
+    pdf_queue: List[Dict[str, Any]] = []
+
+    cache: Optional[ContentCache] = None
+    cache_version = _normalizer_version(mapper) if config.result_cache_dir and not config.profile_rules else None
+    if cache_version:
+        cache = ContentCache(config.result_cache_dir, cache_version).open()
+    # (cache key, normalized item, its pdf_queue entries) for items mapped in this run
+    fresh: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]] = []
+    extraction_keys: Dict[str, str] = {}
+
+    for item in items:
+        with metrics.url(_normalize_url(item.get("product_url", "")) or str(item.get("product_slug"))):
+            key = _item_key(config, item)
+            extraction_keys[_normalize_url(item.get("product_url", ""))] = key
+            if cache is not None:
+                with metrics.phase("cache"):
+                    cached = cache.get(key)
+                if cached is not None:
+                    metrics.add("cache_hits")
+                    # scraped_at isn't part of the cache key
+                    cached["item"].setdefault("extraction", {})["scraped_at"] = item.get("scraped_at")
+                    normalized_items.append(cached["item"])
+                    pdf_queue.extend(cached["pdf_queue"])
+                    continue
+                metrics.add("cache_misses")
+            normalized_item, item_pdf_queue = _normalize_item(config, mapper, item, metrics)
+            normalized_items.append(normalized_item)
+            pdf_queue.extend(item_pdf_queue)
+            fresh.append((key, normalized_item, item_pdf_queue))
+
+    # Cached items were stored with their typed values already filled in.
+    with metrics.phase("parse_values"):
+        _populate_parsed_values(mapper, [it for _, it, _ in fresh])
+
+    if cache is not None:
+        with metrics.phase("cache"):
+            for key, it, item_pdf_queue in fresh:
+                cache.put(key, {"item": it, "pdf_queue": item_pdf_queue})
+        logger.info(
+            "Normalization cache: %s of %s items reused (ruleset %s)",
+            cache.hits,
+            len(items),
+            mapper.rules_version,
+        )
+
+    normalized_payload = {
+        "brand": config.brand_slug,
+        "product_type": config.product_type,
+        "generated_at": _utc_now_iso(),
+        "source_extractions_path": extractions_json_path,
+        "items": normalized_items,
+        "pdf_queue": pdf_queue,
+        # product_url -> extraction item hash; targeted re-normalization uses it to tell which
+        # items changed since this output was written
+        "extraction_keys": extraction_keys,
+        "rules_version": mapper.rules_version,
+        "normalizer_code": _code_version(),
+    }
+    if cache is not None:
+        normalized_payload["stats"] = {"result_cache": cache.snapshot()}
+    return normalized_payload
+
+
+def normalize_extractions(
+    config: NormalizationConfig,
+    extractions_json_path: str,
+    db_url: Optional[str],
+    mapper: Optional[SpecMapperService] = None,
+    extractions: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Maps extracted attributes onto spec definitions.
+
+    Rules are loaded from `db_url` unless a ready `mapper` is passed (no connection is opened then).
+    An in-memory `extractions` payload is used instead of reading `extractions_json_path`.
+    """
+    metrics = start_stage("normalize", brand=config.brand_slug, product_type=config.product_type)
+    with metrics.phase("load"):
+        payload = extractions
+        if payload is None:
+            payload = json.loads(Path(extractions_json_path).read_text(encoding="utf-8"))
+    items = payload.get("items", [])
+
+    conn = None
+    if mapper is None:
+        import psycopg2
+
+        conn = psycopg2.connect(db_url, cursor_factory=counting_cursor_factory(metrics))
+    try:
+        if mapper is None:
+            with metrics.phase("load_rules"):
+                mapper = SpecMapperService(
+                    conn,
+                    profile=config.profile_rules,
+                    rule_cache_path=config.rule_cache_path,
+                )
+        targeted = None
+        if config.targeted:
+            # Imported here: renormalize builds on this module's helpers.
+            from agents.spec_pipeline.core.renormalize import renormalize_targeted
+
+            targeted = renormalize_targeted(config, mapper, items, extractions_json_path, metrics)
+        if targeted is not None:
+            normalized_payload, spec_patch = targeted
+        else:
+            normalized_payload = _normalize_all(config, mapper, items, extractions_json_path, metrics)
+            # nothing to diff against: the patch is the whole output
+            spec_patch = {
+                "brand": config.brand_slug,
+                "product_type": config.product_type,
+                "generated_at": normalized_payload["generated_at"],
+                "rules_version": mapper.rules_version,
+                "items": normalized_payload["items"],
+                "patches": [],
+            }
+
+        if config.targeted:
+            # Changes for `persistence.apply_spec_patch`, so the DB can follow without a full persist.
+            with metrics.phase("report"):
+                patch_path = Path(config.output_path).parent / "spec_patch.json"
+                patch_path.parent.mkdir(parents=True, exist_ok=True)
+                patch_path.write_text(json.dumps(spec_patch, indent=2, ensure_ascii=False), encoding="utf-8")
 
         # Also write an aggregated unmapped report alongside normalized output.
         # This is a deterministic artifact used for mapping iteration loops.
         try:
-            out_path = Path(config.output_path)
-            report_path = out_path.parent / "unmapped_report.json"
-            report = build_unmapped_report(normalized_payload)
-            report_path.parent.mkdir(parents=True, exist_ok=True)
-            report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+            with metrics.phase("report"):
+                out_path = Path(config.output_path)
+                report_path = out_path.parent / "unmapped_report.json"
+                report = build_unmapped_report(normalized_payload)
+                report_path.parent.mkdir(parents=True, exist_ok=True)
+                report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
         except Exception:
             # Never fail the core normalization output due to reporting.
             pass
 
+        # The ruleset this output was mapped with; targeted re-normalization diffs against it.
+        if mapper.snapshot is not None:
+            try:
+                save_snapshot(Path(config.output_path).parent / "rules_snapshot.json", mapper.snapshot)
+            except Exception as e:
+                logger.warning("Could not write rules snapshot: %s", e)
+
+        if config.profile_rules:
+            try:
+                profile_path = Path(config.output_path).parent / "rule_profile_report.json"
+                profile_path.parent.mkdir(parents=True, exist_ok=True)
+                profile_path.write_text(
+                    json.dumps(mapper.profile_report(), indent=2, ensure_ascii=False),
+                    encoding="utf-8",
+                )
+            except Exception:
+                pass
+
         return normalized_payload
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
+        metrics.finish()
 
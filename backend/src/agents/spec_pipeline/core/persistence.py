@@ -1,3 +1,4 @@
+import hashlib
 import json
 import re
 from dataclasses import dataclass
@@ -8,6 +9,8 @@ from typing import Any, Dict, List, Optional, Tuple
 import psycopg2
 from psycopg2.extras import Json
 
+from agents.spec_pipeline.core.metrics import StageMetrics, counting_cursor_factory, start_stage
+
 
 def _utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -64,12 +67,45 @@ def _humanize_slug(slug: str) -> str:
     return " ".join(out)
 
 
+def _content_hash(item: Dict[str, Any]) -> str:
+    """
+    Hash of what the product page said: labels/raw values, tables, price, images, documents.
+    Mapping results are left out, so a spec_mapping change doesn't count as a page change.
+    """
+    product = item.get("product") or {}
+    attributes = []
+    for rec in item.get("spec_records", []) or []:
+        source = rec.get("source") or {}
+        attributes.append([source.get("section"), source.get("label"), rec.get("raw_value")])
+    for rec in item.get("unmapped", []) or []:
+        attributes.append([rec.get("section"), rec.get("label"), rec.get("raw_value")])
+    for rec in item.get("table_records", []) or []:
+        attributes.append([rec.get("section"), rec.get("label"), (rec.get("raw_value_jsonb") or {}).get("table_html")])
+    content = {
+        "msrp_usd": product.get("msrp_usd"),
+        "attributes": sorted(attributes, key=lambda a: json.dumps(a, default=str)),
+        "images": sorted(str(img.get("url")) for img in item.get("images", []) or []),
+        "documents": sorted(str(doc.get("url")) for doc in item.get("documents", []) or []),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
 @dataclass
 class PersistenceConfig:
     brand_slug: str
     product_type: str
 
 
+def _parse_scraped_at(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
 def _lookup_ids(conn, brand_slug: str, category_slug: str) -> Tuple[str, str]:
     with conn.cursor() as cur:
         cur.execute("SELECT id FROM brand WHERE slug = %s", (brand_slug,))
@@ -95,10 +131,20 @@ def _upsert_product(
     msrp_usd: Optional[float] = None,
     primary_image_url: Optional[str] = None,
     raw_payload: Dict[str, Any],
+    content_hash: Optional[str] = None,
+    scraping_status: str = "success",
+    scraped_at: Optional[datetime] = None,
 ) -> str:
+    """
+    Insert/update a product row. `scraped_at` is when the page was fetched (default: now);
+    scrape bookkeeping (last_scraped_at, scrape_count, status, change history) only moves when
+    it is newer than the stored last_scraped_at, so items an extraction carried over from an
+    earlier run don't count as new scrapes.
+    """
     model = _humanize_slug(slug)
     full_name = model or slug
     now = _utc_now()
+    scraped_at = scraped_at or now
 
     sql = """
         INSERT INTO product (
@@ -114,11 +160,15 @@ def _upsert_product(
             raw_data,
             last_scraped_at,
             scraping_status,
+            content_hash,
+            scrape_count,
+            change_count,
+            last_changed_at,
             is_active,
             created_at,
             updated_at
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'success', TRUE, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 1, 0, %s, TRUE, %s, %s)
         ON CONFLICT (slug) DO UPDATE SET
             brand_id = EXCLUDED.brand_id,
             category_id = EXCLUDED.category_id,
@@ -129,12 +179,25 @@ def _upsert_product(
             manufacturer_url = COALESCE(EXCLUDED.manufacturer_url, product.manufacturer_url),
             source_url = COALESCE(EXCLUDED.source_url, product.source_url),
             raw_data = EXCLUDED.raw_data,
-            last_scraped_at = EXCLUDED.last_scraped_at,
-            scraping_status = EXCLUDED.scraping_status,
+            -- change history for the refresh scheduler (core/refresh_scheduler.py); only a
+            -- newer scrape moves it
+            last_scraped_at = GREATEST(EXCLUDED.last_scraped_at, product.last_scraped_at),
+            scraping_status = CASE WHEN {fresh}
+                THEN EXCLUDED.scraping_status ELSE product.scraping_status END,
+            content_hash = CASE WHEN {fresh}
+                THEN COALESCE(EXCLUDED.content_hash, product.content_hash) ELSE product.content_hash END,
+            scrape_count = product.scrape_count + CASE WHEN {fresh} THEN 1 ELSE 0 END,
+            change_count = product.change_count + CASE
+                WHEN {fresh} AND EXCLUDED.content_hash <> product.content_hash THEN 1 ELSE 0 END,
+            last_changed_at = CASE
+                WHEN {fresh} AND EXCLUDED.content_hash <> product.content_hash
+                THEN EXCLUDED.last_changed_at ELSE product.last_changed_at END,
             is_active = EXCLUDED.is_active,
             updated_at = EXCLUDED.updated_at
         RETURNING id;
-    """
+    """.format(
+        fresh="(product.last_scraped_at IS NULL OR EXCLUDED.last_scraped_at > product.last_scraped_at)"
+    )
     with conn.cursor() as cur:
         cur.execute(
             sql,
@@ -149,7 +212,10 @@ def _upsert_product(
                 manufacturer_url,
                 manufacturer_url,
                 Json(raw_payload),
-                now,
+                scraped_at,
+                scraping_status,
+                content_hash,
+                scraped_at,
                 now,
                 now,
             ),
@@ -169,11 +235,15 @@ def _upsert_product_spec(conn, *, product_id: str, rec: Dict[str, Any]) -> None:
             min_value,
             max_value,
             unit_used,
+            canonical_value,
+            canonical_min_value,
+            canonical_max_value,
+            canonical_unit,
             boolean_value,
             extraction_confidence,
             scraped_at
         )
-        VALUES (%s, %s, %s, %s, %s, %s, NULL, NULL, %s, %s, %s, NOW())
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
         ON CONFLICT (product_id, spec_definition_id) DO UPDATE SET
             spec_value = EXCLUDED.spec_value,
             raw_value = EXCLUDED.raw_value,
@@ -182,6 +252,10 @@ def _upsert_product_spec(conn, *, product_id: str, rec: Dict[str, Any]) -> None:
             min_value = EXCLUDED.min_value,
             max_value = EXCLUDED.max_value,
             unit_used = EXCLUDED.unit_used,
+            canonical_value = EXCLUDED.canonical_value,
+            canonical_min_value = EXCLUDED.canonical_min_value,
+            canonical_max_value = EXCLUDED.canonical_max_value,
+            canonical_unit = EXCLUDED.canonical_unit,
             boolean_value = EXCLUDED.boolean_value,
             extraction_confidence = EXCLUDED.extraction_confidence,
             scraped_at = NOW();
@@ -210,7 +284,13 @@ def _upsert_product_spec(conn, *, product_id: str, rec: Dict[str, Any]) -> None:
                 rec.get("raw_value"),
                 Json(raw_jsonb),
                 rec.get("numeric_value"),
+                rec.get("min_value"),
+                rec.get("max_value"),
                 rec.get("unit_used"),
+                rec.get("canonical_value"),
+                rec.get("canonical_min_value"),
+                rec.get("canonical_max_value"),
+                rec.get("canonical_unit"),
                 rec.get("boolean_value"),
                 rec.get("extraction_confidence"),
             ),
@@ -418,15 +498,110 @@ def _upsert_image(conn, *, product_id: str, product: Dict[str, Any], img: Dict[s
         )
 
 
+def _persist_item(
+    conn,
+    config: PersistenceConfig,
+    payload: Dict[str, Any],
+    item: Dict[str, Any],
+    spec_def_ids_by_key: Dict[str, str],
+    counts: Dict[str, int],
+    metrics: StageMetrics,
+) -> None:
+    product = item.get("product") or {}
+    with metrics.url(product.get("manufacturer_url") or str(product.get("slug"))):
+        brand_slug = product.get("brand_slug") or config.brand_slug
+        category_slug = product.get("category_slug")
+        product_slug = product.get("slug")
+        manufacturer_url = product.get("manufacturer_url")
+
+        if not (brand_slug and category_slug and product_slug):
+            raise RuntimeError(f"normalized item missing required product fields: {product!r}")
+
+        brand_id, category_id = _lookup_ids(conn, brand_slug, category_slug)
+        scrape_failed = bool((item.get("extraction") or {}).get("errors"))
+
+        product_id = _upsert_product(
+            conn,
+            brand_id=brand_id,
+            category_id=category_id,
+            slug=product_slug,
+            manufacturer_url=manufacturer_url,
+            msrp_usd=product.get("msrp_usd"),
+            primary_image_url=product.get("primary_image_url"),
+            raw_payload={
+                "pipeline": {
+                    "brand": payload.get("brand"),
+                    "product_type": payload.get("product_type"),
+                    "generated_at": payload.get("generated_at"),
+                },
+                "extraction": item.get("extraction"),
+                "run_summary": item.get("run_summary"),
+            },
+            # Extraction errors (bot wall, cache miss) mean the page wasn't actually read;
+            # no hash then, so an empty item doesn't count as a content change.
+            content_hash=None if scrape_failed else _content_hash(item),
+            scraping_status="failed" if scrape_failed else "success",
+            scraped_at=_parse_scraped_at((item.get("extraction") or {}).get("scraped_at")),
+        )
+        counts["products_upserted"] += 1
+
+        for rec in item.get("spec_records", []) or []:
+            normalized_key = rec.get("normalized_key")
+            resolved_id = spec_def_ids_by_key.get(str(normalized_key)) if normalized_key else None
+            if not resolved_id:
+                counts["spec_records_skipped_missing_definition"] += 1
+                continue
+
+            _upsert_product_spec(
+                conn,
+                product_id=product_id,
+                rec={**rec, "spec_definition_id": resolved_id},
+            )
+            counts["spec_records_upserted"] += 1
+
+        for matrix in item.get("matrix_records", []) or []:
+            normalized_key = matrix.get("normalized_key")
+            if not normalized_key:
+                continue
+            spec_definition_id = spec_def_ids_by_key.get(str(normalized_key))
+            if not spec_definition_id:
+                counts["matrix_records_skipped_missing_definition"] += 1
+                continue
+            _upsert_matrix_parent_spec(
+                conn,
+                product_id=product_id,
+                spec_definition_id=spec_definition_id,
+                matrix_rec=matrix,
+            )
+            for cell in matrix.get("matrix_cells", []) or []:
+                _upsert_matrix_cell(
+                    conn,
+                    product_id=product_id,
+                    spec_definition_id=spec_definition_id,
+                    cell=cell,
+                )
+                counts["matrix_cells_upserted"] += 1
+
+        for doc in item.get("documents", []) or []:
+            _upsert_document(conn, product_id=product_id, product=product, doc=doc)
+            counts["documents_upserted"] += 1
+
+        for img in item.get("images", []) or []:
+            _upsert_image(conn, product_id=product_id, product=product, img=img)
+            counts["images_upserted"] += 1
+
+
 def persist_normalized_json(
     config: PersistenceConfig,
     normalized_json_path: str,
     db_url: str,
 ) -> Dict[str, Any]:
-    payload = json.loads(Path(normalized_json_path).read_text(encoding="utf-8"))
+    metrics = start_stage("persist", brand=config.brand_slug, product_type=config.product_type)
+    with metrics.phase("load"):
+        payload = json.loads(Path(normalized_json_path).read_text(encoding="utf-8"))
     items = payload.get("items", []) or []
 
-    conn = psycopg2.connect(db_url)
+    conn = psycopg2.connect(db_url, cursor_factory=counting_cursor_factory(metrics))
     try:
         conn.autocommit = False
 
@@ -443,85 +618,126 @@ def persist_normalized_json(
         }
 
         for item in items:
-            product = item.get("product") or {}
-            brand_slug = product.get("brand_slug") or config.brand_slug
-            category_slug = product.get("category_slug")
-            product_slug = product.get("slug")
-            manufacturer_url = product.get("manufacturer_url")
+            _persist_item(conn, config, payload, item, spec_def_ids_by_key, counts, metrics)
+
+        metrics.add("db_round_trips")
+        with metrics.phase("db"):
+            conn.commit()
+        return {
+            "normalized_json_path": normalized_json_path,
+            "persisted_at": _utc_now().isoformat(),
+            "counts": counts,
+        }
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        metrics.finish()
 
-            if not (brand_slug and category_slug and product_slug):
-                raise RuntimeError(f"normalized item missing required product fields: {product!r}")
 
-            brand_id, category_id = _lookup_ids(conn, brand_slug, category_slug)
 
-            product_id = _upsert_product(
-                conn,
-                brand_id=brand_id,
-                category_id=category_id,
-                slug=product_slug,
-                manufacturer_url=manufacturer_url,
-                msrp_usd=product.get("msrp_usd"),
-                primary_image_url=product.get("primary_image_url"),
-                raw_payload={
-                    "pipeline": {
-                        "brand": payload.get("brand"),
-                        "product_type": payload.get("product_type"),
-                        "generated_at": payload.get("generated_at"),
-                    },
-                    "extraction": item.get("extraction"),
-                    "run_summary": item.get("run_summary"),
-                },
-            )
-            counts["products_upserted"] += 1
+def _lookup_product_id(conn, slug: str) -> Optional[str]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM product WHERE slug = %s", (slug,))
+        row = cur.fetchone()
+        return str(row[0]) if row else None
 
-            for rec in item.get("spec_records", []) or []:
-                normalized_key = rec.get("normalized_key")
-                resolved_id = spec_def_ids_by_key.get(str(normalized_key)) if normalized_key else None
-                if not resolved_id:
-                    counts["spec_records_skipped_missing_definition"] += 1
-                    continue
 
-                _upsert_product_spec(
-                    conn,
-                    product_id=product_id,
-                    rec={**rec, "spec_definition_id": resolved_id},
-                )
-                counts["spec_records_upserted"] += 1
+def apply_spec_patch(
+    config: PersistenceConfig,
+    spec_patch_path: str,
+    db_url: str,
+) -> Dict[str, Any]:
+    """
+    Apply a targeted normalization's spec_patch.json (see core/renormalize.py) in one transaction.
 
-            for matrix in item.get("matrix_records", []) or []:
-                normalized_key = matrix.get("normalized_key")
-                if not normalized_key:
-                    continue
-                spec_definition_id = spec_def_ids_by_key.get(str(normalized_key))
-                if not spec_definition_id:
-                    counts["matrix_records_skipped_missing_definition"] += 1
+    `items` (new/changed extractions) are persisted like persist_normalized_json does; for the
+    rest only the product_spec / product_spec_matrix rows of the normalized_keys a rule change
+    reached are upserted, and rows for keys the product no longer maps to are deleted.
+    """
+    metrics = start_stage("persist", brand=config.brand_slug, product_type=config.product_type)
+    with metrics.phase("load"):
+        patch = json.loads(Path(spec_patch_path).read_text(encoding="utf-8"))
+
+    conn = psycopg2.connect(db_url, cursor_factory=counting_cursor_factory(metrics))
+    try:
+        conn.autocommit = False
+
+        spec_def_ids_by_key = _load_spec_definition_ids(conn)
+
+        counts = {
+            "products_upserted": 0,
+            "products_patched": 0,
+            "products_missing": 0,
+            "spec_records_upserted": 0,
+            "spec_records_deleted": 0,
+            "matrix_cells_upserted": 0,
+            "documents_upserted": 0,
+            "images_upserted": 0,
+            "spec_records_skipped_missing_definition": 0,
+            "matrix_records_skipped_missing_definition": 0,
+        }
+
+        for item in patch.get("items", []) or []:
+            _persist_item(conn, config, patch, item, spec_def_ids_by_key, counts, metrics)
+
+        for entry in patch.get("patches", []) or []:
+            with metrics.url(entry.get("manufacturer_url") or str(entry.get("product_slug"))):
+                product_id = _lookup_product_id(conn, entry.get("product_slug"))
+                if not product_id:
+                    # never persisted; the next full persist writes it
+                    counts["products_missing"] += 1
                     continue
-                _upsert_matrix_parent_spec(
-                    conn,
-                    product_id=product_id,
-                    spec_definition_id=spec_definition_id,
-                    matrix_rec=matrix,
-                )
-                for cell in matrix.get("matrix_cells", []) or []:
-                    _upsert_matrix_cell(
+                counts["products_patched"] += 1
+
+                for rec in entry.get("upserts", []) or []:
+                    resolved_id = spec_def_ids_by_key.get(str(rec.get("normalized_key")))
+                    if not resolved_id:
+                        counts["spec_records_skipped_missing_definition"] += 1
+                        continue
+                    _upsert_product_spec(conn, product_id=product_id, rec={**rec, "spec_definition_id": resolved_id})
+                    counts["spec_records_upserted"] += 1
+
+                for matrix in entry.get("matrix_upserts", []) or []:
+                    spec_definition_id = spec_def_ids_by_key.get(str(matrix.get("normalized_key")))
+                    if not spec_definition_id:
+                        counts["matrix_records_skipped_missing_definition"] += 1
+                        continue
+                    _upsert_matrix_parent_spec(
                         conn,
                         product_id=product_id,
                         spec_definition_id=spec_definition_id,
-                        cell=cell,
+                        matrix_rec=matrix,
                     )
-                    counts["matrix_cells_upserted"] += 1
-
-            for doc in item.get("documents", []) or []:
-                _upsert_document(conn, product_id=product_id, product=product, doc=doc)
-                counts["documents_upserted"] += 1
-
-            for img in item.get("images", []) or []:
-                _upsert_image(conn, product_id=product_id, product=product, img=img)
-                counts["images_upserted"] += 1
-
-        conn.commit()
+                    for cell in matrix.get("matrix_cells", []) or []:
+                        _upsert_matrix_cell(
+                            conn,
+                            product_id=product_id,
+                            spec_definition_id=spec_definition_id,
+                            cell=cell,
+                        )
+                        counts["matrix_cells_upserted"] += 1
+
+                stale_ids = [spec_def_ids_by_key[k] for k in entry.get("stale_keys", []) or [] if k in spec_def_ids_by_key]
+                if stale_ids:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "DELETE FROM product_spec_matrix WHERE product_id = %s AND spec_definition_id = ANY(%s::uuid[])",
+                            (product_id, stale_ids),
+                        )
+                        cur.execute(
+                            "DELETE FROM product_spec WHERE product_id = %s AND spec_definition_id = ANY(%s::uuid[])",
+                            (product_id, stale_ids),
+                        )
+                        counts["spec_records_deleted"] += cur.rowcount
+
+        metrics.add("db_round_trips")
+        with metrics.phase("db"):
+            conn.commit()
         return {
-            "normalized_json_path": normalized_json_path,
+            "spec_patch_path": spec_patch_path,
+            "rules_version": patch.get("rules_version"),
             "persisted_at": _utc_now().isoformat(),
             "counts": counts,
         }
@@ -530,4 +746,4 @@ def persist_normalized_json(
         raise
     finally:
         conn.close()
-
+        metrics.finish()
@@ -0,0 +1,154 @@
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOCK_STATUSES = {403, 429, 503}
+
+
+def _is_access_denied(html: Optional[str]) -> bool:
+    return bool(html) and "Access Denied" in html
+
+
+class AdaptiveRateLimiter:
+    """
+    Multiplicative pacing between page requests, driven by what the site sends back.
+
+    - healthy response (2xx/3xx, fast TTFB): delay is multiplied by `speedup` (< 1)
+    - slow TTFB (> slow_ttfb_ms) or a navigation timeout: delay is multiplied by `slowdown`
+    - block signal (403/429/503 or an "Access Denied" page): delay multiplies by `backoff`,
+      and a Retry-After header (seconds) is honored as a one-off cooldown
+
+    The delay always stays within [min_delay, max_delay]. `snapshot()` is JSON-serializable
+    and goes into stage stats so a run shows how hard the site pushed back.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 3.5,
+        min_delay: float = 0.5,
+        max_delay: float = 60.0,
+        speedup: float = 0.9,
+        slowdown: float = 1.25,
+        backoff: float = 2.0,
+        slow_ttfb_ms: float = 3000.0,
+        jitter: float = 0.25,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.backoff = backoff
+        self.slow_ttfb_ms = slow_ttfb_ms
+        self.jitter = jitter
+
+        self._cooldown_until = 0.0
+        self._last_request_at: Optional[float] = None
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "healthy": 0,
+            "slow": 0,
+            "blocked": 0,
+            "status_counts": {},
+            "total_wait_seconds": 0.0,
+            "min_delay_seen": self.delay,
+            "max_delay_seen": self.delay,
+            "ttfb_ms_total": 0.0,
+            "ttfb_samples": 0,
+        }
+
+    def wait(self) -> None:
+        """Sleep until the next request is allowed (delay since the last request, plus any cooldown)."""
+        now = time.monotonic()
+        target = now
+        if self._last_request_at is not None:
+            jittered = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            target = max(target, self._last_request_at + jittered)
+        target = max(target, self._cooldown_until)
+
+        pause = target - now
+        if pause > 0:
+            time.sleep(pause)
+            self.stats["total_wait_seconds"] += pause
+        self._last_request_at = time.monotonic()
+
+    def observe(
+        self,
+        status: Optional[int] = None,
+        ttfb_ms: Optional[float] = None,
+        access_denied: bool = False,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Feed back the outcome of one request."""
+        self.stats["requests"] += 1
+        if status is not None:
+            key = str(status)
+            self.stats["status_counts"][key] = self.stats["status_counts"].get(key, 0) + 1
+        if ttfb_ms is not None and ttfb_ms >= 0:
+            self.stats["ttfb_ms_total"] += ttfb_ms
+            self.stats["ttfb_samples"] += 1
+
+        if access_denied or (status in BLOCK_STATUSES):
+            self.stats["blocked"] += 1
+            self._set_delay(self.delay * self.backoff)
+            cooldown = self._parse_retry_after(retry_after)
+            if cooldown:
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+            logger.warning(
+                "Pacing: block signal (status=%s access_denied=%s); delay now %.1fs", status, access_denied, self.delay
+            )
+        elif ttfb_ms is not None and ttfb_ms > self.slow_ttfb_ms:
+            self.stats["slow"] += 1
+            self._set_delay(self.delay * self.slowdown)
+        else:
+            self.stats["healthy"] += 1
+            self._set_delay(self.delay * self.speedup)
+
+    def observe_response(self, response, html: Optional[str] = None) -> None:
+        """Convenience wrapper for a Playwright Response (as returned by page.goto)."""
+        status = None
+        ttfb_ms = None
+        retry_after = None
+        if response is not None:
+            try:
+                status = response.status
+                retry_after = (response.headers or {}).get("retry-after")
+                timing = response.request.timing or {}
+                # responseStart is ms since request start; -1 when the browser didn't record it.
+                if timing.get("responseStart", -1) >= 0:
+                    ttfb_ms = float(timing["responseStart"])
+            except Exception:
+                pass
+        self.observe(status=status, ttfb_ms=ttfb_ms, access_denied=_is_access_denied(html), retry_after=retry_after)
+
+    def _set_delay(self, value: float) -> None:
+        self.delay = min(max(value, self.min_delay), self.max_delay)
+        self.stats["min_delay_seen"] = min(self.stats["min_delay_seen"], self.delay)
+        self.stats["max_delay_seen"] = max(self.stats["max_delay_seen"], self.delay)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None  # HTTP-date form: rely on the multiplicative backoff instead
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = self.stats["ttfb_samples"]
+        return {
+            "current_delay_seconds": round(self.delay, 3),
+            "min_delay_seen": round(self.stats["min_delay_seen"], 3),
+            "max_delay_seen": round(self.stats["max_delay_seen"], 3),
+            "requests": self.stats["requests"],
+            "healthy": self.stats["healthy"],
+            "slow": self.stats["slow"],
+            "blocked": self.stats["blocked"],
+            "status_counts": dict(self.stats["status_counts"]),
+            "avg_ttfb_ms": round(self.stats["ttfb_ms_total"] / samples, 1) if samples else None,
+            "total_wait_seconds": round(self.stats["total_wait_seconds"], 2),
+        }
@@ -0,0 +1,83 @@
+import logging
+import time
+from typing import List, Optional
+
+from agents.spec_pipeline.core.metrics import StageMetrics
+
+logger = logging.getLogger(__name__)
+
+# A bot-wall page never grows the element we're waiting for; stop waiting as soon as it shows up.
+_ANY_PRESENT_JS = """
+(selectors) => document.title.includes("Access Denied")
+    || selectors.some((sel) => document.querySelector(sel) !== null)
+"""
+
+_COUNT_ABOVE_JS = """
+([selector, count]) => document.title.includes("Access Denied")
+    || document.querySelectorAll(selector).length > count
+"""
+
+_COUNT_JS = "(selector) => document.querySelectorAll(selector).length"
+
+
+class PageReadiness:
+    """
+    Waits on concrete page signals instead of fixed sleeps, each bounded by a cap.
+
+    - `wait_for_any(page, selectors)`: one of the selectors is in the DOM (e.g. #tech-spec-data)
+    - `wait_for_count_above(page, selector, n)`: more than n matches (product grid grew after "load more")
+    - `wait_for_network_idle(page)`: no network activity for 500ms (Playwright's definition)
+
+    Waits return True when the signal fired and False when the cap ran out. The time spent is
+    recorded as the "ready" phase plus a `ready_ms` counter (per URL when inside metrics.url),
+    and cap hits are counted as `ready_timeouts`, so a run shows which pages needed the time.
+    """
+
+    def __init__(self, metrics: StageMetrics, timeout_ms: float = 10000.0, network_idle_cap_ms: float = 3000.0):
+        self._metrics = metrics
+        self.timeout_ms = timeout_ms
+        self.network_idle_cap_ms = network_idle_cap_ms
+
+    def _timed(self, signal: str, fn, timeout_ms: float) -> bool:
+        start = time.perf_counter()
+        ok = True
+        with self._metrics.phase("ready"):
+            try:
+                fn(timeout_ms)
+            except Exception as e:
+                # Playwright raises TimeoutError when the cap runs out; anything else (page closed,
+                # navigation mid-wait) also just means "stop waiting" here.
+                ok = False
+                logger.debug("Readiness signal %s not seen within %sms: %s", signal, timeout_ms, e)
+        self._metrics.add("ready_ms", round((time.perf_counter() - start) * 1000, 1))
+        if not ok:
+            self._metrics.add("ready_timeouts")
+        return ok
+
+    def wait_for_any(self, page, selectors: List[str], timeout_ms: Optional[float] = None) -> bool:
+        return self._timed(
+            f"any_of:{selectors}",
+            lambda t: page.wait_for_function(_ANY_PRESENT_JS, arg=selectors, timeout=t),
+            self.timeout_ms if timeout_ms is None else timeout_ms,
+        )
+
+    def wait_for_count_above(self, page, selector: str, count: int, timeout_ms: Optional[float] = None) -> bool:
+        return self._timed(
+            f"count_above:{selector}>{count}",
+            lambda t: page.wait_for_function(_COUNT_ABOVE_JS, arg=[selector, count], timeout=t),
+            self.timeout_ms if timeout_ms is None else timeout_ms,
+        )
+
+    def wait_for_network_idle(self, page, timeout_ms: Optional[float] = None) -> bool:
+        return self._timed(
+            "networkidle",
+            lambda t: page.wait_for_load_state("networkidle", timeout=t),
+            self.network_idle_cap_ms if timeout_ms is None else timeout_ms,
+        )
+
+    @staticmethod
+    def count(page, selector: str) -> int:
+        try:
+            return int(page.evaluate(_COUNT_JS, selector))
+        except Exception:
+            return 0
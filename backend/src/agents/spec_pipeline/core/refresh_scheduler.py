@@ -0,0 +1,161 @@
+import json
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agents.spec_pipeline.core.extraction import _normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        ts = value
+    else:
+        try:
+            ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class RefreshConfig:
+    # Time the refresh window may spend fetching; the work list holds as many URLs as fit.
+    budget_seconds: float = 3600.0
+    # Fallback when there's no previous extraction metrics file to estimate seconds per fetch from.
+    default_seconds_per_fetch: float = 15.0
+    max_urls: Optional[int] = None
+    # Change-rate prior (one change per prior_days) so products with little history still age.
+    prior_days: float = 30.0
+    # Priority floors for discovery/status signals; time-based staleness scores fall in [0, 1).
+    new_priority: float = 3.0
+    changed_priority: float = 2.0
+    failed_priority: float = 1.5
+
+
+def load_product_state(conn, brand_slug: str, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """{manufacturer_url: product refresh columns} for the brand's products among `urls`."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT p.manufacturer_url, p.slug, p.last_scraped_at, p.scraping_status, p.created_at,
+                   p.scrape_count, p.change_count, p.last_changed_at
+            FROM product p
+            JOIN brand b ON b.id = p.brand_id
+            WHERE b.slug = %s AND p.manufacturer_url = ANY(%s)
+            """,
+            (brand_slug, list(urls)),
+        )
+        cols = [d[0] for d in cur.description]
+        return {row[0]: dict(zip(cols, row)) for row in cur.fetchall()}
+
+
+def seconds_per_fetch(metrics_path: str, default: float) -> float:
+    """Wall seconds per URL of the last extraction run (pacing included), or `default`."""
+    path = Path(metrics_path)
+    if not path.exists():
+        return default
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return default
+    for stage in payload.get("stages", []):
+        if stage.get("stage") != "extraction":
+            continue
+        # Cache hits cost next to nothing; only count URLs that went to the site.
+        fetched = [u for u in stage.get("urls", []) if "fetch" in (u.get("phases") or {})]
+        if fetched:
+            return max(sum(u.get("seconds", 0.0) for u in fetched) / len(fetched), 0.1)
+    return default
+
+
+def _staleness(state: Dict[str, Any], now: datetime, prior_days: float) -> Dict[str, Any]:
+    """
+    Probability the product changed since its last scrape, 1 - exp(-rate * age), with the
+    change rate estimated from its own history: changes seen over the days it's been tracked,
+    smoothed by one change per prior_days.
+    """
+    last_scraped = _parse_ts(state.get("last_scraped_at"))
+    first_seen = _parse_ts(state.get("created_at")) or last_scraped
+    age_days = max((now - last_scraped).total_seconds() / 86400, 0.0) if last_scraped else None
+    tracked_days = max((last_scraped - first_seen).total_seconds() / 86400, 0.0) if last_scraped and first_seen else 0.0
+    changes = int(state.get("change_count") or 0)
+    rate = (changes + 1) / (tracked_days + prior_days)
+    return {
+        "age_days": round(age_days, 2) if age_days is not None else None,
+        "changes_per_day": round(rate, 4),
+        "p_changed": 1.0 if age_days is None else round(1 - math.exp(-rate * age_days), 4),
+    }
+
+
+def plan_refresh(
+    inventory: Dict[str, Any],
+    product_state: Dict[str, Dict[str, Any]],
+    config: RefreshConfig,
+    fetch_seconds: float,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Rank inventory URLs by how likely their stored data is stale and cut the list at the budget.
+
+    Order: new products (discovery `added`, or never persisted), then products discovery saw
+    change (`diff.changed`, or a sitemap lastmod after the last scrape), then failed scrapes,
+    then everything else by staleness probability. URLs discovery reports removed are never
+    scheduled and are listed separately.
+    """
+    now = now or _utc_now()
+    diff = inventory.get("diff") or {}
+    added = {_normalize_url(u) for u in diff.get("added") or []}
+    changed = {_normalize_url(u) for u in diff.get("changed") or []}
+    lastmod = {_normalize_url(u): v for u, v in (inventory.get("lastmod") or {}).items()}
+
+    candidates: List[Dict[str, Any]] = []
+    for url in dict.fromkeys(_normalize_url(u) for u in inventory.get("urls", []) or []):
+        state = product_state.get(url)
+        if url in added or state is None or state.get("last_scraped_at") is None:
+            candidates.append({"url": url, "reason": "new", "priority": config.new_priority})
+            continue
+
+        entry = {"url": url, "slug": state.get("slug"), **_staleness(state, now, config.prior_days)}
+        modified = _parse_ts(lastmod.get(url))
+        if url in changed or (modified is not None and modified > _parse_ts(state["last_scraped_at"])):
+            entry.update(reason="changed", priority=config.changed_priority + entry["p_changed"])
+        elif state.get("scraping_status") == "failed":
+            entry.update(reason="failed", priority=config.failed_priority + entry["p_changed"])
+        else:
+            entry.update(reason="stale", priority=entry["p_changed"])
+        candidates.append(entry)
+
+    # Stable sort keeps inventory order (newest lastmod first for sitemaps) among equal priorities.
+    candidates.sort(key=lambda c: -c["priority"])
+    capacity = int(config.budget_seconds // max(fetch_seconds, 1e-6))
+    if config.max_urls is not None:
+        capacity = min(capacity, config.max_urls)
+    scheduled = candidates[:capacity]
+
+    reasons: Dict[str, int] = {}
+    for c in scheduled:
+        reasons[c["reason"]] = reasons.get(c["reason"], 0) + 1
+    return {
+        "generated_at": now.isoformat(),
+        "budget_seconds": config.budget_seconds,
+        "seconds_per_fetch": round(fetch_seconds, 3),
+        "capacity": capacity,
+        "candidates": len(candidates),
+        "scheduled_count": len(scheduled),
+        "scheduled_by_reason": reasons,
+        "deferred_count": len(candidates) - len(scheduled),
+        "removed": sorted(_normalize_url(u) for u in diff.get("removed") or []),
+        "urls": [c["url"] for c in scheduled],
+        "scheduled": scheduled,
+    }
@@ -1,6 +1,6 @@
 import importlib
 from types import ModuleType
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 
 _PLUGIN_IMPORT_PATHS: Dict[Tuple[str, str], str] = {
@@ -16,3 +16,7 @@ def load_plugin(brand_slug: str, product_type: str) -> ModuleType:
         raise ValueError(f"Unknown plugin {key[0]}:{key[1]}. Known: {known}")
     return importlib.import_module(_PLUGIN_IMPORT_PATHS[key])
 
+
+def registered_plugins() -> List[Tuple[str, str]]:
+    """(brand_slug, product_type) of every registered plugin, sorted."""
+    return sorted(_PLUGIN_IMPORT_PATHS)
@@ -0,0 +1,401 @@
+import json
+import logging
+import re
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from agents.spec_pipeline.core.extraction import _normalize_url
+from agents.spec_pipeline.core.metrics import StageMetrics
+from agents.spec_pipeline.core.normalization import (
+    NormalizationConfig,
+    _clean_extracted_label,
+    _code_version,
+    _item_key,
+    _normalize_item,
+    _populate_parsed_values,
+    _spec_record,
+    _table_record,
+    _unmapped_record,
+    _utc_now_iso,
+)
+from services.rule_cache import RuleSnapshot, load_snapshot
+from services.spec_mapper import SpecMapperService
+
+logger = logging.getLogger(__name__)
+
+# Fields of a spec_mapping row that decide what it matches and where it lands.
+_RULE_FIELDS = ("def_id", "pattern", "context", "priority")
+
+# (label, section) as they appear in normalized records' source, i.e. after _clean_extracted_label.
+LabelKey = Tuple[str, str]
+
+
+def rule_changes(old: RuleSnapshot, new: RuleSnapshot) -> Optional[Dict[str, Any]]:
+    """
+    spec_mapping rows added/removed/changed between two snapshots (by rule id), plus the ids of
+    spec_definitions whose row changed.
+
+    None when the two can't be diffed safely: rows without ids, or rules nobody touched changing
+    their relative order (priority ties come back from the DB in no fixed order).
+    """
+    if any(r.get("rule_id") is None for r in old.mapping_rows + new.mapping_rows):
+        return None
+    old_rows = {r["rule_id"]: r for r in old.mapping_rows}
+    new_rows = {r["rule_id"]: r for r in new.mapping_rows}
+
+    added = [r for rid, r in new_rows.items() if rid not in old_rows]
+    removed = [r for rid, r in old_rows.items() if rid not in new_rows]
+    changed = [
+        (old_rows[rid], r)
+        for rid, r in new_rows.items()
+        if rid in old_rows and any(old_rows[rid].get(f) != r.get(f) for f in _RULE_FIELDS)
+    ]
+
+    touched = {r["rule_id"] for r in added + removed} | {n["rule_id"] for _, n in changed}
+    untouched_old = [r["rule_id"] for r in old.mapping_rows if r["rule_id"] not in touched]
+    untouched_new = [r["rule_id"] for r in new.mapping_rows if r["rule_id"] not in touched]
+    if untouched_old != untouched_new:
+        return None
+
+    definitions = {
+        def_id
+        for def_id in set(old.definitions) | set(new.definitions)
+        if old.definitions.get(def_id) != new.definitions.get(def_id)
+    }
+    return {"added": added, "removed": removed, "changed": changed, "definitions": definitions}
+
+
+def _compile_rows(rows: List[Dict[str, Any]]) -> List[Tuple[re.Pattern, Optional[re.Pattern]]]:
+    return [
+        (
+            re.compile(row["pattern"], re.IGNORECASE),
+            re.compile(row["context"], re.IGNORECASE) if row.get("context") else None,
+        )
+        for row in rows
+    ]
+
+
+def build_label_index(items: List[Dict[str, Any]]) -> Dict[LabelKey, List[Tuple[int, str, Any]]]:
+    """
+    Inverted index over normalized items: (label, section) -> [(item index, record kind, ref)].
+
+    kind is "spec" (ref = spec_definition_id), "unmapped", "table" or "matrix"
+    (ref = normalized_key). Labels repeat heavily across a catalog, so rule checks run once per
+    distinct key instead of once per attribute.
+    """
+    index: Dict[LabelKey, List[Tuple[int, str, Any]]] = defaultdict(list)
+    for idx, item in enumerate(items):
+        for rec in item.get("spec_records", []) or []:
+            src = rec.get("source") or {}
+            index[(src.get("label", ""), src.get("section", ""))].append((idx, "spec", rec.get("spec_definition_id")))
+        for rec in item.get("unmapped", []) or []:
+            index[(rec.get("label", ""), rec.get("section", ""))].append((idx, "unmapped", None))
+        for rec in item.get("table_records", []) or []:
+            index[(rec.get("label", ""), rec.get("section", ""))].append((idx, "table", None))
+        for rec in item.get("matrix_records", []) or []:
+            src = (rec.get("raw_value_jsonb") or {}).get("source") or {}
+            index[(src.get("label", ""), src.get("section", ""))].append((idx, "matrix", rec.get("normalized_key")))
+    return index
+
+
+def _affected_keys(
+    index: Dict[LabelKey, List[Tuple[int, str, Any]]],
+    changes: Dict[str, Any],
+    mapper: SpecMapperService,
+    old: RuleSnapshot,
+) -> Set[LabelKey]:
+    """Index keys whose mapping (or the definition it maps to) may differ under the new ruleset."""
+    touched_rows = changes["added"] + changes["removed"]
+    for old_row, new_row in changes["changed"]:
+        touched_rows.extend([old_row, new_row])
+    # A key no touched rule matches (old or new version) keeps its first match: every rule ahead
+    # of that match is either untouched, and still doesn't match, or touched, and matches neither way.
+    rules = _compile_rows(touched_rows)
+
+    changed_defs = changes["definitions"]
+    old_keys = {(old.definitions.get(d) or {}).get("normalized_key") for d in changed_defs}
+
+    affected: Set[LabelKey] = set()
+    for key, entries in index.items():
+        label, section = key
+        if any(p.search(label) and (c is None or (section and c.search(section))) for p, c in rules):
+            affected.add(key)
+            continue
+        if not changed_defs:
+            continue
+        if any((kind == "spec" and ref in changed_defs) or (kind == "matrix" and ref in old_keys) for _, kind, ref in entries):
+            affected.add(key)
+        elif any(kind == "table" for _, kind, _ in entries):
+            # the table may now map to a changed (e.g. newly converted) definition
+            mapped = mapper.map_spec(raw_key=label, raw_context=section, parse_value=False)
+            if mapped and mapped["spec_definition_id"] in changed_defs:
+                affected.add(key)
+    return affected
+
+
+def _attributes(item: Dict[str, Any]) -> List[Tuple[LabelKey, str, Dict[str, Any]]]:
+    """((label, section), raw_value, context) of an extraction item's spec/table attributes, in page order."""
+    out: List[Tuple[LabelKey, str, Dict[str, Any]]] = []
+    for section in item.get("manufacturer_sections", []) or []:
+        section_name = _clean_extracted_label(section.get("section_name", "") or "")
+        for attr in section.get("attributes", []) or []:
+            ctx = attr.get("context") or {}
+            if ctx.get("pdf_url"):
+                continue
+            key = (_clean_extracted_label(attr.get("raw_key", "") or ""), section_name)
+            out.append((key, attr.get("raw_value", "") or "", ctx))
+    return out
+
+
+def _record_key(rec: Dict[str, Any]) -> LabelKey:
+    src = rec.get("source") or (rec.get("raw_value_jsonb") or {}).get("source") or rec
+    return (src.get("label", ""), src.get("section", ""))
+
+
+def _patch_item(
+    mapper: SpecMapperService,
+    normalized_item: Dict[str, Any],
+    extraction_item: Dict[str, Any],
+    affected: Set[LabelKey],
+    remapped: Dict[LabelKey, Optional[Dict[str, Any]]],
+    metrics: StageMetrics,
+) -> List[Dict[str, Any]]:
+    """
+    Re-map the item's attributes under affected keys and splice the results into
+    spec_records/unmapped (tables: table_records/matrix_records) in page order; every other
+    record is kept as is. Returns the new spec records (typed fields still empty).
+    """
+    product_url = (normalized_item.get("product") or {}).get("manufacturer_url") or ""
+    # Unaffected keys map the same way for every attribute, so each key's records sit in one list.
+    kept: Dict[LabelKey, Deque[Tuple[str, Dict[str, Any]]]] = defaultdict(deque)
+    for kind in ("spec_records", "unmapped", "table_records"):
+        for rec in normalized_item.get(kind, []) or []:
+            kept[_record_key(rec)].append((kind, rec))
+    kept_matrix: Dict[LabelKey, Deque[Dict[str, Any]]] = defaultdict(deque)
+    for rec in normalized_item.get("matrix_records", []) or []:
+        kept_matrix[_record_key(rec)].append(rec)
+
+    out: Dict[str, List[Dict[str, Any]]] = {"spec_records": [], "unmapped": [], "table_records": [], "matrix_records": []}
+    new_specs: List[Dict[str, Any]] = []
+    for key, raw_value, ctx in _attributes(extraction_item):
+        label, section = key
+        if key not in affected:
+            kind, rec = kept[key].popleft()
+            out[kind].append(rec)
+            if rec.get("converted_to_matrix"):
+                out["matrix_records"].append(kept_matrix[key].popleft())
+        elif raw_value == "[table]":
+            out["table_records"].append(
+                _table_record(mapper, section, label, raw_value, ctx, product_url, out["matrix_records"], metrics)
+            )
+        elif remapped[key] is None:
+            out["unmapped"].append(_unmapped_record(section, label, raw_value, product_url))
+        else:
+            rec = _spec_record(mapper, remapped[key], section, label, raw_value, product_url)
+            out["spec_records"].append(rec)
+            new_specs.append(rec)
+
+    normalized_item.update(out)
+    summary = normalized_item.setdefault("run_summary", {})
+    summary["mapped_count"] = len(out["spec_records"])
+    summary["unmapped_count"] = len(out["unmapped"])
+    return new_specs
+
+
+def _spec_keys(item: Dict[str, Any]) -> Set[str]:
+    """normalized_keys the item owns product_spec rows for (plain specs and matrix parents)."""
+    keys = {rec.get("normalized_key") for rec in item.get("spec_records", []) or []}
+    keys |= {rec.get("normalized_key") for rec in item.get("matrix_records", []) or []}
+    keys.discard(None)
+    return keys
+
+
+def _patch_entry(new_item: Dict[str, Any], touched: Set[str], full: bool) -> Dict[str, Any]:
+    """
+    product_spec changes for one item among the `touched` normalized_keys: records to upsert
+    (last one wins, as in a full persist) and keys the item no longer has. Items persisted in
+    full (full=True) only need the stale keys.
+    """
+    product = new_item.get("product") or {}
+    upserts: Dict[str, Dict[str, Any]] = {}
+    matrix_upserts: Dict[str, Dict[str, Any]] = {}
+    if not full:
+        for rec in new_item.get("spec_records", []) or []:
+            if rec.get("normalized_key") in touched:
+                upserts[rec["normalized_key"]] = rec
+        for rec in new_item.get("matrix_records", []) or []:
+            if rec.get("normalized_key") in touched:
+                matrix_upserts[rec["normalized_key"]] = rec
+                # matrix parents take the product_spec row of their key, as they do in persist
+                upserts.pop(rec["normalized_key"], None)
+    return {
+        "product_slug": product.get("slug"),
+        "manufacturer_url": product.get("manufacturer_url"),
+        "upserts": list(upserts.values()),
+        "matrix_upserts": list(matrix_upserts.values()),
+        "stale_keys": sorted(touched - _spec_keys(new_item)),
+    }
+
+
+def renormalize_targeted(
+    config: NormalizationConfig,
+    mapper: SpecMapperService,
+    items: List[Dict[str, Any]],
+    extractions_json_path: str,
+    metrics: StageMetrics,
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Bring the previous normalized output at config.output_path up to date with the current
+    ruleset and extraction, re-mapping only what the change can reach.
+
+    Rules added/removed/changed since the ruleset saved with that output (rules_snapshot.json)
+    are matched against the distinct (label, section) keys of an inverted index over its
+    records; attributes under matching keys are re-mapped once per key and patched in place
+    (affected tables are converted again). Items whose extraction changed are normalized in full.
+
+    Returns (normalized payload, spec patch for the DB), or None when the previous output, its
+    rules snapshot or its extraction keys are missing or don't belong together; the caller
+    then runs a full normalization.
+    """
+    out_dir = Path(config.output_path).parent
+    previous_path = Path(config.output_path)
+    old_snapshot = load_snapshot(out_dir / "rules_snapshot.json")
+    new_snapshot = mapper.snapshot
+    if old_snapshot is None or new_snapshot is None or not previous_path.exists():
+        logger.info("Targeted normalization: no previous output/rules snapshot, running in full.")
+        return None
+    with metrics.phase("load"):
+        previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    previous_keys = previous.get("extraction_keys")
+    if (
+        previous_keys is None
+        or previous.get("rules_version") != old_snapshot.version_stamp
+        or previous.get("normalizer_code") != _code_version()
+    ):
+        logger.info("Targeted normalization: previous output predates its rules snapshot or code, running in full.")
+        return None
+    changes = rule_changes(old_snapshot, new_snapshot)
+    if changes is None:
+        logger.info("Targeted normalization: rules can't be diffed by id/order, running in full.")
+        return None
+
+    previous_items: Dict[str, Dict[str, Any]] = {}
+    for it in previous.get("items", []) or []:
+        previous_items[(it.get("product") or {}).get("manufacturer_url") or ""] = it
+    previous_pdf_queue: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in previous.get("pdf_queue", []) or []:
+        previous_pdf_queue[entry.get("product_url") or ""].append(entry)
+
+    # Output slots in extraction order: reused previous items, or None where the item is redone.
+    normalized_items: List[Optional[Dict[str, Any]]] = []
+    extraction_keys: Dict[str, str] = {}
+    redo: Set[int] = set()
+    for idx, item in enumerate(items):
+        url = _normalize_url(item.get("product_url", ""))
+        key = _item_key(config, item)
+        extraction_keys[url] = key
+        if previous_keys.get(url) == key and url in previous_items:
+            reused_item = previous_items.pop(url)
+            # scraped_at isn't part of the extraction key; a re-fetch of an unchanged page moves it
+            reused_item.setdefault("extraction", {})["scraped_at"] = item.get("scraped_at")
+            normalized_items.append(reused_item)
+        else:
+            normalized_items.append(None)
+            redo.add(idx)
+
+    with metrics.phase("index"):
+        reused = [it if it is not None else {} for it in normalized_items]
+        index = build_label_index(reused)
+        affected = _affected_keys(index, changes, mapper, old_snapshot)
+
+    patch_items: Dict[int, Set[LabelKey]] = defaultdict(set)
+    for key in affected:
+        for idx, _, _ in index[key]:
+            patch_items[idx].add(key)
+
+    # One map_spec per affected key, shared by every attribute under it (tables map inside _table_record).
+    with metrics.phase("map"):
+        remapped = {
+            key: mapper.map_spec(raw_key=key[0], raw_context=key[1], parse_value=False)
+            for key in affected
+            if any(kind in ("spec", "unmapped") for _, kind, _ in index[key])
+        }
+
+    new_specs: List[Dict[str, Any]] = []
+    patches: List[Dict[str, Any]] = []
+    for idx, keys in sorted(patch_items.items()):
+        item = normalized_items[idx]
+        with metrics.url((item.get("product") or {}).get("manufacturer_url") or str(idx)):
+            touched = {
+                rec.get("normalized_key")
+                for kind in ("spec_records", "matrix_records")
+                for rec in item.get(kind, []) or []
+                if _record_key(rec) in keys
+            }
+            specs = _patch_item(mapper, item, items[idx], keys, remapped, metrics)
+            new_specs.extend(specs)
+            touched |= {
+                rec.get("normalized_key")
+                for kind in ("spec_records", "matrix_records")
+                for rec in item.get(kind, []) or []
+                if _record_key(rec) in keys
+            }
+            touched.discard(None)
+            patches.append(_patch_entry(item, touched, full=False))
+
+    renormalized: List[Dict[str, Any]] = []
+    pdf_queue: List[Dict[str, Any]] = []
+    for idx, item in enumerate(items):
+        if idx not in redo:
+            url = (normalized_items[idx].get("product") or {}).get("manufacturer_url") or ""
+            pdf_queue.extend(previous_pdf_queue.get(url, []))
+            continue
+        with metrics.url(_normalize_url(item.get("product_url", "")) or str(item.get("product_slug"))):
+            normalized_item, item_pdf_queue = _normalize_item(config, mapper, item, metrics)
+        old_item = normalized_items[idx]
+        if old_item is None:
+            old_item = previous_items.get(_normalize_url(item.get("product_url", ""))) or {}
+        normalized_items[idx] = normalized_item
+        renormalized.append(normalized_item)
+        pdf_queue.extend(item_pdf_queue)
+        patches.append(_patch_entry(normalized_item, _spec_keys(old_item), full=True))
+
+    with metrics.phase("parse_values"):
+        _populate_parsed_values(mapper, renormalized + [{"spec_records": new_specs}])
+
+    stats = {
+        "rules_added": len(changes["added"]),
+        "rules_removed": len(changes["removed"]),
+        "rules_changed": len(changes["changed"]),
+        "definitions_changed": len(changes["definitions"]),
+        "label_keys": len(index),
+        "affected_keys": len(affected),
+        "items_patched": len(patch_items),
+        "items_renormalized": len(renormalized),
+        "keys_remapped": len(remapped),
+    }
+    logger.info("Targeted normalization: %s", stats)
+
+    normalized_payload = {
+        "brand": config.brand_slug,
+        "product_type": config.product_type,
+        "generated_at": _utc_now_iso(),
+        "source_extractions_path": extractions_json_path,
+        "items": normalized_items,
+        "pdf_queue": pdf_queue,
+        "extraction_keys": extraction_keys,
+        "rules_version": mapper.rules_version,
+        "normalizer_code": previous["normalizer_code"],
+        "stats": {"targeted": stats},
+    }
+    spec_patch = {
+        "brand": config.brand_slug,
+        "product_type": config.product_type,
+        "generated_at": normalized_payload["generated_at"],
+        "rules_version": mapper.rules_version,
+        # new or changed extractions; persisted in full
+        "items": renormalized,
+        "patches": [p for p in patches if p["upserts"] or p["matrix_upserts"] or p["stale_keys"]],
+    }
+    return normalized_payload, spec_patch
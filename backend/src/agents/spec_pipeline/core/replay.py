@@ -0,0 +1,233 @@
+import atexit
+import base64
+import io
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Headers that describe the wire encoding rather than the (already decoded) body stored in a HAR.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+@dataclass
+class ReplayConfig:
+    """
+    Record/replay of site traffic, so discovery and extraction can run without the network.
+
+    A replay directory holds two HAR files: `browser.har` (Playwright, via route_from_har)
+    and `http.har` (plain HTTP fetchers such as the sitemap reader, via HarAdapter).
+
+    - record: requests go to the live site and every response is written to the HARs
+    - replay: requests are answered from the HARs; anything not recorded fails fast
+    """
+
+    replay_dir: str
+    mode: str = REPLAY
+
+    @property
+    def browser_har_path(self) -> str:
+        return str(Path(self.replay_dir) / "browser.har")
+
+    @property
+    def http_har_path(self) -> str:
+        return str(Path(self.replay_dir) / "http.har")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+
+_ACTIVE: Optional[ReplayConfig] = None
+_HTTP_ARCHIVE: Optional["HarArchive"] = None
+
+
+def configure_replay(replay_dir: Optional[str], mode: str = REPLAY) -> Optional[ReplayConfig]:
+    """
+    Turn record/replay on for the rest of the process (None turns it off).
+
+    Must be called before the first browser session starts; sessions pick it up at launch.
+    """
+    global _ACTIVE, _HTTP_ARCHIVE
+    if mode not in {RECORD, REPLAY}:
+        raise ValueError(f"Unknown replay mode: {mode}")
+    _ACTIVE = ReplayConfig(replay_dir=replay_dir, mode=mode) if replay_dir else None
+    _HTTP_ARCHIVE = None
+    if _ACTIVE is not None:
+        if _ACTIVE.recording:
+            Path(replay_dir).mkdir(parents=True, exist_ok=True)
+        elif not Path(_ACTIVE.browser_har_path).exists() and not Path(_ACTIVE.http_har_path).exists():
+            raise FileNotFoundError(f"No recorded HAR files in {replay_dir}. Record a corpus first.")
+        logger.info("HTTP %s mode: %s", mode, replay_dir)
+    return _ACTIVE
+
+
+def active_replay() -> Optional[ReplayConfig]:
+    return _ACTIVE
+
+
+def apply_to_context(context) -> None:
+    """Route a Playwright BrowserContext through the active replay config (no-op when off)."""
+    cfg = _ACTIVE
+    if cfg is None:
+        return
+    if cfg.recording:
+        # The HAR is written when the context closes.
+        context.route_from_har(cfg.browser_har_path, update=True, update_content="embed", update_mode="full")
+    elif Path(cfg.browser_har_path).exists():
+        context.route_from_har(cfg.browser_har_path, not_found="abort")
+    else:
+        raise FileNotFoundError(f"No browser HAR at {cfg.browser_har_path}")
+
+
+class HarArchive:
+    """
+    Minimal HAR 1.2 store for non-browser HTTP traffic.
+
+    Entries are matched on (method, url). Repeated requests for the same URL are answered in
+    recorded order, and the last response is reused once they run out.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: List[Dict[str, Any]] = []
+        self._by_key: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "HarArchive":
+        archive = cls(path)
+        if archive.path.exists():
+            har = json.loads(archive.path.read_text(encoding="utf-8"))
+            for entry in (har.get("log") or {}).get("entries") or []:
+                archive._index(entry)
+        return archive
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self.entries.append(entry)
+        req = entry.get("request") or {}
+        key = ((req.get("method") or "GET").upper(), req.get("url") or "")
+        self._by_key.setdefault(key, []).append(entry)
+
+    def lookup(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        key = (method.upper(), url)
+        candidates = self._by_key.get(key)
+        if not candidates:
+            return None
+        n = self._served.get(key, 0)
+        self._served[key] = n + 1
+        return candidates[min(n, len(candidates) - 1)]
+
+    def add(self, method: str, url: str, status: int, reason: str, headers: Dict[str, str], body: bytes) -> Dict[str, Any]:
+        entry = {
+            "startedDateTime": "",
+            "time": 0,
+            "request": {"method": method.upper(), "url": url, "headers": [], "queryString": []},
+            "response": {
+                "status": status,
+                "statusText": reason or "",
+                "headers": [{"name": k, "value": v} for k, v in headers.items()],
+                "content": {
+                    "size": len(body),
+                    "mimeType": headers.get("Content-Type", ""),
+                    "text": base64.b64encode(body).decode("ascii"),
+                    "encoding": "base64",
+                },
+            },
+        }
+        self._index(entry)
+        self._dirty = True
+        return entry
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        har = {"log": {"version": "1.2", "creator": {"name": "spec_pipeline", "version": "1"}, "entries": self.entries}}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(har), encoding="utf-8")
+        tmp.replace(self.path)
+        self._dirty = False
+        logger.info("Wrote %s HTTP entries to %s", len(self.entries), self.path)
+
+
+def _entry_body(entry: Dict[str, Any]) -> bytes:
+    content = (entry.get("response") or {}).get("content") or {}
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+class HarAdapter(HTTPAdapter):
+    """
+    requests transport adapter that records to / replays from a HarArchive.
+
+    Responses are rebuilt from the stored bytes in both modes, so callers that stream from
+    `response.raw` behave the same whether the body came from the network or the archive.
+    """
+
+    def __init__(self, archive: HarArchive, recording: bool):
+        super().__init__()
+        self.archive = archive
+        self.recording = recording
+
+    def send(self, request, **kwargs):
+        if self.recording:
+            live = super().send(request, **kwargs)
+            body = live.raw.read(decode_content=True)
+            live.close()
+            headers = {k: v for k, v in live.headers.items() if k.lower() not in _HOP_HEADERS}
+            entry = self.archive.add(request.method, request.url, live.status_code, live.reason, headers, body)
+        else:
+            entry = self.archive.lookup(request.method, request.url)
+            if entry is None:
+                raise requests.ConnectionError(f"Not in replay archive: {request.method} {request.url}", request=request)
+
+        resp = entry.get("response") or {}
+        raw = HTTPResponse(
+            body=io.BytesIO(_entry_body(entry)),
+            headers={
+                h["name"]: h["value"] for h in resp.get("headers") or [] if h.get("name", "").lower() not in _HOP_HEADERS
+            },
+            status=int(resp.get("status") or 200),
+            reason=resp.get("statusText") or None,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+def http_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """requests.Session for plain HTTP fetches, routed through the active replay config."""
+    global _HTTP_ARCHIVE
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    cfg = _ACTIVE
+    if cfg is not None:
+        if _HTTP_ARCHIVE is None:
+            _HTTP_ARCHIVE = HarArchive.load(cfg.http_har_path)
+        adapter = HarAdapter(_HTTP_ARCHIVE, recording=cfg.recording)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+
+def save_recordings() -> None:
+    if _HTTP_ARCHIVE is not None:
+        _HTTP_ARCHIVE.save()
+
+
+atexit.register(save_recordings)
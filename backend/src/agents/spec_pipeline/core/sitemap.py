@@ -0,0 +1,104 @@
+import gzip
+import io
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Dict, IO, Iterator, List, Optional, Set
+
+import requests
+
+from agents.spec_pipeline.core.replay import http_session
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/xml,text/xml;q=0.9,*/*;q=0.8",
+}
+
+
+@dataclass
+class SitemapEntry:
+    loc: str
+    lastmod: Optional[str] = None
+
+
+def _local(tag: str) -> str:
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}url" -> "url"
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_stream(url: str, session: requests.Session, timeout: int) -> IO[bytes]:
+    """
+    Streamed response body, transparently gunzipped.
+
+    Content-Encoding: gzip is handled by urllib3 (decode_content); `.xml.gz` files served as
+    application/x-gzip are detected by their magic bytes.
+    """
+    resp = session.get(url, stream=True, timeout=timeout)
+    resp.raise_for_status()
+    resp.raw.decode_content = True
+    # urllib3 closes the raw stream at EOF by default, and BufferedReader then fails the final read.
+    resp.raw.auto_close = False
+    buffered = io.BufferedReader(resp.raw)
+    if buffered.peek(2)[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=buffered)
+    return buffered
+
+
+def iter_sitemap(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: int = 30,
+    child_filter: Optional[List[str]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    _seen: Optional[Set[str]] = None,
+) -> Iterator[SitemapEntry]:
+    """
+    Yield <url> entries from a sitemap or sitemap index without loading the whole document.
+
+    Sitemap indexes are followed recursively; `child_filter` (substrings) restricts which child
+    sitemaps are fetched, e.g. ["product"] to skip blog/category sitemaps.
+    """
+    if session is None:
+        session = http_session(HEADERS)
+    seen = _seen if _seen is not None else set()
+    if url in seen:
+        return
+    seen.add(url)
+    if stats is not None:
+        stats["sitemaps_fetched"] = stats.get("sitemaps_fetched", 0) + 1
+
+    logger.info("Sitemap discovery: reading %s", url)
+    stream = _open_stream(url, session, timeout)
+    children: List[str] = []
+    try:
+        loc: Optional[str] = None
+        lastmod: Optional[str] = None
+        for event, elem in ET.iterparse(stream, events=("end",)):
+            name = _local(elem.tag)
+            if name == "loc":
+                loc = (elem.text or "").strip()
+            elif name == "lastmod":
+                lastmod = (elem.text or "").strip() or None
+            elif name == "url":
+                if loc:
+                    yield SitemapEntry(loc=loc, lastmod=lastmod)
+                loc, lastmod = None, None
+                elem.clear()  # keep memory flat on large sitemaps
+            elif name == "sitemap":
+                if loc and (not child_filter or any(f in loc for f in child_filter)):
+                    children.append(loc)
+                loc, lastmod = None, None
+                elem.clear()
+    finally:
+        stream.close()
+
+    for child in children:
+        yield from iter_sitemap(child, session=session, timeout=timeout, child_filter=child_filter, stats=stats, _seen=seen)
@@ -3,7 +3,12 @@ from typing import Any, Dict, List, Optional
 
 import re
 
-from bs4 import BeautifulSoup
+
+def _soup(table_html: str):
+    # bs4 loads on first use; normalization (and so every plugin import) pulls this module in.
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(table_html or "", "html.parser")
 
 
 @dataclass
@@ -21,7 +26,7 @@ def parse_html_table(table_html: str) -> ParsedHtmlTable:
     - support row header columns
     - normalize whitespace
     """
-    soup = BeautifulSoup(table_html or "", "html.parser")
+    soup = _soup(table_html)
     table = soup.find("table")
     if table is None:
         return ParsedHtmlTable(headers=[], rows=[])
@@ -68,7 +73,7 @@ def normalize_canon_still_file_size_table(table_html: str) -> Dict[str, Any]:
     pack the other columns into value_text (JSON-like string) for now. We can later split into separate
     matrix specs (possible_shots, max_burst) if desired.
     """
-    soup = BeautifulSoup(table_html or "", "html.parser")
+    soup = _soup(table_html)
     table = soup.find("table")
     if table is None:
         return {"dims": ["format_group", "quality"], "value_fields": ["file_size_mb", "possible_shots", "max_burst"], "cells": []}
@@ -149,7 +154,7 @@ def normalize_canon_playback_display_format_table(table_html: str) -> Dict[str,
 
     Note: some rows use colspan=2 for Still Photo + Movie. We store that value into both.
     """
-    soup = BeautifulSoup(table_html or "", "html.parser")
+    soup = _soup(table_html)
     table = soup.find("table")
     if table is None:
         return {"dims": ["item"], "value_fields": ["still_photo", "movie"], "cells": []}
@@ -246,7 +251,7 @@ def normalize_canon_wifi_security_table(table_html: str) -> Dict[str, Any]:
     Note: some rows collapse Encryption+Key columns into a single "Disable" value.
     We store that as encryption="Disable", key_format_and_length=null.
     """
-    soup = BeautifulSoup(table_html or "", "html.parser")
+    soup = _soup(table_html)
     table = soup.find("table")
     if table is None:
         return {
@@ -4,6 +4,31 @@ from typing import Optional
 
 _BULLETS = ["\u2022", "•", "\u25cf", "\u25aa"]
 
+# One translate() pass replaces the old chain of str.replace calls.
+_SPEC_VALUE_TRANSLATION = str.maketrans(
+    {
+        # Normalize odd spaces
+        "\u00a0": " ",  # NBSP
+        "\u2009": " ",  # thin space
+        "\u202f": " ",  # narrow no-break space
+        # Convert HTML unicode to ASCII equivalents (preserve meaning for lens/camera names)
+        "\u2013": "-",  # en dash → hyphen (e.g., "28-70mm")
+        "\u2212": "-",  # minus sign → hyphen
+        "\u00f7": "/",  # division sign → slash (e.g., "F/2.8")
+        "\u2044": "/",  # fraction slash → slash
+        "\u2215": "/",  # division slash → slash
+        # Turn bullets into newlines so UIs can render lists cleanly
+        **{b: "\n- " for b in _BULLETS},
+    }
+)
+
+_HSPACE_RUN_RE = re.compile(r"[ \t]+")
+_WHITESPACE_RUN_RE = re.compile(r"\s+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+# Canon pages sometimes leak weird artifacts like "@999br/>" into labels
+_CANON_BR_ARTIFACT_RE = re.compile(r"@\s*\d+\s*br\s*/?>", re.IGNORECASE)
+
 
 def clean_text_for_spec_value(raw: Optional[str]) -> str:
     """
@@ -15,33 +40,57 @@ def clean_text_for_spec_value(raw: Optional[str]) -> str:
         return ""
 
     s = str(raw)
+    # Every character in the table is non-ASCII; skip the per-character pass for plain ASCII.
+    if not s.isascii():
+        s = s.translate(_SPEC_VALUE_TRANSLATION)
 
-    # Normalize odd spaces
-    s = s.replace("\u00a0", " ")  # NBSP
-    s = s.replace("\u2009", " ")  # thin space
-    s = s.replace("\u202f", " ")  # narrow no-break space
+    # Collapse whitespace on each line, preserve newlines.
+    # [ \t] never spans a line break, so collapsing the whole string at once is equivalent.
+    if "\t" in s or "  " in s:
+        s = _HSPACE_RUN_RE.sub(" ", s)
 
-    # Convert HTML unicode to ASCII equivalents (preserve meaning for lens/camera names)
-    s = s.replace("\u2013", "-")      # en dash → hyphen (e.g., "28-70mm")
-    s = s.replace("\u2014", "—")      # em dash → em dash  
-    s = s.replace("\u2212", "-")      # minus sign → hyphen
-    s = s.replace("\u00f7", "/")      # division sign → slash (e.g., "F/2.8")
-    s = s.replace("\u2044", "/")      # fraction slash → slash
-    s = s.replace("\u2215", "/")      # division slash → slash
+    lines = s.splitlines()
+    if len(lines) <= 1:
+        return lines[0].strip() if lines else ""
 
-    # Turn bullets into newlines so UIs can render lists cleanly
-    for b in _BULLETS:
-        s = s.replace(b, "\n- ")
+    s = "\n".join([line.strip() for line in lines]).strip()
 
-    # Common separator cleanup
-    s = s.replace("•  ", "\n- ")
-    s = s.replace("• ", "\n- ")
+    # Collapse excessive blank lines
+    return _BLANK_LINES_RE.sub("\n\n", s).strip()
 
-    # Collapse whitespace on each line, preserve newlines
-    s = "\n".join([re.sub(r"[ \t]+", " ", line).strip() for line in s.splitlines()]).strip()
 
-    # Collapse excessive blank lines
-    s = re.sub(r"\n{3,}", "\n\n", s).strip()
+def clean_label(text: Optional[str]) -> str:
+    """
+    Cleanup for section/label strings coming from HTML extraction.
 
-    return s
+    Removes leaked tags and "@999br/>" artifacts, then collapses all whitespace
+    (tabs, newlines, NBSP) to single spaces.
+    """
+    s = (text or "").strip()
+    if not s:
+        return ""
+
+    if "<" in s:
+        s = _HTML_TAG_RE.sub(" ", s)
+    if "@" in s:
+        s = _CANON_BR_ARTIFACT_RE.sub(" ", s)
+
+    # str.split() and re's \s agree on what counts as whitespace.
+    return " ".join(s.split())
+
+
+def label_group_key(label: Optional[str]) -> str:
+    """
+    Conservative grouping key for raw labels: lowercase, trailing ":" dropped,
+    whitespace runs collapsed, en/em dashes folded to "-".
+    """
+    s = (label or "").strip().lower().rstrip(":")
+    if s.isascii() and s.isprintable():
+        # Printable ASCII has no whitespace besides " ", so only double spaces need collapsing.
+        return _WHITESPACE_RUN_RE.sub(" ", s) if "  " in s else s
 
+    s = _WHITESPACE_RUN_RE.sub(" ", s)
+    if s.isascii():
+        return s
+    # Two characters only: replace() beats a per-character translate() here.
+    return s.replace("\u2013", "-").replace("\u2014", "-")
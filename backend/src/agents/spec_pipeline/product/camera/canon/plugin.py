@@ -9,7 +9,7 @@ import json
 from pathlib import Path
 
 from agents.spec_pipeline.core.discovery import DiscoveryConfig
-from agents.spec_pipeline.core.extraction import ExtractionConfig, extract
+from agents.spec_pipeline.core.extraction import ExtractionConfig, extract_inventory
 from agents.spec_pipeline.core.normalization import NormalizationConfig, normalize_extractions
 
 BRAND_SLUG = "canon"
@@ -62,6 +62,7 @@ NORMALIZATION_CONFIG = NormalizationConfig(
     product_type=PRODUCT_TYPE,
     category_slug=CATEGORY_SLUG,
     output_path="data/company_product/canon/processed_data/camera/normalized.json",
+    rule_cache_path="data/company_product/_cache/spec_rules_snapshot.json",
 )
 
 
@@ -72,11 +73,14 @@ def extract_urls(url_inventory_path: str) -> str:
     """
     inv_path = Path(url_inventory_path)
     inventory = json.loads(inv_path.read_text(encoding="utf-8"))
-    urls = inventory.get("urls", [])
-
-    payload = extract(EXTRACTION_CONFIG, urls)
 
     out_path = Path(EXTRACTION_CONFIG.output_path)
+    previous = None
+    if EXTRACTION_CONFIG.incremental and out_path.exists():
+        # Only added/changed products are fetched; the rest is carried over from the last run.
+        previous = json.loads(out_path.read_text(encoding="utf-8"))
+    payload = extract_inventory(EXTRACTION_CONFIG, inventory, previous_payload=previous)
+
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     return str(out_path)
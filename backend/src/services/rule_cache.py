@@ -0,0 +1,156 @@
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes so stale files are ignored rather than misread.
+SNAPSHOT_FORMAT = 1
+
+# One round trip, one row back: md5 over both rule tables computed server-side.
+_VERSION_STAMP_SQL = """
+    SELECT
+      (SELECT md5(COALESCE(string_agg(
+          id::text || '|' || normalized_key || '|' || COALESCE(display_name, '') || '|' ||
+          COALESCE(data_type, '') || '|' || COALESCE(unit, ''),
+          ',' ORDER BY id), ''))
+       FROM spec_definition),
+      (SELECT md5(COALESCE(string_agg(
+          id::text || '|' || spec_definition_id::text || '|' || extraction_pattern || '|' ||
+          COALESCE(context_pattern, '') || '|' || COALESCE(priority, 0)::text,
+          ',' ORDER BY id), ''))
+       FROM spec_mapping)
+"""
+
+
+def _normalize_pattern(p: str) -> str:
+    """
+    Our SQL seeds often contain double-backslashes (e.g. '\\\\s') because they're written
+    with Postgres in mind. Python's `re` expects single-backslashes (e.g. '\\s').
+    Normalize here so one ruleset can serve both.
+    """
+    return (p or "").replace("\\\\", "\\")
+
+
+@dataclass
+class RuleSnapshot:
+    """
+    Serializable copy of spec_definition + spec_mapping as SpecMapperService uses them.
+
+    `mapping_rows` are already priority-ordered and hold backslash-normalized patterns.
+    """
+
+    version_stamp: str
+    definitions: Dict[str, Dict[str, Any]]
+    mapping_rows: List[Dict[str, Any]]
+    built_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    format: int = SNAPSHOT_FORMAT
+
+
+def fetch_version_stamp(conn) -> Optional[str]:
+    """Cheap staleness check: a content hash of both rule tables, or None if it can't be computed."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_VERSION_STAMP_SQL)
+            defs_md5, mappings_md5 = cur.fetchone()
+        return f"{defs_md5}:{mappings_md5}"
+    except Exception as e:
+        logger.warning(f"Could not compute spec rule version stamp: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return None
+
+
+def fetch_snapshot(conn, version_stamp: Optional[str]) -> RuleSnapshot:
+    """Loads both rule tables from the database."""
+    with conn.cursor() as cur:
+        # NOTE: schema uses singular table names (spec_definition/spec_mapping)
+        cur.execute("SELECT id, normalized_key, display_name, data_type, unit FROM spec_definition")
+        definitions: Dict[str, Dict[str, Any]] = {}
+        for row in cur.fetchall():
+            definitions[row[0]] = {
+                "normalized_key": row[1],
+                "name": row[2],
+                "type": row[3],
+                "unit": row[4],
+            }
+
+        cur.execute("""
+            SELECT spec_definition_id, extraction_pattern, context_pattern, priority, id
+            FROM spec_mapping
+            ORDER BY priority DESC
+        """)
+        mapping_rows = [
+            {
+                "def_id": row[0],
+                "pattern": _normalize_pattern(row[1]),
+                "context": _normalize_pattern(row[2]) if row[2] else None,
+                "priority": row[3],
+                "rule_id": str(row[4]),
+            }
+            for row in cur.fetchall()
+        ]
+
+    return RuleSnapshot(version_stamp=version_stamp or "", definitions=definitions, mapping_rows=mapping_rows)
+
+
+def load_snapshot(path: Path) -> Optional[RuleSnapshot]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable spec rule snapshot {path}: {e}")
+        return None
+
+    if data.get("format") != SNAPSHOT_FORMAT:
+        return None
+    try:
+        return RuleSnapshot(**data)
+    except TypeError:
+        return None
+
+
+def save_snapshot(path: Path, snapshot: RuleSnapshot) -> None:
+    """Atomic write (tmp file + rename) so a concurrent reader never sees a partial snapshot."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(asdict(snapshot), ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+# version_stamp -> compiled rules; lets every SpecMapperService in a process share one compile.
+_COMPILED_RULES: Dict[str, List[Dict[str, Any]]] = {}
+
+
+def compile_snapshot(snapshot: RuleSnapshot) -> List[Dict[str, Any]]:
+    """
+    Compiles mapping rows into the rule dicts map_spec iterates over.
+
+    Results are memoized per version stamp, so a rule change compiles once and an unchanged
+    ruleset is never recompiled within a process.
+    """
+    stamp = snapshot.version_stamp
+    if stamp and stamp in _COMPILED_RULES:
+        return _COMPILED_RULES[stamp]
+
+    rules = [
+        {
+            "def_id": row["def_id"],
+            "pattern": re.compile(row["pattern"], re.IGNORECASE),
+            "context": re.compile(row["context"], re.IGNORECASE) if row.get("context") else None,
+            "priority": row["priority"],
+            "rule_id": row.get("rule_id"),
+        }
+        for row in snapshot.mapping_rows
+    ]
+    if stamp:
+        _COMPILED_RULES.clear()  # only the current ruleset is worth keeping
+        _COMPILED_RULES[stamp] = rules
+    return rules
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+
+class RuleProfiler:
+    """
+    Per-rule counters for SpecMapperService.map_spec.
+
+    Indexed by the rule's position in `SpecMapperService.mappings` (evaluation order).
+    For each rule we count:
+    - evaluations: how many lookups reached this rule (i.e. no earlier rule matched)
+    - context_rejections: skipped because context_pattern did not match (or no context given)
+    - key_evaluations: extraction_pattern was actually run
+    - matches: the rule won the lookup
+    - time_ns: cumulative regex time spent on this rule (context + key)
+    """
+
+    def __init__(self, rule_count: int = 0):
+        self.lookups = 0
+        self.unmatched_lookups = 0
+        self.evaluations: List[int] = []
+        self.context_rejections: List[int] = []
+        self.key_evaluations: List[int] = []
+        self.matches: List[int] = []
+        self.time_ns: List[int] = []
+        self.resize(rule_count)
+
+    def resize(self, rule_count: int) -> None:
+        for counters in (self.evaluations, self.context_rejections, self.key_evaluations, self.matches, self.time_ns):
+            if len(counters) < rule_count:
+                counters.extend([0] * (rule_count - len(counters)))
+
+    def build_report(self, mappings: List[Dict[str, Any]], definitions: Dict[Any, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        JSON-serializable report.
+
+        `rules` keeps evaluation order; `dead_rules` never matched; `hot_rules` are ranked by
+        matches and `expensive_rules` by cumulative time, to guide pruning/reordering.
+        """
+        self.resize(len(mappings))
+        total_time_ns = sum(self.time_ns) or 1
+
+        rules: List[Dict[str, Any]] = []
+        for i, rule in enumerate(mappings):
+            definition = definitions.get(rule.get("def_id")) or {}
+            evaluations = self.evaluations[i]
+            rules.append(
+                {
+                    "position": i,
+                    "rule_id": rule.get("rule_id"),
+                    "normalized_key": definition.get("normalized_key"),
+                    "priority": rule.get("priority"),
+                    "extraction_pattern": rule["pattern"].pattern,
+                    "context_pattern": rule["context"].pattern if rule.get("context") else None,
+                    "evaluations": evaluations,
+                    "context_rejections": self.context_rejections[i],
+                    "key_evaluations": self.key_evaluations[i],
+                    "matches": self.matches[i],
+                    "match_rate": round(self.matches[i] / evaluations, 6) if evaluations else 0.0,
+                    "time_ms": round(self.time_ns[i] / 1e6, 3),
+                    "avg_time_us": round(self.time_ns[i] / evaluations / 1e3, 3) if evaluations else 0.0,
+                    "time_share": round(self.time_ns[i] / total_time_ns, 6),
+                }
+            )
+
+        def _summary(r: Dict[str, Any]) -> Dict[str, Any]:
+            return {k: r[k] for k in ("position", "rule_id", "normalized_key", "extraction_pattern", "matches", "time_ms")}
+
+        dead = [_summary(r) for r in rules if r["matches"] == 0]
+        hot = [_summary(r) for r in sorted(rules, key=lambda r: r["matches"], reverse=True) if r["matches"] > 0]
+        expensive = [_summary(r) for r in sorted(rules, key=lambda r: r["time_ms"], reverse=True)]
+
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "totals": {
+                "rules": len(rules),
+                "lookups": self.lookups,
+                "unmatched_lookups": self.unmatched_lookups,
+                "rules_matched": len(rules) - len(dead),
+                "dead_rules": len(dead),
+                "regex_time_ms": round(sum(self.time_ns) / 1e6, 3),
+            },
+            "hot_rules": hot[:25],
+            "expensive_rules": expensive[:25],
+            "dead_rules": dead,
+            "rules": rules,
+        }
@@ -1,119 +1,214 @@
-import re
 import logging
+import time
+from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 
+from services.rule_cache import (
+    RuleSnapshot,
+    compile_snapshot,
+    fetch_snapshot,
+    fetch_version_stamp,
+    load_snapshot,
+    save_snapshot,
+)
+from services.rule_profiler import RuleProfiler
+from services.spec_value_parser import SpecValueParser
+from services.unit_registry import DEFAULT_UNIT_REGISTRY, UnitRegistry
+
 logger = logging.getLogger(__name__)
 
 class SpecMapperService:
-    def __init__(self, db_connection):
+    def __init__(
+        self,
+        db_connection,
+        unit_registry: Optional[UnitRegistry] = None,
+        profile: bool = False,
+        rule_cache_path: Optional[str] = None,
+        snapshot: Optional[RuleSnapshot] = None,
+    ):
         self.conn = db_connection
         self.mappings = []
         self.definitions = {} # cache definitions
-        self._load_rules()
+        self.value_parser = SpecValueParser()
+        self.units = unit_registry or DEFAULT_UNIT_REGISTRY
+        # On-disk rule snapshot keyed by a DB version stamp (see services/rule_cache.py).
+        self.rule_cache_path = Path(rule_cache_path) if rule_cache_path else None
+        self.rules_version: Optional[str] = None
+        # The ruleset currently applied; normalization saves it so a later run can diff rules.
+        self.snapshot: Optional[RuleSnapshot] = None
+        self._profile = profile
+        self.profiler: Optional[RuleProfiler] = None
+        if snapshot is not None:
+            # In-memory ruleset (e.g. parsed from seed SQL by the benchmarks); no DB needed.
+            self._apply_snapshot(snapshot)
+        else:
+            self._load_rules()
 
     def _load_rules(self):
-        """Loads mappings and definitions from the database."""
+        """
+        Loads mappings and definitions.
+
+        With a rule_cache_path, the DB is asked only for a version stamp; when it matches the
+        snapshot on disk the rule rows are read from the snapshot instead of Postgres.
+        """
         try:
-            with self.conn.cursor() as cur:
-                # Load Definitions
-                # NOTE: schema uses singular table names (spec_definition/spec_mapping)
-                cur.execute("SELECT id, normalized_key, display_name, data_type, unit FROM spec_definition")
-                for row in cur.fetchall():
-                    self.definitions[row[0]] = {
-                        "normalized_key": row[1],
-                        "name": row[2],
-                        "type": row[3],
-                        "unit": row[4],
-                    }
-
-                # Load Mappings
-                cur.execute("""
-                    SELECT spec_definition_id, extraction_pattern, context_pattern, priority 
-                    FROM spec_mapping 
-                    ORDER BY priority DESC
-                """)
-
-                def _normalize_pattern(p: str) -> str:
-                    """
-                    Our SQL seeds often contain double-backslashes (e.g. '\\\\s') because they're written
-                    with Postgres in mind. Python's `re` expects single-backslashes (e.g. '\\s').
-                    Normalize here so one ruleset can serve both.
-                    """
-                    return (p or "").replace("\\\\", "\\")
-
-                # Store as list of dicts for iteration
-                self.mappings = [
-                    {
-                        "def_id": row[0],
-                        "pattern": re.compile(_normalize_pattern(row[1]), re.IGNORECASE),
-                        "context": re.compile(_normalize_pattern(row[2]), re.IGNORECASE) if row[2] else None,
-                        "priority": row[3]
-                    }
-                    for row in cur.fetchall()
-                ]
-                logger.info(f"Loaded {len(self.mappings)} spec mapping rules.")
+            stamp = fetch_version_stamp(self.conn)
+
+            snapshot = None
+            if stamp and self.rule_cache_path:
+                cached = load_snapshot(self.rule_cache_path)
+                if cached and cached.version_stamp == stamp:
+                    snapshot = cached
+                    logger.info(f"Using cached spec rules ({self.rule_cache_path}).")
+
+            if snapshot is None:
+                snapshot = fetch_snapshot(self.conn, stamp)
+                if stamp and self.rule_cache_path:
+                    try:
+                        save_snapshot(self.rule_cache_path, snapshot)
+                    except Exception as e:
+                        logger.warning(f"Could not write spec rule snapshot: {e}")
+
+            self._apply_snapshot(snapshot)
+            logger.info(f"Loaded {len(self.mappings)} spec mapping rules.")
         except Exception as e:
             logger.error(f"Failed to load spec rules: {e}")
 
-    def map_spec(self, raw_key: str, raw_context: str = "", raw_value: str = "") -> Optional[Dict[str, Any]]:
+    def _apply_snapshot(self, snapshot: RuleSnapshot) -> None:
+        self.snapshot = snapshot
+        self.definitions = snapshot.definitions
+        # Store as list of dicts for iteration
+        self.mappings = compile_snapshot(snapshot)
+        self.rules_version = snapshot.version_stamp or None
+        # Counters are positional, so a new ruleset starts a fresh profile.
+        self.profiler = RuleProfiler(len(self.mappings)) if self._profile else None
+
+    def refresh_rules(self) -> bool:
+        """
+        Hot-reload: re-check the DB version stamp and reload rules only if they changed.
+
+        Returns True when a new ruleset was loaded. Long-lived services can call this
+        between batches; the check is a single one-row query.
+        """
+        stamp = fetch_version_stamp(self.conn)
+        if stamp is not None and stamp == self.rules_version:
+            return False
+        self._load_rules()
+        return True
+
+    def map_spec(
+        self,
+        raw_key: str,
+        raw_context: str = "",
+        raw_value: str = "",
+        parse_value: bool = True,
+    ) -> Optional[Dict[str, Any]]:
         """
         Matches a raw spec key/context to a canonical definition.
         Returns a dict with definition_id and parsed values.
+
+        With parse_value=False only the definition is resolved; callers are expected to
+        fill the typed fields later in bulk via `parse_values`.
         """
         best_match = None
 
-        for rule in self.mappings:
-            # Check context first if it exists
-            if rule["context"]:
-                if not raw_context or not rule["context"].search(raw_context):
-                    continue
-            
-            # Check key pattern
-            if rule["pattern"].search(raw_key):
-                best_match = rule
-                break # Since we ordered by priority DESC, the first match is the best
+        if self.profiler is not None:
+            best_match = self._match_rule_profiled(raw_key, raw_context)
+        else:
+            for rule in self.mappings:
+                # Check context first if it exists
+                if rule["context"]:
+                    if not raw_context or not rule["context"].search(raw_context):
+                        continue
+
+                # Check key pattern
+                if rule["pattern"].search(raw_key):
+                    best_match = rule
+                    break # Since we ordered by priority DESC, the first match is the best
 
         if not best_match:
             return None
 
         def_id = best_match["def_id"]
         definition = self.definitions.get(def_id)
-        
+
+        if not parse_value:
+            return {
+                "spec_definition_id": def_id,
+                "numeric_value": None,
+                "min_value": None,
+                "max_value": None,
+                "boolean_value": None,
+                "unit_used": None,
+                "canonical_value": None,
+                "canonical_min_value": None,
+                "canonical_max_value": None,
+                "canonical_unit": None,
+                "value_text": raw_value,
+            }
+
         # Parse value based on type
-        parsed = self._parse_value(raw_value, definition["type"])
-        
+        columns = self.parse_values(def_id, [(raw_value or "").strip() or None])
+        parsed = {col: values[0] for col, values in columns.items()}
+
         return {
             "spec_definition_id": def_id,
-            "numeric_value": parsed.get("numeric"),
-            "boolean_value": parsed.get("boolean"),
-            "unit_used": parsed.get("unit") or definition["unit"],
-            "value_text": parsed.get("text")
+            **parsed,
+            "unit_used": parsed.get("unit_used") or definition["unit"],
+            "value_text": raw_value,
         }
 
-    def _parse_value(self, value: str, data_type: str) -> Dict[str, Any]:
-        """Parses the raw value string into structured data."""
-        result = {"text": value, "numeric": None, "boolean": None, "unit": None}
-        
-        if not value:
-            return result
-
-        clean_val = value.strip()
-
-        if data_type == 'number':
-            # Extract first number found
-            match = re.search(r'([\d\.]+)', clean_val)
-            if match:
-                try:
-                    result["numeric"] = float(match.group(1))
-                    # Try to find unit after number
-                    # This is naive; a better regex would be passed in per rule
-                except ValueError:
-                    pass
-        
-        elif data_type == 'boolean':
-            if clean_val.lower() in ['yes', 'true', 'on', 'supported']:
-                result["boolean"] = True
-            elif clean_val.lower() in ['no', 'false', 'off', 'n/a']:
-                result["boolean"] = False
-
-        return result
+    def _match_rule_profiled(self, raw_key: str, raw_context: str) -> Optional[Dict[str, Any]]:
+        """Same first-match semantics as map_spec, recording per-rule counters and regex time."""
+        prof = self.profiler
+        prof.resize(len(self.mappings))
+        prof.lookups += 1
+        clock = time.perf_counter_ns
+
+        for i, rule in enumerate(self.mappings):
+            prof.evaluations[i] += 1
+            start = clock()
+            if rule["context"]:
+                if not raw_context or not rule["context"].search(raw_context):
+                    prof.time_ns[i] += clock() - start
+                    prof.context_rejections[i] += 1
+                    continue
+
+            prof.key_evaluations[i] += 1
+            matched = rule["pattern"].search(raw_key) is not None
+            prof.time_ns[i] += clock() - start
+            if matched:
+                prof.matches[i] += 1
+                return rule
+
+        prof.unmatched_lookups += 1
+        return None
+
+    def profile_report(self) -> Optional[Dict[str, Any]]:
+        """Rule coverage/timing report, or None when profiling is disabled."""
+        if self.profiler is None:
+            return None
+        return self.profiler.build_report(self.mappings, self.definitions)
+
+    def parse_values(self, def_id: Any, values: List[Optional[str]]) -> Dict[str, List[Any]]:
+        """
+        Parses every raw value observed for one spec_definition in a single batch.
+
+        Returns column arrays aligned with `values` (numeric_value, min_value, max_value,
+        unit_used, boolean_value). unit_used falls back to the definition unit when a
+        number was found but the source did not state a unit.
+
+        The source numbers are kept as-is; canonical_value/canonical_min_value/
+        canonical_max_value/canonical_unit carry the same numbers converted into
+        spec_definition.unit so values from different brands can be range-filtered together.
+        """
+        definition = self.definitions.get(def_id) or {}
+        unit = definition.get("unit")
+        columns = self.value_parser.parse_batch(values, definition.get("type") or "text", unit)
+        if unit:
+            columns["unit_used"] = [
+                u or (unit if n is not None or lo is not None else None)
+                for u, n, lo in zip(columns["unit_used"], columns["numeric_value"], columns["min_value"])
+            ]
+        columns.update(self.units.canonical_columns(columns, unit))
+        return columns
@@ -0,0 +1,190 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from services.unit_registry import UNIT_ALIASES, canonical_unit_symbol
+
+
+_TRUE_WORDS = {"yes", "true", "on", "supported"}
+_FALSE_WORDS = {"no", "false", "off", "n/a"}
+
+# Translate typographic variants once so the numeric patterns stay simple.
+_VALUE_TRANSLATION = str.maketrans(
+    {
+        "\u00a0": " ",  # NBSP
+        "\u2009": " ",  # thin space
+        "\u202f": " ",  # narrow no-break space
+        "\u2013": "-",  # en dash
+        "\u2014": "-",  # em dash
+        "\u2212": "-",  # minus sign
+        "\u2044": "/",  # fraction slash
+        "\u2215": "/",  # division slash
+        "\uff5e": "~",  # fullwidth tilde
+    }
+)
+
+_THOUSANDS_SEP_RE = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+_NUM = r"\d+(?:\.\d+)?|\.\d+"
+# A term is either a fraction ("1/8000") or a plain number; an optional sign is allowed
+# only when it does not directly follow a digit (so "100-51200" reads as a range).
+_TERM = rf"(?<![\d.])[+-]?(?:(?:{_NUM})\s*/\s*(?:{_NUM})|(?:{_NUM}))"
+_RANGE_SEP = r"\s*(?:-|~|to)\s*"
+_VALUE = rf"(?P<pm>±\s*)?(?P<a>{_TERM})(?:{_RANGE_SEP}(?P<b>{_TERM}))?"
+
+
+# Aliases that are also separators: the magnification "x" must not swallow the
+# "x" in "6000 x 4000", so it only counts as a unit when no number follows.
+_ALIAS_GUARDS = {"x": r"(?!\s*\d)"}
+
+
+def _alias_alternation(aliases: Iterable[str]) -> str:
+    # Longest first so "mbps" wins over "mb" and "million pixels" over "m".
+    parts = sorted({a for a in aliases if a}, key=len, reverse=True)
+    return "|".join(re.escape(a) + _ALIAS_GUARDS.get(a.lower(), "") for a in parts)
+
+
+_ANY_UNIT = _alias_alternation(UNIT_ALIASES.keys())
+_UNIT_SUFFIX = rf"(?:\s*(?P<unit>{_ANY_UNIT})(?![A-Za-z]))?"
+_GENERIC_VALUE_RE = re.compile(_VALUE + _UNIT_SUFFIX, re.IGNORECASE)
+
+
+def _to_float(term: str) -> Optional[float]:
+    t = term.replace(" ", "")
+    try:
+        if "/" in t:
+            num, den = t.split("/", 1)
+            d = float(den)
+            if d == 0:
+                return None
+            return float(num) / d
+        return float(t)
+    except ValueError:
+        return None
+
+
+class _DefinitionPatterns:
+    """
+    Compiled patterns for one (data_type, unit) pair.
+
+    `preferred` only matches numbers followed by one of the definition's own unit aliases,
+    so "Approx. 1.62 lb / 738 g" resolves to 738 g for a definition whose unit is g.
+    `unit_anywhere` detects prefix-style units such as "ISO 100-51200".
+    """
+
+    def __init__(self, unit: Optional[str]):
+        self.unit = unit
+        self.preferred: Optional[Pattern[str]] = None
+        self.unit_anywhere: Optional[Pattern[str]] = None
+
+        if unit:
+            target = canonical_unit_symbol(unit)
+            aliases = [a for a, sym in UNIT_ALIASES.items() if sym == target]
+            aliases.append(unit.lower())
+            alternation = _alias_alternation(aliases)
+            self.preferred = re.compile(
+                _VALUE + rf"\s*(?P<unit>{alternation})(?![A-Za-z])",
+                re.IGNORECASE,
+            )
+            self.unit_anywhere = re.compile(rf"(?<![A-Za-z])(?:{alternation})(?![A-Za-z])", re.IGNORECASE)
+
+
+class SpecValueParser:
+    """
+    Batch parser for raw spec values.
+
+    Values for one spec_definition are parsed together: duplicates are parsed once, and
+    all regexes are compiled once per (data_type, unit) rather than per value.
+
+    `parse_batch` returns column arrays aligned with the input:
+      {"numeric_value": [...], "min_value": [...], "max_value": [...],
+       "unit_used": [...], "boolean_value": [...]}
+    """
+
+    COLUMNS = ("numeric_value", "min_value", "max_value", "unit_used", "boolean_value")
+
+    def __init__(self) -> None:
+        self._patterns: Dict[Tuple[str, Optional[str]], _DefinitionPatterns] = {}
+
+    def _patterns_for(self, data_type: str, unit: Optional[str]) -> _DefinitionPatterns:
+        key = (data_type or "text", unit)
+        patterns = self._patterns.get(key)
+        if patterns is None:
+            patterns = _DefinitionPatterns(unit)
+            self._patterns[key] = patterns
+        return patterns
+
+    def parse_batch(
+        self,
+        values: List[Optional[str]],
+        data_type: str,
+        unit: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        columns: Dict[str, List[Any]] = {c: [None] * len(values) for c in self.COLUMNS}
+        if data_type not in {"number", "range", "boolean"}:
+            return columns
+
+        patterns = self._patterns_for(data_type, unit)
+        parsed_by_value: Dict[Optional[str], Tuple[Any, ...]] = {}
+
+        for i, value in enumerate(values):
+            parsed = parsed_by_value.get(value)
+            if parsed is None:
+                if data_type == "boolean":
+                    parsed = (None, None, None, None, self._parse_boolean(value))
+                else:
+                    parsed = self._parse_numeric(value, patterns) + (None,)
+                parsed_by_value[value] = parsed
+
+            for col, v in zip(self.COLUMNS, parsed):
+                columns[col][i] = v
+
+        return columns
+
+    def parse_one(self, value: Optional[str], data_type: str, unit: Optional[str] = None) -> Dict[str, Any]:
+        columns = self.parse_batch([value], data_type, unit)
+        return {c: columns[c][0] for c in self.COLUMNS}
+
+    @staticmethod
+    def _parse_boolean(value: Optional[str]) -> Optional[bool]:
+        v = (value or "").strip().lower()
+        if v in _TRUE_WORDS:
+            return True
+        if v in _FALSE_WORDS:
+            return False
+        return None
+
+    @staticmethod
+    def _parse_numeric(
+        value: Optional[str],
+        patterns: _DefinitionPatterns,
+    ) -> Tuple[Optional[float], Optional[float], Optional[float], Optional[str]]:
+        if not value:
+            return None, None, None, None
+
+        s = _THOUSANDS_SEP_RE.sub("", value.translate(_VALUE_TRANSLATION))
+
+        m = patterns.preferred.search(s) if patterns.preferred else None
+        if m is None:
+            m = _GENERIC_VALUE_RE.search(s)
+        if m is None:
+            return None, None, None, None
+
+        a = _to_float(m.group("a"))
+        if a is None:
+            return None, None, None, None
+
+        unit_used = canonical_unit_symbol(m.group("unit"))
+        if unit_used is None and patterns.unit_anywhere and patterns.unit_anywhere.search(s):
+            unit_used = patterns.unit
+
+        if m.group("pm"):
+            return a, -abs(a), abs(a), unit_used
+
+        b_raw = m.group("b")
+        if b_raw:
+            b = _to_float(b_raw)
+            if b is not None:
+                lo, hi = (a, b) if a <= b else (b, a)
+                return a, lo, hi, unit_used
+
+        return a, None, None, unit_used
@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Observed unit spellings -> the symbol we store in unit_used.
+# Keys are lowercase; matching is case-insensitive.
+UNIT_ALIASES: Dict[str, str] = {
+    # mass
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "oz": "oz",
+    "oz.": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lb.": "lb",
+    "lbs": "lb",
+    "lbs.": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    # length
+    "mm": "mm",
+    "cm": "cm",
+    "m": "m",
+    "in": "in",
+    "in.": "in",
+    "inch": "in",
+    "inches": "in",
+    '"': "in",
+    "ft": "ft",
+    "ft.": "ft",
+    # time
+    "sec": "sec",
+    "sec.": "sec",
+    "secs": "sec",
+    "second": "sec",
+    "seconds": "sec",
+    "s": "sec",
+    "ms": "ms",
+    "min": "min",
+    "min.": "min",
+    "minutes": "min",
+    # imaging
+    "mp": "MP",
+    "megapixel": "MP",
+    "megapixels": "MP",
+    "million pixels": "MP",
+    "dots": "dots",
+    "dot": "dots",
+    "fps": "fps",
+    "shots": "shots",
+    "stops": "stops",
+    "stop": "stops",
+    "ev": "EV",
+    "x": "x",
+    "iso": "ISO",
+    # storage / electrical / misc
+    "mb": "MB",
+    "gb": "GB",
+    "mbps": "Mbps",
+    "mah": "mAh",
+    "wh": "Wh",
+    "w": "W",
+    "v": "V",
+    "hz": "Hz",
+    "k": "K",
+    "%": "%",
+    "°": "°",
+    "usd": "USD",
+}
+
+
+@dataclass(frozen=True)
+class UnitDef:
+    symbol: str
+    dimension: str
+    # Multiply a value in this unit by `factor` to get the dimension's base unit.
+    factor: float
+
+
+# symbol -> (dimension, factor to the dimension's base unit)
+_UNIT_TABLE: Dict[str, Tuple[str, float]] = {
+    # mass (base: g)
+    "g": ("mass", 1.0),
+    "kg": ("mass", 1000.0),
+    "oz": ("mass", 28.349523125),
+    "lb": ("mass", 453.59237),
+    # length (base: mm)
+    "mm": ("length", 1.0),
+    "cm": ("length", 10.0),
+    "m": ("length", 1000.0),
+    "in": ("length", 25.4),
+    "ft": ("length", 304.8),
+    # time (base: sec)
+    "sec": ("time", 1.0),
+    "ms": ("time", 0.001),
+    "min": ("time", 60.0),
+    # exposure (1 EV == 1 stop)
+    "stops": ("exposure", 1.0),
+    "EV": ("exposure", 1.0),
+    # storage, decimal prefixes as used on spec sheets (base: MB)
+    "MB": ("storage", 1.0),
+    "GB": ("storage", 1000.0),
+    # dimensionless / single-unit quantities
+    "MP": ("resolution", 1.0),
+    "dots": ("dots", 1.0),
+    "fps": ("frame_rate", 1.0),
+    "shots": ("shots", 1.0),
+    "x": ("magnification", 1.0),
+    "ISO": ("iso", 1.0),
+    "Mbps": ("bitrate", 1.0),
+    "mAh": ("charge", 1.0),
+    "Wh": ("energy", 1.0),
+    "W": ("power", 1.0),
+    "V": ("voltage", 1.0),
+    "Hz": ("frequency", 1.0),
+    "K": ("color_temperature", 1.0),
+    "%": ("percent", 1.0),
+    "°": ("angle", 1.0),
+    "USD": ("currency_usd", 1.0),
+}
+
+
+def canonical_unit_symbol(raw: Optional[str]) -> Optional[str]:
+    """Map an observed spelling ("lbs.", "Inches") to its unit symbol; unknown units pass through."""
+    if not raw:
+        return None
+    return UNIT_ALIASES.get(raw.strip().lower(), raw.strip())
+
+
+class UnitRegistry:
+    """
+    Unit lookup + conversion with a precomputed factor table.
+
+    Every convertible (from_symbol, to_symbol) pair is resolved once at construction,
+    so converting a value is a dict lookup and a multiply.
+    """
+
+    def __init__(self, table: Optional[Dict[str, Tuple[str, float]]] = None):
+        table = table or _UNIT_TABLE
+        self.units: Dict[str, UnitDef] = {
+            symbol: UnitDef(symbol=symbol, dimension=dim, factor=factor) for symbol, (dim, factor) in table.items()
+        }
+        self._factors: Dict[Tuple[str, str], float] = {}
+        for a in self.units.values():
+            for b in self.units.values():
+                if a.dimension == b.dimension:
+                    self._factors[(a.symbol, b.symbol)] = a.factor / b.factor
+
+    def get(self, unit: Optional[str]) -> Optional[UnitDef]:
+        symbol = canonical_unit_symbol(unit)
+        return self.units.get(symbol) if symbol else None
+
+    def factor(self, from_unit: Optional[str], to_unit: Optional[str]) -> Optional[float]:
+        """Multiplier from `from_unit` to `to_unit`, or None when the units are not comparable."""
+        a = canonical_unit_symbol(from_unit)
+        b = canonical_unit_symbol(to_unit)
+        if not a or not b:
+            return None
+        if a == b:
+            return 1.0
+        return self._factors.get((a, b))
+
+    def convert(self, value: Optional[float], from_unit: Optional[str], to_unit: Optional[str]) -> Optional[float]:
+        if value is None:
+            return None
+        f = self.factor(from_unit, to_unit)
+        if f is None:
+            return None
+        return value if f == 1.0 else value * f
+
+    def canonical_columns(
+        self,
+        columns: Dict[str, List[Any]],
+        canonical_unit: Optional[str],
+    ) -> Dict[str, List[Any]]:
+        """
+        Convert parsed value columns (numeric/min/max + unit_used) into `canonical_unit`.
+
+        Returns canonical_value/canonical_min_value/canonical_max_value/canonical_unit arrays
+        aligned with the input. Rows whose unit cannot be converted are left as None.
+        """
+        n = len(columns.get("numeric_value", []))
+        out: Dict[str, List[Any]] = {
+            "canonical_value": [None] * n,
+            "canonical_min_value": [None] * n,
+            "canonical_max_value": [None] * n,
+            "canonical_unit": [None] * n,
+        }
+        target = canonical_unit_symbol(canonical_unit)
+        if not target:
+            return out
+
+        factor_cache: Dict[Optional[str], Optional[float]] = {}
+        for i, unit_used in enumerate(columns.get("unit_used", [])):
+            if unit_used not in factor_cache:
+                factor_cache[unit_used] = self.factor(unit_used, target)
+            f = factor_cache[unit_used]
+            if f is None:
+                continue
+
+            numeric = columns["numeric_value"][i]
+            lo = columns["min_value"][i]
+            hi = columns["max_value"][i]
+            if numeric is None and lo is None and hi is None:
+                continue
+
+            out["canonical_value"][i] = None if numeric is None else numeric * f
+            out["canonical_min_value"][i] = None if lo is None else lo * f
+            out["canonical_max_value"][i] = None if hi is None else hi * f
+            out["canonical_unit"][i] = target
+
+        return out
+
+
+DEFAULT_UNIT_REGISTRY = UnitRegistry()
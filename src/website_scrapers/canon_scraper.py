@@ -9,9 +9,24 @@ from pathlib import Path
 import xml.etree.ElementTree as ET
 from playwright.sync_api import sync_playwright
 from datetime import datetime
+from crawler_core import (
+    BoundedCrawler,
+    CrawlConfig,
+    CrawlJob,
+    count_matches,
+    default_job_path,
+    html_path_for_url,
+    print_crawl_summary,
+    wait_until_ready,
+)
 import argparse
 
 
+# Product anchors on Canon listing pages (the grid count grows as "Load More" appends items)
+PRODUCT_LINK_SELECTORS = ['a[href*="/shop/p/"]', 'a.product-item-link']
+# Spec block on Canon product pages
+PRODUCT_SPEC_SELECTORS = ['#tech-spec-data']
+
 '''This is a scraper for the Canon website. It is used to scrape the main canon shop page to find all the items on Canon's website currently for sale.'''
 
 class CanonDataScraper:
@@ -31,13 +46,23 @@ class CanonDataScraper:
         self.playwright = None
         self.browser = None
         self.page = None
+        self.context = None
+
+        # Persistent browser profile shared by start_browser() and the bulk crawler, so cookies
+        # and bot-challenge state survive between discovery, batches and runs.
+        self.profile_dir = "data/browser_profile/canon"
+
+        # Shared crawler settings for bulk HTML saving (concurrency + per-host token bucket)
+        self.crawl_config = CrawlConfig(user_data_dir=self.profile_dir, ready_selectors=PRODUCT_SPEC_SELECTORS)
 
     def start_browser(self):
-        """Start Playwright browser"""
+        """Start Playwright with a persistent browser profile (reused across runs)"""
         if not self.playwright:
+            Path(self.profile_dir).mkdir(parents=True, exist_ok=True)
             self.playwright = sync_playwright().start()
             # Use more realistic browser settings
-            self.browser = self.playwright.chromium.launch(
+            self.context = self.playwright.chromium.launch_persistent_context(
+                self.profile_dir,
                 headless=False,  # Show browser for debugging
                 args=[
                     '--no-sandbox',
@@ -45,33 +70,36 @@ class CanonDataScraper:
                     '--disable-dev-shm-usage',
                     '--disable-web-security',
                     '--disable-features=VizDisplayCompositor'
-                ]
+                ],
+                # Set viewport to look more realistic
+                viewport={"width": 1920, "height": 1080},
+                # Set more realistic headers
+                extra_http_headers={
+                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Accept-Encoding': 'gzip, deflate, br',
+                    'Connection': 'keep-alive',
+                    'Upgrade-Insecure-Requests': '1',
+                    'Sec-Fetch-Dest': 'document',
+                    'Sec-Fetch-Mode': 'navigate',
+                    'Sec-Fetch-Site': 'none',
+                    'Cache-Control': 'max-age=0'
+                },
             )
-            self.page = self.browser.new_page()
-            
-            # Set more realistic headers
-            self.page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0'
-            })
-            
-            # Set viewport to look more realistic
-            self.page.set_viewport_size({"width": 1920, "height": 1080})
+            self.browser = self.context
+            self.page = self.context.pages[0] if self.context.pages else self.context.new_page()
 
     def stop_browser(self):
-        """Stop Playwright browser"""
-        if self.browser:
-            self.browser.close()
+        """Stop Playwright browser (the profile on disk keeps cookies for the next session)"""
+        if self.context:
+            self.context.close()
         if self.playwright:
             self.playwright.stop()
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
 
     def find_body_pages(self):
         """Finds individual product pages for camera bodies using Playwright with Load More functionality"""
@@ -213,7 +241,8 @@ class CanonDataScraper:
                 
                 # Navigate to the page
                 self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
-                time.sleep(2)  # Wait for content to load
+                waited = wait_until_ready(self.page, PRODUCT_SPEC_SELECTORS)
+                print(f"  ⏱️  Page ready after {waited:.1f}s")
                 
                 # Get the page content
                 page_content = self.page.content()
@@ -295,71 +324,22 @@ class CanonDataScraper:
         return None
 
     def save_all_product_html(self, urls, company="canon", category="body", start_from_index=0):
-        """Save HTML for all product URLs with better tracking and bot detection avoidance"""
-        base_dir = Path("data/company_product")
-        saved_files = []
-        failed_urls = []
-        
-        try:
-            # Start browser once for all pages
-            self.start_browser()
-            
-            # Filter URLs to start from the specified index
-            urls_to_process = urls[start_from_index:]
-            print(f"📊 Starting from URL index {start_from_index} (processing {len(urls_to_process)} URLs)")
-            
-            for i, url in enumerate(urls_to_process, start_from_index + 1):
-                print(f"\nProcessing {i}/{len(urls)}: {url}")
-                
-                # Add random delay between requests (2-5 seconds)
-                import random
-                delay = random.uniform(2, 5)
-                print(f"  ⏱️  Waiting {delay:.1f} seconds...")
-                time.sleep(delay)
-                
-                saved_file = self.save_product_html(url, company, category)
-                if saved_file:
-                    saved_files.append(saved_file)
-                else:
-                    failed_urls.append(url)
-                
-                # Add longer delay every 10 requests to avoid detection
-                if i % 10 == 0:
-                    long_delay = random.uniform(8, 12)
-                    print(f"  🛑 Taking a longer break ({long_delay:.1f}s) to avoid detection...")
-                    time.sleep(long_delay)
-                
-                # Add even longer delay every 50 requests
-                if i % 50 == 0:
-                    very_long_delay = random.uniform(15, 25)
-                    print(f"  🛑 Taking a much longer break ({very_long_delay:.1f}s) to avoid detection...")
-                    time.sleep(very_long_delay)
-            
-            unique_files = list(set(saved_files))
-            actual_files_count = len([f for f in unique_files if f is not None])
-            
-            print(f"\n📊 Summary:")
-            print(f"  ✅ Successfully processed: {len(saved_files)} URLs")
-            print(f"  📁 Unique files saved: {actual_files_count} files")
-            print(f"  ❌ Failed to save: {len(failed_urls)} files")
-            print(f"  📁 Location: {base_dir}/{company}/raw_html/")
-            
-            # Show duplicate info if there are duplicates
-            if len(saved_files) > actual_files_count:
-                print(f"  ⚠️  Duplicates removed: {len(saved_files) - actual_files_count} files")
+        """Save HTML for all product URLs via the shared crawler (N pages in flight, rate limited per host)"""
+        urls_to_process = [(u or "").split("#")[0] for u in urls[start_from_index:]]
+        print(f"📊 Starting from URL index {start_from_index} (processing {len(urls_to_process)} URLs)")
 
-            if failed_urls:
-                print(f"\n❌ Failed URLs:")
-                for url in failed_urls:
-                    print(f"  - {url}")
-            
-            return saved_files
-            
+        # The crawler opens the same browser profile; Chromium allows one owner at a time.
+        self.stop_browser()
+        try:
+            report = BoundedCrawler(self.crawl_config).save_pages(
+                urls_to_process, lambda u: html_path_for_url(u, company)
+            )
         except Exception as e:
             print(f"Error in save_all_product_html: {e}")
-            return saved_files
-        finally:
-            self.stop_browser()
+            return []
+
+        print_crawl_summary(report, f"data/company_product/{company}/raw_html/")
+        return [r.path for r in report.results if r.ok]
 
 
     def _scrape_with_load_more(self, url, max_load_more=10):
@@ -376,7 +356,8 @@ class CanonDataScraper:
             
             print(f"🌐 Navigating to: {url}")
             self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            time.sleep(3)  # Wait for content to load
+            waited = wait_until_ready(self.page, PRODUCT_LINK_SELECTORS)
+            print(f"  ⏱️  Listing ready after {waited:.1f}s")
             
             # Get initial page content
             page_content = self.page.content()
@@ -441,7 +422,9 @@ class CanonDataScraper:
                 try:
                     # Navigate to the page
                     self.page.goto(page_url, wait_until='domcontentloaded', timeout=20000)
-                    time.sleep(2)
+                    # Past the last page the grid never shows up, so cap the wait lower than usual.
+                    waited = wait_until_ready(self.page, PRODUCT_LINK_SELECTORS, timeout_ms=5000)
+                    print(f"      ⏱️  Page ready after {waited:.1f}s")
                     
                     # Get page content
                     page_content = self.page.content()
@@ -494,7 +477,7 @@ class CanonDataScraper:
         try:
             # Navigate to the base URL
             self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            time.sleep(3)
+            wait_until_ready(self.page, PRODUCT_LINK_SELECTORS)
             
             # Get initial page content
             page_content = self.page.content()
@@ -519,8 +502,10 @@ class CanonDataScraper:
                 # Click "Load More" button
                 print(f"    🔘 Clicking 'Load More' button (attempt {load_more_count + 1}/{max_clicks})")
                 try:
+                    links_before = count_matches(self.page, PRODUCT_LINK_SELECTORS[0])
                     load_more_button.click()
-                    time.sleep(3)  # Wait for new content to load
+                    waited = wait_until_ready(self.page, PRODUCT_LINK_SELECTORS[:1], more_than=links_before)
+                    print(f"      ⏱️  Grid updated after {waited:.1f}s")
                     
                     # Get updated page content
                     page_content = self.page.content()
@@ -606,7 +591,7 @@ class CanonDataScraper:
             # Try the main Canon site first
             print("Testing access to main Canon site...")
             self.page.goto("https://www.usa.canon.com", wait_until='domcontentloaded', timeout=30000)  # Reduced timeout
-            time.sleep(3)
+            wait_until_ready(self.page, ['a[href]'])
             
             page_content = self.page.content()
             soup = BeautifulSoup(page_content, 'html.parser')
@@ -713,7 +698,7 @@ class CanonDataScraper:
                         # Try to load the page and see what we get
                         try:
                             self.page.goto(target_url, wait_until='networkidle')
-                            time.sleep(3)
+                            wait_until_ready(self.page, PRODUCT_LINK_SELECTORS)
                             page_content = self.page.content()
                             soup = BeautifulSoup(page_content, 'html.parser')
                             
@@ -750,8 +735,9 @@ class CanonDataScraper:
                 self.start_browser()
             
             print(f"Scraping specs from: {url}")
-            self.page.goto(url, wait_until='networkidle')
-            time.sleep(2)  # Wait for content to load
+            self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            waited = wait_until_ready(self.page, PRODUCT_SPEC_SELECTORS)
+            print(f"  ⏱️  Page ready after {waited:.1f}s")
             
             page_content = self.page.content()
             soup = BeautifulSoup(page_content, 'html.parser')
@@ -873,24 +859,32 @@ class CanonDataScraper:
         print(f"📄 Loaded {len(data['urls'])} URLs from: {filepath}")
         return data['urls']
     
-    def scrape_in_batches(self, urls, company="canon", category="body", batch_size=120, start_index=0):
-        """Scrape URLs in batches to avoid bot detection"""
-        total_urls = len(urls)
-        end_index = min(start_index + batch_size, total_urls)
-        
-        print(f"📊 Batch processing: URLs {start_index + 1}-{end_index} of {total_urls}")
-        print(f"📊 Processing {end_index - start_index} URLs in this batch")
-        
-        # Get the batch of URLs to process
-        batch_urls = urls[start_index:end_index]
-        
-        # Save HTML files for this batch
-        saved_files = self.save_all_product_html(batch_urls, company, category)
-        
+    def scrape_in_batches(self, urls, company="canon", category="body", batch_size=120, start_index=0, job_path=None):
+        """
+        Run (or resume) a crawl job over `urls`, fetching at most `batch_size` pending URLs per call.
+
+        Progress is checkpointed per URL in data/crawl_jobs/{company}_{category}.json, so calling
+        again continues where the last run stopped. `start_index` only skips the head of the list.
+        Returns (saved_files, next_index) where next_index is the first URL still pending.
+        """
+        urls = [(u or "").split("#")[0] for u in urls]
+        job = CrawlJob.load_or_create(job_path or default_job_path(company, category), urls)
+        self.stop_browser()  # release the shared browser profile for the crawler
+
+        report = job.run(
+            BoundedCrawler(self.crawl_config),
+            lambda u: html_path_for_url(u, company),
+            limit=batch_size,
+            start_index=start_index,
+        )
+        print_crawl_summary(report, f"data/company_product/{company}/raw_html/")
+
+        saved_files = [r.path for r in report.results if r.ok]
+        next_index = job.next_index(start_index)
         print(f"✅ Batch complete: {len(saved_files)} files saved")
-        print(f"📊 Next batch would start at index: {end_index}")
-        
-        return saved_files, end_index
+        print(f"📊 Job progress: {len(job.completed)}/{len(job.urls)} URLs done, next pending index: {next_index}")
+
+        return saved_files, next_index
 
 
 
@@ -0,0 +1,424 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+
+
+'''Shared crawler core for the legacy brand scrapers (CanonDataScraper, SonyDataScraper).
+
+Fetches N product pages concurrently in one browser, paced by a token bucket per host,
+and reports throughput. CrawlJob keeps a resumable on-disk record of which URLs are done.'''
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+]
+
+
+def is_access_denied(html):
+    """Bot-wall pages are served with a 200, so detect them by content."""
+    return "Access Denied" in (html or "")
+
+
+def is_saved_access_denied(html):
+    """A previously saved page is only re-fetched if it is the bot-wall page itself."""
+    return "<title>Access Denied</title>" in (html or "")
+
+
+_READY_JS = """
+([selectors, moreThan]) => document.title.includes("Access Denied")
+    || selectors.some((sel) => document.querySelectorAll(sel).length > moreThan)
+"""
+
+def wait_until_ready(page, selectors, more_than=0, timeout_ms=10000, idle_cap_ms=3000):
+    """
+    Wait (sync Playwright page) until one of `selectors` matches more than `more_than` elements,
+    e.g. the spec block after a goto or a grown product grid after "Load More". Falls back to
+    network idle if that never happens (or no selectors are given); both waits are capped.
+    Returns the seconds waited.
+    """
+    start = time.monotonic()
+    try:
+        if not selectors:
+            raise ValueError("no readiness selectors")
+        page.wait_for_function(_READY_JS, arg=[list(selectors), more_than], timeout=timeout_ms)
+    except Exception:
+        try:
+            page.wait_for_load_state("networkidle", timeout=idle_cap_ms)
+        except Exception:
+            pass
+    return time.monotonic() - start
+
+
+async def async_wait_until_ready(page, selectors, more_than=0, timeout_ms=10000, idle_cap_ms=3000):
+    """Async Playwright counterpart of `wait_until_ready`, used by BoundedCrawler. Returns the seconds waited."""
+    start = time.monotonic()
+    try:
+        if not selectors:
+            raise ValueError("no readiness selectors")
+        await page.wait_for_function(_READY_JS, arg=[list(selectors), more_than], timeout=timeout_ms)
+    except Exception:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=idle_cap_ms)
+        except Exception:
+            pass
+    return time.monotonic() - start
+
+
+def count_matches(page, selector):
+    try:
+        return int(page.evaluate("(sel) => document.querySelectorAll(sel).length", selector))
+    except Exception:
+        return 0
+
+
+@dataclass
+class CrawlConfig:
+    concurrency: int = 3                # pages in flight at once
+    rate_per_host: float = 0.5          # sustained requests/second per host
+    burst_per_host: int = 2             # requests allowed back-to-back before pacing kicks in
+    jitter_max: float = 1.0             # extra random 0..jitter_max seconds per request
+    max_retries: int = 3
+    nav_timeout_ms: int = 30000
+    # After domcontentloaded, wait until one of these is in the DOM (the brand's spec block, or
+    # its product grid when crawling listings), capped by ready_timeout_ms and then network idle.
+    # Empty = wait for network idle only.
+    ready_selectors: List[str] = field(default_factory=list)
+    ready_timeout_ms: int = 10000
+    idle_cap_ms: int = 3000
+    headless: bool = False
+    viewport: Dict[str, int] = field(default_factory=lambda: {"width": 1920, "height": 1080})
+    headers: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_HEADERS))
+    launch_args: List[str] = field(default_factory=lambda: list(DEFAULT_LAUNCH_ARGS))
+    # Persistent Chromium profile: cookies and solved bot challenges carry over between batches
+    # and runs (and from the scraper's own start_browser session). None = throwaway context.
+    user_data_dir: Optional[str] = None
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/second, holding at most `capacity` tokens."""
+
+    def __init__(self, rate, capacity):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, created on first use."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url):
+        host = urlparse(url).netloc.lower()
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        await bucket.acquire()
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    path: Optional[str] = None
+    error: Optional[str] = None
+    skipped: bool = False               # already on disk, not fetched
+    attempts: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    ready_seconds: float = 0.0          # time spent waiting for the page to be ready, all attempts
+
+    @property
+    def ok(self):
+        return self.path is not None and self.error is None
+
+
+@dataclass
+class CrawlReport:
+    results: List[CrawlResult] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def summary(self):
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        fetched = [r for r in self.results if not r.skipped and r.attempts > 0]
+        ok = [r for r in fetched if r.ok]
+        total_bytes = sum(r.bytes for r in fetched)
+        return {
+            "urls": len(self.results),
+            "fetched": len(fetched),
+            "saved": len(ok),
+            "skipped_existing": len([r for r in self.results if r.skipped]),
+            "failed": len([r for r in self.results if r.error]),
+            "elapsed_seconds": round(elapsed, 2),
+            "pages_per_minute": round(len(fetched) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "bytes_fetched": total_bytes,
+            "avg_page_seconds": round(sum(r.seconds for r in fetched) / len(fetched), 2) if fetched else 0.0,
+            "avg_ready_seconds": round(sum(r.ready_seconds for r in fetched) / len(fetched), 2) if fetched else 0.0,
+        }
+
+
+class BoundedCrawler:
+    """
+    Fetch pages with at most `concurrency` in flight, paced per host by a token bucket.
+
+    The crawler is I/O only: callers decide where HTML goes via `path_for_url`.
+    """
+
+    def __init__(self, config: Optional[CrawlConfig] = None):
+        self.config = config or CrawlConfig()
+
+    def save_pages(
+        self,
+        urls: List[str],
+        path_for_url: Callable[[str], Path],
+        on_result: Optional[Callable[[CrawlResult], None]] = None,
+    ) -> CrawlReport:
+        """
+        Save each URL's rendered HTML to `path_for_url(url)`.
+
+        Existing files are kept (no fetch) unless they hold an "Access Denied" page.
+        `on_result` is called after every URL, e.g. to checkpoint a CrawlJob.
+        """
+        return asyncio.run(self._save_pages(urls, path_for_url, on_result))
+
+    async def _save_pages(self, urls, path_for_url, on_result) -> CrawlReport:
+        cfg = self.config
+        report = CrawlReport()
+        limiter = HostRateLimiter(cfg.rate_per_host, cfg.burst_per_host)
+        queue: asyncio.Queue = asyncio.Queue()
+        for u in urls:
+            queue.put_nowait(u)
+
+        async with async_playwright() as p:
+            browser = None
+            if cfg.user_data_dir:
+                Path(cfg.user_data_dir).mkdir(parents=True, exist_ok=True)
+                context = await p.chromium.launch_persistent_context(
+                    cfg.user_data_dir,
+                    headless=cfg.headless,
+                    args=cfg.launch_args,
+                    viewport=cfg.viewport,
+                    extra_http_headers=cfg.headers,
+                )
+            else:
+                browser = await p.chromium.launch(headless=cfg.headless, args=cfg.launch_args)
+                context = await browser.new_context(viewport=cfg.viewport, extra_http_headers=cfg.headers)
+            try:
+                async def worker():
+                    page = await context.new_page()
+                    try:
+                        while True:
+                            try:
+                                url = queue.get_nowait()
+                            except asyncio.QueueEmpty:
+                                return
+                            result = await self._save_one(page, limiter, url, path_for_url(url))
+                            report.results.append(result)
+                            self._print_progress(report, len(urls), result)
+                            if on_result:
+                                on_result(result)
+                    finally:
+                        await page.close()
+
+                workers = max(1, min(cfg.concurrency, len(urls)))
+                await asyncio.gather(*[worker() for _ in range(workers)])
+            finally:
+                await context.close()
+                if browser is not None:
+                    await browser.close()
+
+        report.finished_at = time.monotonic()
+        return report
+
+    async def _save_one(self, page, limiter: HostRateLimiter, url: str, filepath: Path) -> CrawlResult:
+        cfg = self.config
+        result = CrawlResult(url=url)
+
+        if filepath.exists():
+            try:
+                if not is_saved_access_denied(filepath.read_text(encoding='utf-8')):
+                    result.path = str(filepath)
+                    result.skipped = True
+                    return result
+            except Exception:
+                pass  # unreadable file: fetch and overwrite
+
+        started = time.monotonic()
+        for attempt in range(cfg.max_retries):
+            result.attempts = attempt + 1
+            await limiter.acquire(url)
+            if cfg.jitter_max > 0:
+                await asyncio.sleep(random.uniform(0, cfg.jitter_max))
+            try:
+                await page.goto(url, wait_until='domcontentloaded', timeout=cfg.nav_timeout_ms)
+                result.ready_seconds += await async_wait_until_ready(
+                    page, cfg.ready_selectors, timeout_ms=cfg.ready_timeout_ms, idle_cap_ms=cfg.idle_cap_ms
+                )
+                html = await page.content()
+                result.bytes += len(html.encode('utf-8'))
+
+                if is_access_denied(html):
+                    result.error = "access_denied"
+                    break
+
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                filepath.write_text(html, encoding='utf-8')
+                result.path = str(filepath)
+                result.error = None
+                break
+            except Exception as e:
+                result.error = f"attempt_{attempt + 1}_error:{e}"
+                if attempt < cfg.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+        result.seconds = time.monotonic() - started
+        return result
+
+    @staticmethod
+    def _print_progress(report: CrawlReport, total: int, result: CrawlResult):
+        done = len(report.results)
+        if result.skipped:
+            print(f"  ⏭️  [{done}/{total}] Already saved: {result.path}")
+        elif result.ok:
+            print(f"  ✅ [{done}/{total}] Saved: {result.path} ({result.seconds:.1f}s)")
+        else:
+            print(f"  ❌ [{done}/{total}] Failed: {result.url} ({result.error})")
+
+
+class CrawlJob:
+    """
+    Resumable crawl state stored as JSON:
+      {"urls": [...], "completed": {url: path}, "failed": {url: error}, ...}
+
+    Every finished URL is checkpointed immediately, so a restarted job continues with
+    whatever is still pending instead of a hand-maintained start_index.
+    """
+
+    def __init__(self, path: Path, urls: List[str]):
+        self.path = Path(path)
+        self.urls: List[str] = list(urls)
+        self.completed: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+        self.created_at = str(datetime.now())
+
+    @classmethod
+    def load_or_create(cls, path, urls: List[str]) -> "CrawlJob":
+        job = cls(path, urls)
+        p = Path(path)
+        if p.exists():
+            try:
+                data = json.loads(p.read_text(encoding='utf-8'))
+                job.completed = dict(data.get("completed") or {})
+                job.failed = dict(data.get("failed") or {})
+                job.created_at = data.get("created_at") or job.created_at
+                # Keep URLs from the previous run that the caller didn't pass again.
+                seen = set(job.urls)
+                job.urls.extend([u for u in data.get("urls") or [] if u not in seen])
+            except Exception as e:
+                print(f"⚠️  Could not read crawl job {p}, starting fresh: {e}")
+        return job
+
+    def pending(self, start_index=0) -> List[str]:
+        return [u for u in self.urls[start_index:] if u not in self.completed]
+
+    def next_index(self, start_index=0) -> int:
+        """Index of the first URL not yet completed (len(urls) when the job is done)."""
+        for i in range(start_index, len(self.urls)):
+            if self.urls[i] not in self.completed:
+                return i
+        return len(self.urls)
+
+    def run(self, crawler: "BoundedCrawler", path_for_url, limit=None, start_index=0) -> CrawlReport:
+        """Crawl up to `limit` pending URLs, checkpointing after each one."""
+        todo = self.pending(start_index)
+        if limit is not None:
+            todo = todo[:limit]
+        print(f"📊 Crawl job {self.path}: {len(self.completed)}/{len(self.urls)} done, processing {len(todo)} now")
+        if not todo:
+            return CrawlReport(finished_at=time.monotonic())
+        self.save()
+        return crawler.save_pages(todo, path_for_url, on_result=self.record)
+
+    def record(self, result: CrawlResult):
+        if result.ok:
+            self.completed[result.url] = result.path
+            self.failed.pop(result.url, None)
+        else:
+            self.failed[result.url] = result.error or "unknown_error"
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data: Dict[str, Any] = {
+            "created_at": self.created_at,
+            "updated_at": str(datetime.now()),
+            "total_urls": len(self.urls),
+            "completed_count": len(self.completed),
+            "urls": self.urls,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        tmp.replace(self.path)
+
+
+def html_path_for_url(url, company):
+    """data/company_product/{company}/raw_html/{last-path-segment}.html (fragments dropped)."""
+    filename = (url or "").split('#')[0].split('/')[-1]
+    if not filename.endswith('.html'):
+        filename += '.html'
+    return Path("data/company_product") / company / "raw_html" / filename
+
+
+def default_job_path(company, category):
+    return Path("data/crawl_jobs") / f"{company}_{category}.json"
+
+
+def print_crawl_summary(report: CrawlReport, location):
+    stats = report.summary()
+    failed = [r for r in report.results if r.error]
+    print(f"\n📊 Summary:")
+    print(f"  ✅ Saved: {stats['saved']} fetched, {stats['skipped_existing']} already on disk")
+    print(f"  ❌ Failed to save: {stats['failed']} files")
+    print(f"  ⚡ Throughput: {stats['pages_per_minute']} pages/min over {stats['elapsed_seconds']}s "
+          f"(avg {stats['avg_page_seconds']}s/page, {stats['avg_ready_seconds']}s of it waiting for the page, "
+          f"{stats['bytes_fetched'] / 1e6:.1f} MB)")
+    print(f"  📁 Location: {location}")
+    if failed:
+        print(f"\n❌ Failed URLs:")
+        for r in failed:
+            print(f"  - {r.url} ({r.error})")
@@ -0,0 +1,15 @@
+-- Canonical-unit values for product_spec
+-- numeric_value/min_value/max_value + unit_used keep what the source said (e.g. 1.5 lb);
+-- canonical_* hold the same numbers converted into spec_definition.unit (e.g. 680.39 g)
+-- so range filters and numeric indexes work across brands.
+
+ALTER TABLE product_spec
+    ADD COLUMN IF NOT EXISTS canonical_value NUMERIC,
+    ADD COLUMN IF NOT EXISTS canonical_min_value NUMERIC,
+    ADD COLUMN IF NOT EXISTS canonical_max_value NUMERIC,
+    ADD COLUMN IF NOT EXISTS canonical_unit TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_product_spec_canonical_value
+    ON product_spec(spec_definition_id, canonical_value);
+CREATE INDEX IF NOT EXISTS idx_product_spec_canonical_range
+    ON product_spec(spec_definition_id, canonical_min_value, canonical_max_value);
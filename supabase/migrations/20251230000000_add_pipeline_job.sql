@@ -0,0 +1,38 @@
+-- Pipeline job queue
+-- One row per (plugin, task, product URL). Workers on any node claim pending rows with
+-- FOR UPDATE SKIP LOCKED, hold them under a lease, and write the result back; a row whose
+-- lease ran out (worker crashed) is claimed again until max_attempts is used up.
+
+CREATE TABLE IF NOT EXISTS pipeline_job (
+    id BIGSERIAL PRIMARY KEY,
+
+    brand_slug TEXT NOT NULL,
+    product_type TEXT NOT NULL,
+    task TEXT NOT NULL, -- extract (fetch + parse), normalize
+    product_url TEXT NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'pending', -- pending, running, done, failed
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+
+    claimed_by TEXT, -- worker id (host:pid)
+    claimed_at TIMESTAMP WITH TIME ZONE,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+
+    result JSONB, -- extraction item / normalized item
+    last_error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE,
+
+    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    UNIQUE (brand_slug, product_type, task, product_url)
+);
+
+-- Claim path: pending rows that are due, plus running rows whose lease ran out.
+CREATE INDEX IF NOT EXISTS idx_pipeline_job_claim
+    ON pipeline_job(brand_slug, product_type, task, status, priority DESC, run_after)
+    WHERE status IN ('pending', 'running');
@@ -0,0 +1,12 @@
+-- Refresh bookkeeping for product
+-- Each persist stores a hash of the scraped content; scrape_count/change_count/last_changed_at
+-- record how often a product's page actually changes, which the refresh scheduler uses to
+-- decide what to fetch next.
+
+ALTER TABLE product
+    ADD COLUMN IF NOT EXISTS content_hash TEXT,
+    ADD COLUMN IF NOT EXISTS scrape_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS change_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_changed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_product_manufacturer_url ON product(manufacturer_url);
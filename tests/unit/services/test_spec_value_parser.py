@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "backend" / "src"))
+
+from services.spec_value_parser import SpecValueParser  # noqa: E402
+
+
+def test_dimensions_do_not_read_as_magnification():
+    parser = SpecValueParser()
+
+    for unit in ("pixels", None):
+        parsed = parser.parse_one("6000 x 4000", "number", unit)
+        assert parsed["numeric_value"] == 6000.0
+        assert parsed["unit_used"] is None
+
+    parsed = parser.parse_one("Approx. 6000 x 4000 pixels", "number", None)
+    assert parsed["unit_used"] is None
+
+
+def test_magnification_still_parses():
+    parser = SpecValueParser()
+
+    for unit in ("x", None):
+        parsed = parser.parse_one("10x", "number", unit)
+        assert parsed["numeric_value"] == 10.0
+        assert parsed["unit_used"] == "x"
+
+    parsed = parser.parse_one("0.76 x", "number", None)
+    assert parsed["unit_used"] == "x"
@@ -0,0 +1,54 @@
+import gzip
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "backend" / "src"))
+
+from agents.spec_pipeline.core.sitemap import iter_sitemap  # noqa: E402
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/p/a</loc><lastmod>2025-01-02</lastmod></url>
+  <url><loc>https://example.com/p/b</loc></url>
+</urlset>
+"""
+
+
+def _serve(routes):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, content_type = routes[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _entries(url):
+    return [(e.loc, e.lastmod) for e in iter_sitemap(url)]
+
+
+def test_streams_plain_and_gzipped_sitemaps():
+    server = _serve(
+        {
+            "/sitemap.xml": (URLSET, "application/xml"),
+            "/sitemap.xml.gz": (gzip.compress(URLSET), "application/x-gzip"),
+        }
+    )
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        expected = [("https://example.com/p/a", "2025-01-02"), ("https://example.com/p/b", None)]
+        assert _entries(base + "/sitemap.xml") == expected
+        assert _entries(base + "/sitemap.xml.gz") == expected
+    finally:
+        server.shutdown()